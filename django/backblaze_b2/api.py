@@ -1,9 +1,21 @@
 import base64
 import hashlib
+import io
 import json
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import quote
 
 import requests
 
+AUTHORIZE_ACCOUNT_URL = "https://api.backblazeb2.com/b2api/v2/b2_authorize_account"
+# The size of the chunks streamed to and from B2
+CHUNK_SIZE = 1024 * 64
+SHA1_HEX_LENGTH = 40
+# The status codes of failed uploads after which B2 recommends retrying the
+# upload with a new upload URL
+UPLOAD_RETRY_STATUS_CODES = (401, 408, 503)
+
 
 class AuthorizedSession:
     def __init__(
@@ -36,7 +48,7 @@ class AuthorizedSession:
         return f"{self.download_url}{endpoint}"
 
     def get_download_url_by_name(self, file_name):
-        return f"{self.download_url}/file/{self.bucket_name}/{file_name}"
+        return f"{self.download_url}/file/{self.bucket_name}/{quote(file_name)}"
 
     @classmethod
     def from_response(cls, response):
@@ -52,17 +64,14 @@ class AuthorizedSession:
         )
 
     @classmethod
-    def authorize_account(cls, application_key_id, application_key):
+    def authorize_account(cls, application_key_id, application_key, http=requests):
         authorization_token = base64.b64encode(
             f"{application_key_id}:{application_key}".encode("utf-8")
         ).decode("utf-8")
         headers = {
             "Authorization": f"Basic: {authorization_token}",
         }
-        response = requests.get(
-            "https://api.backblazeb2.com/b2api/v2/b2_authorize_account",
-            headers=headers,
-        )
+        response = http.get(AUTHORIZE_ACCOUNT_URL, headers=headers)
         # TODO: Handle 400 bad_request (invalid request data)
         # TODO: Handle 401 unauthorized (key ID or key is wrong)
         # TODO: Handle 401 unsupported (key valid but cannot be used)
@@ -80,12 +89,144 @@ class UploadSession:
     def from_response(cls, response):
         data = response.json()
         return cls(
-            bucket_id=data["authorizationToken"],
+            bucket_id=data["bucketId"],
+            upload_url=data["uploadUrl"],
+            authorization_token=data["authorizationToken"],
+        )
+
+
+class UploadPartSession:
+    def __init__(self, file_id, upload_url, authorization_token):
+        self.file_id = file_id
+        self.upload_url = upload_url
+        self.authorization_token = authorization_token
+
+    @classmethod
+    def from_response(cls, response):
+        data = response.json()
+        return cls(
+            file_id=data["fileId"],
             upload_url=data["uploadUrl"],
             authorization_token=data["authorizationToken"],
         )
 
 
+class UploadUrlPool:
+    """
+    A thread-safe pool of upload URLs along with their authorization tokens
+
+    An upload URL can be reused for any number of uploads, but only for one
+    at a time, so each upload takes a URL from the pool and returns it once
+    done. URLs of failed uploads are discarded instead, as B2 recommends
+    getting a new upload URL after e.g. a 401 or 503.
+    """
+
+    def __init__(self, create_session):
+        self.create_session = create_session
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._sessions:
+                return self._sessions.pop()
+        return self.create_session()
+
+    def release(self, session):
+        with self._lock:
+            self._sessions.append(session)
+
+
+class Sha1AppendingReader:
+    """
+    Streams a file to B2, hashing it along the way and appending the
+    hex digest of its SHA-1 after it, as B2 accepts in place of a SHA-1
+    known before the upload. This spares reading the file twice.
+    """
+
+    def __init__(self, content):
+        content.seek(0)
+        self.content = content
+        self.size = content.size
+        self.digest = hashlib.sha1()
+        self.finished = False
+
+    def __len__(self):
+        return self.size + SHA1_HEX_LENGTH
+
+    def __iter__(self):
+        return iter(lambda: self.read(CHUNK_SIZE), b"")
+
+    def read(self, size=-1):
+        if self.finished:
+            return b""
+        data = self.content.read(size)
+        if data:
+            self.digest.update(data)
+            return data
+        self.finished = True
+        return self.digest.hexdigest().encode("ascii")
+
+
+class DownloadStream(io.RawIOBase):
+    """
+    A file in B2 read through a streamed download
+
+    Sequential reads are served from a single response, and seeking
+    elsewhere starts a new download from that offset, so only the bytes
+    read are transferred.
+    """
+
+    def __init__(self, api, file_name, size):
+        self.api = api
+        self.file_name = file_name
+        self.size = size
+        self._position = 0
+        self._response = None
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("Negative seek position")
+        if offset != self._position:
+            self._close_response()
+            self._position = offset
+        return self._position
+
+    def readinto(self, buffer):
+        if self._position >= self.size or not len(buffer):
+            return 0
+        if self._response is None:
+            self._response = self.api.download_file(
+                self.file_name, offset=self._position
+            )
+        data = self._response.raw.read(len(buffer))
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def close(self):
+        self._close_response()
+        super().close()
+
+    def _close_response(self):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+
+
 class BackblazeB2API:
     def __init__(self, application_key_id, application_key, bucket_id):
         self.application_key_id = application_key_id
@@ -94,6 +235,10 @@ class BackblazeB2API:
         # TODO: Support bucket name by checking it from the authorized session's
         #       "allowed" field
         self._session = None
+        # Reuses connections between requests, sparing a TLS handshake from
+        # every request made after the first one
+        self.http = requests.Session()
+        self.upload_pool = UploadUrlPool(self.create_upload_session)
 
     @property
     def session(self):
@@ -105,6 +250,7 @@ class BackblazeB2API:
         self._session = AuthorizedSession.authorize_account(
             application_key_id=self.application_key_id,
             application_key=self.application_key,
+            http=self.http,
         )
         if self._session.allowed["bucketId"] != self.bucket_id:
             raise RuntimeError("Invalid bucket ID received")
@@ -133,14 +279,40 @@ class BackblazeB2API:
             if response.status_code not in retry_statuscodes:
                 break
             attempts_left -= 1
+            if attempts_left > 0:
+                # Releases the connection of a streamed response for reuse
+                response.close()
         response.raise_for_status()
         return response
 
     def do_get_request(self, url, **kwargs):
-        return self.do_request(requests.get, url, **kwargs)
+        return self.do_request(self.http.get, url, **kwargs)
 
     def do_post_request(self, url, **kwargs):
-        return self.do_request(requests.post, url, **kwargs)
+        return self.do_request(self.http.post, url, **kwargs)
+
+    def do_upload_request(self, upload_pool, attempt_upload):
+        """
+        Uploads with an upload URL from the pool, retrying with a new URL
+        when the upload fails in a way B2 recommends retrying
+        """
+        attempts_left = 3
+        while True:
+            attempts_left -= 1
+            upload_session = upload_pool.acquire()
+            try:
+                response = attempt_upload(upload_session)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempts_left == 0:
+                    raise
+                continue
+            if response.status_code not in UPLOAD_RETRY_STATUS_CODES:
+                upload_pool.release(upload_session)
+                break
+            if attempts_left == 0:
+                break
+        response.raise_for_status()
+        return response
 
     def create_upload_session(self):
         url = self.session.get_api_url("/b2api/v2/b2_get_upload_url")
@@ -180,25 +352,30 @@ class BackblazeB2API:
         return response.json()
 
     def upload_file(self, name, content):
-        content.seek(0)
-        content_sha1 = hashlib.sha1(content.read()).hexdigest()
-        content_size = content.size
+        # The SHA-1 may have been computed already while validating the file,
+        # otherwise it's computed while streaming the file
+        content_sha1 = getattr(content, "content_sha1", None)
 
-        def attempt_upload(auth_token):
+        def attempt_upload(upload_session):
+            if content_sha1 is None:
+                data = Sha1AppendingReader(content)
+                sha1_header = "hex_digits_at_end"
+            else:
+                content.seek(0)
+                data = content
+                sha1_header = content_sha1
             headers = {
-                "Authorization": auth_token,
+                "Authorization": upload_session.authorization_token,
                 "Content-Type": "b2/x-auto",
-                "Content-Length": str(content_size),
-                "X-Bz-File-Name": name,
-                "X-Bz-Content-Sha1": content_sha1,
+                "Content-Length": str(len(data)),
+                "X-Bz-File-Name": quote(name),
+                "X-Bz-Content-Sha1": sha1_header,
                 # TODO: Add last modified header
             }
-
-            content.seek(0)
-            return requests.post(
+            return self.http.post(
                 upload_session.upload_url,
                 headers=headers,
-                data=content,
+                data=data,
             )
 
         # TODO: Handle 400 bad_request (invalid request data)
@@ -207,28 +384,115 @@ class BackblazeB2API:
         # TODO: Handle 401 expired_auth_token (expired auth token)
         # TODO: Handle 403 cap_exceeded (usage cap exceeded)
         # TODO: Handle 405 method_not_allowed (only post is supported)
-        # TODO: Handle 408 request_timeout (service timeouted during upload)
-        # TODO: Handle 503 service_unavailable (retry upload with a new session)
-        upload_session = self.create_upload_session()
-        attempts_left = 3
-        while attempts_left > 0:
-            response = attempt_upload(upload_session.authorization_token)
-            if response.status_code == 503:
-                upload_session = self.create_upload_session()
-            if response.status_code == 401:
-                self.refresh_session()
-            if response.status_code not in (503, 408, 401):
-                break
-            attempts_left -= 1
-        response.raise_for_status()
+        response = self.do_upload_request(self.upload_pool, attempt_upload)
         return response  # TODO: Return a python object of the data
 
+    def start_large_file(self, name, content_sha1=None):
+        request_content = {
+            "bucketId": self.bucket_id,
+            "fileName": name,
+            "contentType": "b2/x-auto",
+        }
+        if content_sha1:
+            request_content["fileInfo"] = {"large_file_sha1": content_sha1}
+        response = self.do_post_request(
+            self.session.get_api_url("/b2api/v2/b2_start_large_file"),
+            data=json.dumps(request_content),
+        )
+        return response.json()["fileId"]
+
+    def create_upload_part_session(self, file_id):
+        response = self.do_post_request(
+            self.session.get_api_url("/b2api/v2/b2_get_upload_part_url"),
+            data=json.dumps({"fileId": file_id}),
+        )
+        return UploadPartSession.from_response(response)
+
+    def upload_part(self, file_id, part_number, data, upload_pool=None):
+        part_sha1 = hashlib.sha1(data).hexdigest()
+        if upload_pool is None:
+            upload_pool = UploadUrlPool(
+                lambda: self.create_upload_part_session(file_id)
+            )
+
+        def attempt_upload(upload_session):
+            headers = {
+                "Authorization": upload_session.authorization_token,
+                "Content-Length": str(len(data)),
+                "X-Bz-Part-Number": str(part_number),
+                "X-Bz-Content-Sha1": part_sha1,
+            }
+            return self.http.post(
+                upload_session.upload_url,
+                headers=headers,
+                data=data,
+            )
+
+        self.do_upload_request(upload_pool, attempt_upload)
+        return part_sha1
+
+    def finish_large_file(self, file_id, part_sha1s):
+        return self.do_post_request(
+            self.session.get_api_url("/b2api/v2/b2_finish_large_file"),
+            data=json.dumps({"fileId": file_id, "partSha1Array": part_sha1s}),
+        )
+
+    def cancel_large_file(self, file_id):
+        return self.do_post_request(
+            self.session.get_api_url("/b2api/v2/b2_cancel_large_file"),
+            data=json.dumps({"fileId": file_id}),
+        )
+
+    def upload_large_file(self, name, content, part_size, max_workers):
+        """
+        Uploads a file in parts of `part_size` bytes, up to `max_workers` of
+        them in parallel. Only the parts being uploaded are held in memory.
+        """
+        file_id = self.start_large_file(
+            name, content_sha1=getattr(content, "content_sha1", None)
+        )
+        # Every concurrent part upload needs an upload URL of its own, which
+        # are then reused for the following parts
+        upload_pool = UploadUrlPool(lambda: self.create_upload_part_session(file_id))
+        try:
+            content.seek(0)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                uploads = []
+                for part_number, data in enumerate(
+                    iter(lambda: content.read(part_size), b""), start=1
+                ):
+                    in_progress = [x for x in uploads if not x.done()]
+                    if len(in_progress) >= max_workers:
+                        wait(in_progress, return_when=FIRST_COMPLETED)
+                    uploads.append(
+                        executor.submit(
+                            self.upload_part, file_id, part_number, data, upload_pool
+                        )
+                    )
+                part_sha1s = [x.result() for x in uploads]
+        except Exception:
+            self.cancel_large_file(file_id)
+            raise
+        return self.finish_large_file(file_id, part_sha1s)
+
     def get_file_url(self, file_name):
         return self.session.get_download_url_by_name(file_name)
 
-    def download_file(self, file_id):
-        url = self.session.get_download_url(file_id)
-        response = self.do_get_request(url)  # TODO: Use streaming
+    def download_file(self, file_name, offset=0, length=None):
+        """
+        Starts a streamed download of a file, or of `length` bytes of it
+        starting from `offset`. The content is read from the response as it
+        arrives, e.g. with response.iter_content() or response.raw.read().
+        """
+        headers = {}
+        if offset or length is not None:
+            end = "" if length is None else offset + length - 1
+            headers["Range"] = f"bytes={offset}-{end}"
+        response = self.do_get_request(
+            self.session.get_download_url_by_name(file_name),
+            headers=headers,
+            stream=True,
+        )
         # TODO: Handle 400 bad_request (invalid request data)
         # TODO: Handle 401 unauthorized (valid auth token but no privileges)
         # TODO: Handle 401 bad_auth_token (invalid auth token)
@@ -236,4 +500,10 @@ class BackblazeB2API:
         # TODO: Handle 404 not_found (file not found in b2)
         # TODO: Handle 416 range_not_satisfiable (invalid requested data range)
         response.raise_for_status()
-        return response.content
+        return response
+
+    def read_file_range(self, file_name, offset, length):
+        if length <= 0:
+            return b""
+        with self.download_file(file_name, offset=offset, length=length) as response:
+            return response.raw.read(length)
@@ -1,4 +1,4 @@
-from io import BytesIO
+from io import BufferedReader
 
 from django.core.exceptions import SuspiciousOperation
 from django.core.files.base import File
@@ -7,7 +7,7 @@ from django.utils import timezone
 from django.utils.deconstruct import deconstructible
 from storages.utils import clean_name, get_available_overwrite_name, safe_join, setting
 
-from .api import BackblazeB2API
+from .api import CHUNK_SIZE, BackblazeB2API, DownloadStream
 from .models import BackblazeB2File
 
 
@@ -18,6 +18,8 @@ class BackblazeB2Storage(Storage):
     bucket_id = setting("B2_BUCKET_ID")
     location = setting("B2_LOCATION")
     file_overwrite = setting("B2_FILE_OVERWRITE", True)
+    upload_part_size = setting("B2_UPLOAD_PART_SIZE", 1024 * 1024 * 25)
+    upload_threads = setting("B2_UPLOAD_THREADS", 4)
 
     def __init__(self, **settings):
         # Override class parameters from kwargs
@@ -33,18 +35,31 @@ class BackblazeB2Storage(Storage):
         self.cache = {}
 
     def _open(self, name, mode="rb"):
+        if "w" in mode:
+            raise ValueError("Files can only be opened for reading")
+        file_name = self._normalize_name(clean_name(name))
+        stream = DownloadStream(self.b2api, file_name, self.size(name))
+        return File(BufferedReader(stream, buffer_size=CHUNK_SIZE), name)
+
+    def read_range(self, name, offset, length):
         name = self._normalize_name(clean_name(name))
-        # TODO: Use streaming
-        content = self.b2api.download_file(self.self.get_b2_id(name))
-        content_buffer = BytesIO()
-        content_buffer.write(content)
-        content_buffer.seek(0)
-        return File(content_buffer, name)
+        return self.b2api.read_file_range(name, offset, length)
 
     def _save(self, name, content):
         cleaned_name = clean_name(name)
         name = self._normalize_name(cleaned_name)
-        response = self.b2api.upload_file(name, content)
+        part_size = max(
+            self.upload_part_size, self.b2api.session.absolute_minimum_part_size
+        )
+        if content.size > part_size:
+            response = self.b2api.upload_large_file(
+                name,
+                content,
+                part_size=part_size,
+                max_workers=self.upload_threads,
+            )
+        else:
+            response = self.b2api.upload_file(name, content)
         data = response.json()
         if data["fileName"] != name:
             raise RuntimeError("Filename mismatch")
@@ -63,7 +78,7 @@ class BackblazeB2Storage(Storage):
 
     def get_b2_id(self, name):
         if name in self.cache:
-            return self.cache[name]
+            return self.cache[name].b2_id
         return BackblazeB2File.objects.values_list("b2_id", flat=True).get(name=name)
 
     def _normalize_name(self, name):
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+BUCKET_ID = "test-bucket-id"
+BUCKET_NAME = "test-bucket"
+MINIMUM_PART_SIZE = 5
+CHUNK_SIZE = 1024 * 64
+
+
+class B2State:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Files are kept on disk, so that the memory use of the server
+        # doesn't depend on the sizes of the files either
+        self.files = {}
+        self.large_files = {}
+        self.next_id = 0
+        self.requests = []
+        self.fail_next = {}
+        self.connections = 0
+
+    def create_id(self):
+        with self.lock:
+            self.next_id += 1
+            return f"file-{self.next_id}"
+
+    def read_file(self, name):
+        file = self.files[name]
+        file.seek(0)
+        return file.read()
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+
+
+class B2RequestHandler(BaseHTTPRequestHandler):
+    """
+    A stand-in for the parts of the B2 API used by the storage backend
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Responses are written in multiple parts, which would otherwise be
+    # delayed on the kept alive connections
+    disable_nagle_algorithm = True
+
+    @property
+    def state(self) -> B2State:
+        return self.server.state
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        return json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+    def handle_request(self, method):
+        path = urlparse(self.path).path
+        self.state.requests.append((method, path, self.headers))
+        status = self.state.fail_next.pop(path, None)
+        if status is not None:
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_json({"status": status}, status=status)
+            return
+        for pattern, handler in self.routes:
+            match = re.fullmatch(pattern, path)
+            if match:
+                handler(self, *match.groups())
+                return
+        self.send_json({"status": 404}, status=404)
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def authorize_account(self):
+        base_url = self.server.url
+        self.send_json(
+            {
+                "accountId": "account",
+                "apiUrl": base_url,
+                "downloadUrl": base_url,
+                "authorizationToken": "token",
+                "absoluteMinimumPartSize": MINIMUM_PART_SIZE,
+                "recommendedPartSize": MINIMUM_PART_SIZE,
+                "allowed": {"bucketId": BUCKET_ID, "bucketName": BUCKET_NAME},
+            }
+        )
+
+    def get_upload_url(self):
+        self.send_json(
+            {
+                "bucketId": BUCKET_ID,
+                "uploadUrl": f"{self.server.url}/upload",
+                "authorizationToken": "upload-token",
+            }
+        )
+
+    def receive_content(self):
+        """
+        Streams the request body to a temporary file, verifying its SHA-1
+        """
+        remaining = int(self.headers["Content-Length"])
+        sha1 = self.headers["X-Bz-Content-Sha1"]
+        if sha1 == "hex_digits_at_end":
+            remaining -= 40
+        file = tempfile.TemporaryFile()
+        digest = hashlib.sha1()
+        while remaining > 0:
+            chunk = self.rfile.read(min(CHUNK_SIZE, remaining))
+            digest.update(chunk)
+            file.write(chunk)
+            remaining -= len(chunk)
+        if sha1 == "hex_digits_at_end":
+            sha1 = self.rfile.read(40).decode("ascii")
+        if digest.hexdigest() != sha1:
+            file.close()
+            self.send_json({"status": 400, "code": "bad_request"}, status=400)
+            return None, None
+        return file, sha1
+
+    def upload(self):
+        file, sha1 = self.receive_content()
+        if file is not None:
+            self.store_file(unquote(self.headers["X-Bz-File-Name"]), file, sha1)
+
+    def store_file(self, name, file, sha1):
+        self.state.files[name] = file
+        self.send_json(
+            {
+                "fileId": self.state.create_id(),
+                "fileName": name,
+                "bucketId": BUCKET_ID,
+                "contentLength": file.tell(),
+                "contentSha1": sha1,
+                "contentType": "application/octet-stream",
+            }
+        )
+
+    def start_large_file(self):
+        data = self.read_json()
+        file_id = self.state.create_id()
+        self.state.large_files[file_id] = {"name": data["fileName"], "parts": {}}
+        self.send_json({"fileId": file_id})
+
+    def get_upload_part_url(self):
+        data = self.read_json()
+        self.send_json(
+            {
+                "fileId": data["fileId"],
+                "uploadUrl": f"{self.server.url}/upload-part/{data['fileId']}",
+                "authorizationToken": "upload-token",
+            }
+        )
+
+    def upload_part(self, file_id):
+        file, sha1 = self.receive_content()
+        if file is None:
+            return
+        part_number = int(self.headers["X-Bz-Part-Number"])
+        with self.state.lock:
+            self.state.large_files[file_id]["parts"][part_number] = (file, sha1)
+        self.send_json({"fileId": file_id, "partNumber": part_number})
+
+    def finish_large_file(self):
+        data = self.read_json()
+        large_file = self.state.large_files.pop(data["fileId"])
+        parts = [large_file["parts"][x] for x in sorted(large_file["parts"])]
+        if [sha1 for _, sha1 in parts] != data["partSha1Array"]:
+            self.send_json({"status": 400}, status=400)
+            return
+        file = tempfile.TemporaryFile()
+        for part, _ in parts:
+            part.seek(0)
+            shutil.copyfileobj(part, file)
+            part.close()
+        self.store_file(large_file["name"], file, "none")
+
+    def cancel_large_file(self):
+        data = self.read_json()
+        self.state.large_files.pop(data["fileId"], None)
+        self.send_json({"fileId": data["fileId"]})
+
+    def download(self, bucket_name, name):
+        file = self.state.files.get(unquote(name))
+        if bucket_name != BUCKET_NAME or file is None:
+            self.send_json({"status": 404}, status=404)
+            return
+        size = file.seek(0, 2)
+        status = 200
+        start, end = 0, size - 1
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match:
+            status = 206
+            start = int(match.group(1))
+            end = min(int(match.group(2) or end), end)
+        self.send_response(status)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        # Concurrent downloads of the file mustn't move each other's position
+        offset = start
+        while offset <= end:
+            chunk = os.pread(file.fileno(), min(CHUNK_SIZE, end + 1 - offset), offset)
+            self.wfile.write(chunk)
+            offset += len(chunk)
+
+    routes = (
+        (r"/b2api/v2/b2_authorize_account", authorize_account),
+        (r"/b2api/v2/b2_get_upload_url", get_upload_url),
+        (r"/upload", upload),
+        (r"/b2api/v2/b2_start_large_file", start_large_file),
+        (r"/b2api/v2/b2_get_upload_part_url", get_upload_part_url),
+        (r"/upload-part/([^/]+)", upload_part),
+        (r"/b2api/v2/b2_finish_large_file", finish_large_file),
+        (r"/b2api/v2/b2_cancel_large_file", cancel_large_file),
+        (r"/file/([^/]+)/(.+)", download),
+    )
+
+
+class B2Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), B2RequestHandler)
+        self.state = B2State()
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def handle_error(self, request, client_address):
+        # Clients stop reading downloads midway when seeking elsewhere
+        pass
@@ -0,0 +1,172 @@
+import hashlib
+import threading
+import tracemalloc
+
+import pytest
+from django.core.files.base import ContentFile, File
+
+from backblaze_b2.api import UploadUrlPool
+from backblaze_b2.models import BackblazeB2File
+from backblaze_b2.storage import BackblazeB2Storage
+from backblaze_b2.tests.b2_server import BUCKET_ID, B2Server
+
+
+@pytest.fixture()
+def b2_server(mocker):
+    server = B2Server()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    mocker.patch(
+        "backblaze_b2.api.AUTHORIZE_ACCOUNT_URL",
+        f"{server.url}/b2api/v2/b2_authorize_account",
+    )
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.state.close()
+
+
+@pytest.fixture()
+def storage(b2_server):
+    return BackblazeB2Storage(
+        application_key_id="key-id",
+        application_key="key",
+        bucket_id=BUCKET_ID,
+        location="",
+        upload_part_size=1024,
+        upload_threads=2,
+    )
+
+
+def get_requests(b2_server, path):
+    return [headers for _, x, headers in b2_server.state.requests if x == path]
+
+
+@pytest.mark.django_db
+def test_b2_storage_save_streams_sha1(b2_server, storage):
+    name = storage.save("files/test.txt", ContentFile(b"hello world"))
+    assert name == "files/test.txt"
+    assert b2_server.state.read_file(name) == b"hello world"
+    (headers,) = get_requests(b2_server, "/upload")
+    assert headers["X-Bz-Content-Sha1"] == "hex_digits_at_end"
+    assert headers["Content-Length"] == str(len(b"hello world") + 40)
+    file = BackblazeB2File.objects.get(name=name)
+    assert file.content_length == 11
+    assert file.content_sha1 == hashlib.sha1(b"hello world").hexdigest()
+    assert storage.exists(name)
+    assert storage.size(name) == 11
+
+
+@pytest.mark.django_db
+def test_b2_storage_save_known_sha1(b2_server, storage):
+    content = ContentFile(b"hello world")
+    content.content_sha1 = hashlib.sha1(b"hello world").hexdigest()
+    storage.save("test.txt", content)
+    (headers,) = get_requests(b2_server, "/upload")
+    assert headers["X-Bz-Content-Sha1"] == content.content_sha1
+    assert headers["Content-Length"] == "11"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("status", (401, 408, 503))
+def test_b2_storage_save_retries_with_new_upload_url(b2_server, storage, status):
+    storage.save("first.txt", ContentFile(b"first"))
+    b2_server.state.fail_next["/upload"] = status
+    storage.save("second.txt", ContentFile(b"hello world"))
+    storage.save("third.txt", ContentFile(b"third"))
+    assert len(get_requests(b2_server, "/upload")) == 4
+    # The failed upload URL is replaced, and the replacement is then reused
+    assert len(get_requests(b2_server, "/b2api/v2/b2_get_upload_url")) == 2
+    assert b2_server.state.read_file("second.txt") == b"hello world"
+
+
+@pytest.mark.django_db
+def test_b2_storage_reuses_connections_and_upload_urls(b2_server, storage):
+    for i in range(5):
+        storage.save(f"{i}.txt", ContentFile(b"hello world"))
+    assert len(get_requests(b2_server, "/b2api/v2/b2_authorize_account")) == 1
+    assert len(get_requests(b2_server, "/b2api/v2/b2_get_upload_url")) == 1
+    assert len(get_requests(b2_server, "/upload")) == 5
+    assert b2_server.state.connections == 1
+
+
+def test_upload_url_pool():
+    created = []
+
+    def create_session():
+        created.append(object())
+        return created[-1]
+
+    pool = UploadUrlPool(create_session)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first is not second
+    pool.release(first)
+    assert pool.acquire() is first
+    assert len(created) == 2
+
+
+@pytest.mark.django_db
+def test_b2_storage_save_large_file(b2_server, storage):
+    data = bytes(range(256)) * 10
+    storage.save("large.bin", ContentFile(data))
+    assert len(get_requests(b2_server, "/upload-part/file-1")) == 3
+    # Upload URLs are reused for parts, but never by two uploads at once
+    part_urls = get_requests(b2_server, "/b2api/v2/b2_get_upload_part_url")
+    assert 1 <= len(part_urls) <= 2
+    assert b2_server.state.read_file("large.bin") == data
+
+
+@pytest.mark.django_db
+def test_b2_storage_open(b2_server, storage):
+    data = bytes(range(256)) * 1024
+    storage.save("test.bin", ContentFile(data))
+    with storage.open("test.bin") as file:
+        assert file.size == len(data)
+        assert file.read(10) == data[:10]
+        file.seek(100000)
+        assert file.read(10) == data[100000:100010]
+        assert file.read() == data[100010:]
+    downloads = get_requests(b2_server, "/file/test-bucket/test.bin")
+    assert [x.get("Range") for x in downloads] == [None, "bytes=100000-"]
+    assert all(x["Authorization"] == "token" for x in downloads)
+
+
+@pytest.mark.django_db
+def test_b2_storage_read_range(b2_server, storage):
+    data = bytes(range(256)) * 4
+    storage.save("test.bin", ContentFile(data))
+    assert storage.read_range("test.bin", 300, 20) == data[300:320]
+    assert storage.read_range("test.bin", 1020, 20) == data[1020:]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", (1024 * 1024 * 4, 1024 * 1024 * 32))
+def test_b2_storage_memory_use_independent_of_size(b2_server, size, tmp_path):
+    storage = BackblazeB2Storage(
+        application_key_id="key-id",
+        application_key="key",
+        bucket_id=BUCKET_ID,
+        location="",
+        # Larger than the files, so that they're streamed in a single request
+        upload_part_size=size + 1,
+    )
+    path = tmp_path / "source.bin"
+    with open(path, "wb") as source:
+        for _ in range(size // (1024 * 1024)):
+            source.write(b"a" * 1024 * 1024)
+
+    tracemalloc.start()
+    try:
+        with open(path, "rb") as source:
+            storage.save("test.bin", File(source))
+        digest = hashlib.sha1()
+        with storage.open("test.bin") as file:
+            for chunk in iter(lambda: file.read(1024 * 64), b""):
+                digest.update(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert digest.hexdigest() == hashlib.sha1(b"a" * size).hexdigest()
+    assert peak < 1024 * 1024 * 2
@@ -139,6 +139,41 @@ def package_category(community):
     )
 
 
+@pytest.fixture()
+def package_categories(community):
+    return [
+        PackageCategory.objects.create(
+            name=f"Category {i}",
+            slug=f"category-{i}",
+            community=community,
+        )
+        for i in range(3)
+    ]
+
+
+@pytest.fixture()
+def create_package_listing():
+    """
+    Returns a helper for creating a listing of a new, single version package
+    """
+
+    def create(community, name, categories=(), is_deprecated=False, **kwargs):
+        package = PackageFactory.create(name=name)
+        PackageVersionFactory.create(name=package.name, package=package)
+        # Creating a version resets the deprecation status
+        package.is_deprecated = is_deprecated
+        package.save()
+        listing = PackageListing.objects.create(
+            community=community,
+            package=package,
+            **kwargs,
+        )
+        listing.categories.set(categories)
+        return listing
+
+    return create
+
+
 @pytest.fixture()
 def package_listing_section(community):
     return PackageListingSection.objects.create(
@@ -1,5 +1,12 @@
-from django.core.paginator import Page, Paginator
-from django.db.models import QuerySet
+import base64
+import datetime
+import json
+from math import ceil
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db.models import Q, QuerySet
 from django.utils.functional import cached_property
 
 from thunderstore.cache.cache import cache_get_or_set_by_key
@@ -79,3 +86,232 @@ class CachedPage(Page):
             self.cache_vary,
             lambda: list(self._object_list),
         )
+
+
+def encode_cursor_value(value: Any) -> Any:
+    # Unlike DjangoJSONEncoder, keep the full microsecond precision as the
+    # value is used for comparisons
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError(f"Unable to encode {type(value)} into a cursor")
+
+
+class CachedKeysetPaginator:
+    """
+    A paginator that seeks to pages using the values of the ordering fields
+    rather than offsets, so that deep pages cost as much as the first one.
+
+    Pages are addressed by opaque cursors, and the total count can be
+    provided as an estimate in order to avoid COUNT queries. The estimate
+    may also be a callable, in which case it's only evaluated if used.
+
+    As the cursors are built from the ordering values alone, keyset pages
+    don't know their page number. Only the first page reports one.
+    """
+
+    is_keyset = True
+
+    def __init__(
+        self,
+        object_list: QuerySet,
+        per_page: int,
+        ordering: Sequence[str],
+        cache_key: str,
+        cache_vary: str,
+        cache_bust_condition: str,
+        count: Optional[Union[int, Callable[[], Optional[int]]]] = None,
+    ):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.cache_key = cache_key
+        self.cache_vary = cache_vary
+        self.cache_bust_condition = cache_bust_condition
+        self._count = count
+
+    @cached_property
+    def count(self) -> int:
+        count = self._count() if callable(self._count) else self._count
+        if count is not None:
+            return count
+        return cache_get_or_set_by_key(
+            self.cache_bust_condition,
+            f"{self.cache_key}.count",
+            self.cache_vary,
+            lambda: self.object_list.count(),
+        )
+
+    @cached_property
+    def num_pages(self) -> int:
+        return max(1, ceil(self.count / self.per_page))
+
+    @cached_property
+    def ordering_fields(self) -> list:
+        fields = []
+        for field in self.ordering:
+            model = self.object_list.model
+            model_field = None
+            for name in field.lstrip("-").split("__"):
+                if name == "pk":
+                    model_field = model._meta.pk
+                else:
+                    model_field = model._meta.get_field(name)
+                model = model_field.related_model
+            fields.append(model_field)
+        return fields
+
+    @staticmethod
+    def encode_cursor(position: List[Any], reverse: bool) -> str:
+        data = json.dumps(
+            {"p": position, "r": reverse},
+            default=encode_cursor_value,
+        )
+        return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+    def decode_cursor(self, cursor: str) -> Tuple[List[Any], bool]:
+        """
+        Decodes a client provided cursor, raising InvalidPage if it's not
+        one this paginator could have produced
+        """
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            position, reverse = data["p"], data["r"]
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise InvalidPage("Invalid cursor")
+        if not isinstance(reverse, bool) or not isinstance(position, list):
+            raise InvalidPage("Invalid cursor")
+        if len(position) != len(self.ordering):
+            raise InvalidPage("Invalid cursor")
+
+        result = []
+        for field, value in zip(self.ordering_fields, position):
+            if value is None or isinstance(value, (list, dict)):
+                raise InvalidPage("Invalid cursor")
+            try:
+                result.append(field.to_python(value))
+            except (ValidationError, ValueError, TypeError):
+                raise InvalidPage("Invalid cursor")
+        return result, reverse
+
+    def get_position(self, obj) -> List[Any]:
+        position = []
+        for field in self.ordering:
+            value = obj
+            for attr in field.lstrip("-").split("__"):
+                value = getattr(value, attr)
+            position.append(value)
+        return position
+
+    def get_seek_filter(self, position: List[Any], reverse: bool) -> Q:
+        """
+        Builds a filter matching the rows which come after the position in
+        the ordering, or before it if reverse is True
+        """
+        query = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip("-")
+            descending = field.startswith("-") != reverse
+            lookup = "lt" if descending else "gt"
+            query |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return query
+
+    def _fetch(self, position: Optional[List[Any]], reverse: bool):
+        ordering = self.ordering
+        queryset = self.object_list
+        if reverse:
+            ordering = tuple(
+                field[1:] if field.startswith("-") else f"-{field}"
+                for field in ordering
+            )
+        if position is not None:
+            queryset = queryset.filter(self.get_seek_filter(position, reverse))
+        rows = list(queryset.order_by(*ordering)[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if reverse:
+            rows.reverse()
+        return rows, has_more
+
+    def page(self, cursor: Optional[str]) -> "CachedKeysetPage":
+        position, reverse = None, False
+        if cursor:
+            position, reverse = self.decode_cursor(cursor)
+            # Re-encode to avoid caching differently spelled copies of a cursor
+            cursor = self.encode_cursor(position, reverse)
+
+        rows, has_more = cache_get_or_set_by_key(
+            self.cache_bust_condition,
+            f"{self.cache_key}.cursor",
+            f"{self.cache_vary}.{cursor or ''}",
+            lambda: self._fetch(position, reverse),
+        )
+        if reverse:
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = position is not None, has_more
+        if not rows and position is not None:
+            raise InvalidPage("That page contains no results")
+        return CachedKeysetPage(
+            object_list=rows,
+            cursor=cursor or "",
+            number=None if position is not None else 1,
+            paginator=self,
+            has_next=has_next,
+            has_previous=has_previous,
+        )
+
+
+class CachedKeysetPage:
+    def __init__(
+        self,
+        object_list: List[Any],
+        cursor: str,
+        number: Optional[int],
+        paginator: CachedKeysetPaginator,
+        has_next: bool,
+        has_previous: bool,
+    ):
+        self.object_list = object_list
+        self.cursor = cursor
+        self.number = number
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f"<Page {self.number} (keyset)>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+    @cached_property
+    def next_cursor(self) -> Optional[str]:
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(
+            position=self.paginator.get_position(self.object_list[-1]),
+            reverse=False,
+        )
+
+    @cached_property
+    def previous_cursor(self) -> Optional[str]:
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(
+            position=self.paginator.get_position(self.object_list[0]),
+            reverse=True,
+        )
@@ -0,0 +1,144 @@
+from typing import Dict, Iterable, List, Optional
+
+from django.db.models import Q
+
+from thunderstore.cache.cache import CacheBustCondition, cache_function_result
+from thunderstore.community.filtering import get_listing_review_status_q
+from thunderstore.community.models import Community, PackageListing
+
+
+def count_bits(bitset: int) -> int:
+    return bin(bitset).count("1")
+
+
+class PackageListingFacetIndex:
+    """
+    An in-memory index of the package listings visible in a community.
+
+    Every listing is assigned a bit position, and each category and boolean
+    flag is stored as a bitset of the listings it applies to. Filtering and
+    facet counting are then plain bitwise operations instead of queries.
+    """
+
+    def __init__(
+        self,
+        listing_ids: List[int],
+        category_bitsets: Dict[int, int],
+        nsfw_bitset: int,
+        deprecated_bitset: int,
+    ):
+        self.listing_ids = listing_ids
+        self.positions = {pk: position for position, pk in enumerate(listing_ids)}
+        self.category_bitsets = category_bitsets
+        self.nsfw_bitset = nsfw_bitset
+        self.deprecated_bitset = deprecated_bitset
+
+    @property
+    def all_bitset(self) -> int:
+        return (1 << len(self.listing_ids)) - 1
+
+    @classmethod
+    def build(cls, community: Community) -> "PackageListingFacetIndex":
+        listings = PackageListing.objects.active().filter(
+            Q(community=community) & get_listing_review_status_q(community)
+        )
+        rows = listings.order_by("pk").values_list(
+            "pk", "has_nsfw_content", "package__is_deprecated"
+        )
+
+        listing_ids = []
+        positions = {}
+        nsfw_bitset = 0
+        deprecated_bitset = 0
+        for position, (pk, has_nsfw_content, is_deprecated) in enumerate(rows):
+            listing_ids.append(pk)
+            positions[pk] = position
+            if has_nsfw_content:
+                nsfw_bitset |= 1 << position
+            if is_deprecated:
+                deprecated_bitset |= 1 << position
+
+        category_bitsets = {}
+        relations = PackageListing.categories.through.objects.filter(
+            packagelisting__community=community,
+        ).values_list("packagelisting_id", "packagecategory_id")
+        for listing_id, category_id in relations:
+            if listing_id not in positions:
+                continue
+            bit = 1 << positions[listing_id]
+            category_bitsets[category_id] = category_bitsets.get(category_id, 0) | bit
+
+        return cls(
+            listing_ids=listing_ids,
+            category_bitsets=category_bitsets,
+            nsfw_bitset=nsfw_bitset,
+            deprecated_bitset=deprecated_bitset,
+        )
+
+    def get_category_bitset(self, categories: Iterable[int]) -> int:
+        """
+        Returns a bitset of the listings which belong to any of the given
+        categories
+        """
+        result = 0
+        for category in categories:
+            result |= self.category_bitsets.get(category, 0)
+        return result
+
+    def get_bitset_for_ids(self, listing_ids: Iterable[int]) -> int:
+        result = 0
+        for pk in listing_ids:
+            position = self.positions.get(pk)
+            if position is not None:
+                result |= 1 << position
+        return result
+
+    def filter(
+        self,
+        require_categories: Iterable[int] = (),
+        exclude_categories: Iterable[int] = (),
+        include_nsfw: bool = False,
+        include_deprecated: bool = False,
+        scope: Optional[int] = None,
+    ) -> int:
+        """
+        Computes a bitset of the listings matching the given filters
+
+        :param require_categories: Listings must belong to at least one of these
+        :param exclude_categories: Listings must not belong to any of these
+        :param include_nsfw: Whether or not NSFW listings should be included
+        :param include_deprecated: Whether or not deprecated listings should
+            be included
+        :param scope: An optional bitset to limit the results to
+        :return: A bitset of the matching listings
+        :rtype: int
+        """
+        result = self.all_bitset if scope is None else scope & self.all_bitset
+        require_categories = set(require_categories)
+        if require_categories:
+            result &= self.get_category_bitset(require_categories)
+        result &= ~self.get_category_bitset(exclude_categories)
+        if not include_nsfw:
+            result &= ~self.nsfw_bitset
+        if not include_deprecated:
+            result &= ~self.deprecated_bitset
+        return result
+
+    def get_listing_ids(self, bitset: int) -> List[int]:
+        bits = reversed(bin(bitset & self.all_bitset)[2:])
+        return [self.listing_ids[pos] for pos, bit in enumerate(bits) if bit == "1"]
+
+    def get_category_counts(self, bitset: int) -> Dict[int, int]:
+        """
+        Counts how many of the listings in a bitset belong to each category
+        """
+        return {
+            category: count_bits(bitset & category_bitset)
+            for category, category_bitset in self.category_bitsets.items()
+        }
+
+
+@cache_function_result(CacheBustCondition.any_package_updated)
+def get_package_listing_facet_index(community_pk: int) -> PackageListingFacetIndex:
+    community = Community.objects.get(pk=community_pk)
+    return PackageListingFacetIndex.build(community)
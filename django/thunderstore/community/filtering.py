@@ -0,0 +1,93 @@
+from typing import Iterable, Optional, Set
+
+from django.db.models import Exists, OuterRef, Q, QuerySet
+
+from thunderstore.community.models import (
+    Community,
+    PackageListing,
+    PackageListingReviewStatus,
+    PackageListingSection,
+)
+
+
+def has_related(
+    relation,
+    values: Optional[Iterable[int]] = None,
+    outer_ref: str = "pk",
+) -> Exists:
+    """
+    Builds a correlated EXISTS subquery against the through table of a
+    many-to-many relation, matching rows related to the outer query's object
+
+    Unlike filtering across the relation directly, this never multiplies the
+    rows of the outer query, so no DISTINCT is needed to deduplicate them.
+
+    :param relation: The many-to-many descriptor, e.g. PackageListing.categories
+    :param values: If given, only relations to these primary keys are matched
+    :param outer_ref: The outer query field the relation should point to
+    :return: The EXISTS expression
+    :rtype: Exists
+    """
+    field = relation.field
+    queryset = relation.through.objects.filter(
+        **{f"{field.m2m_column_name()}": OuterRef(outer_ref)}
+    )
+    if values is not None:
+        queryset = queryset.filter(**{f"{field.m2m_reverse_name()}__in": values})
+    return Exists(queryset)
+
+
+def listing_has_categories(categories: Iterable[int], outer_ref: str = "pk") -> Exists:
+    return has_related(PackageListing.categories, categories, outer_ref)
+
+
+def get_listing_review_status_q(community: Community) -> Q:
+    if community.require_package_listing_approval:
+        return Q(review_status=PackageListingReviewStatus.approved)
+    return ~Q(review_status=PackageListingReviewStatus.rejected)
+
+
+class PackageListingFilter:
+    """
+    The category, section and content constraints of a package listing search,
+    compiled into a single WHERE clause of correlated EXISTS subqueries.
+    """
+
+    def __init__(
+        self,
+        community: Community,
+        require_categories: Iterable[int] = (),
+        exclude_categories: Iterable[int] = (),
+        section: Optional[PackageListingSection] = None,
+        include_nsfw: bool = False,
+        include_deprecated: bool = False,
+    ):
+        self.community = community
+        self.require_categories: Set[int] = set(require_categories)
+        self.exclude_categories: Set[int] = set(exclude_categories)
+        if section:
+            self.require_categories.update(
+                section.require_categories.values_list("pk", flat=True)
+            )
+            self.exclude_categories.update(
+                section.exclude_categories.values_list("pk", flat=True)
+            )
+        self.include_nsfw = include_nsfw
+        self.include_deprecated = include_deprecated
+
+    def as_q(self) -> Q:
+        query = Q(community=self.community) & get_listing_review_status_q(
+            self.community
+        )
+        if self.require_categories:
+            query &= Q(listing_has_categories(self.require_categories))
+        if self.exclude_categories:
+            query &= ~Q(listing_has_categories(self.exclude_categories))
+        if not self.include_nsfw:
+            query &= Q(has_nsfw_content=False)
+        if not self.include_deprecated:
+            query &= Q(package__is_deprecated=False)
+        return query
+
+    def apply(self, queryset: QuerySet) -> QuerySet:
+        return queryset.filter(self.as_q())
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+# The auto-created through table already has a unique (packagelisting_id,
+# packagecategory_id) index, and a single column index on packagecategory_id
+# for the foreign key. Category filters are compiled into EXISTS subqueries
+# driven by the category (see thunderstore.community.filtering), and with the
+# single column index those have to visit the heap to read packagelisting_id.
+# The composite index allows answering them with index-only scans. The table
+# is only written to when a listing's categories change, which is rare enough
+# for the extra index maintenance not to matter.
+CREATE_INDEX = """
+CREATE INDEX IF NOT EXISTS community_packagelisting_categories_category_listing
+ON community_packagelisting_categories (packagecategory_id, packagelisting_id);
+"""
+
+DROP_INDEX = """
+DROP INDEX IF EXISTS community_packagelisting_categories_category_listing;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0018_add_package_rejection_reason"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX, DROP_INDEX),
+    ]
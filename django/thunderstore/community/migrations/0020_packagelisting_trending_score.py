@@ -0,0 +1,25 @@
+# Generated by Django 3.1.14 on 2026-10-19 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0019_add_listing_category_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="packagelisting",
+            name="trending_score",
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="packagelisting",
+            index=models.Index(
+                fields=["community", "-trending_score"],
+                name="packagelisting_trending_idx",
+            ),
+        ),
+    ]
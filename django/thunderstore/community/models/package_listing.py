@@ -67,6 +67,7 @@ class PackageListing(TimestampMixin, models.Model):
         blank=True,
     )
     has_nsfw_content = models.BooleanField(default=False)
+    trending_score = models.FloatField(default=0, editable=False)
 
     class Meta:
         constraints = [
@@ -74,6 +75,12 @@ class PackageListing(TimestampMixin, models.Model):
                 fields=("package", "community"), name="one_listing_per_community"
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=("community", "-trending_score"),
+                name="packagelisting_trending_idx",
+            ),
+        ]
 
     def validate(self):
         if self.pk:
@@ -131,6 +138,11 @@ class PackageListing(TimestampMixin, models.Model):
     def post_delete(sender, instance, **kwargs):
         invalidate_cache(CacheBustCondition.any_package_updated)
 
+    @staticmethod
+    def categories_changed(sender, instance, action, **kwargs):
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_cache(CacheBustCondition.any_package_updated)
+
     @property
     def is_waiting_for_approval(self):
         return (
@@ -172,3 +184,6 @@ class PackageListing(TimestampMixin, models.Model):
 
 signals.post_save.connect(PackageListing.post_save, sender=PackageListing)
 signals.post_delete.connect(PackageListing.post_delete, sender=PackageListing)
+signals.m2m_changed.connect(
+    PackageListing.categories_changed, sender=PackageListing.categories.through
+)
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from thunderstore.community.trending import update_trending_scores
+
+
+@shared_task
+def update_trending_listings():
+    update_trending_scores()
@@ -0,0 +1,230 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from thunderstore.cache.cache import CacheBustCondition
+from thunderstore.community.facets import PackageListingFacetIndex, count_bits
+from thunderstore.community.models import PackageListingReviewStatus
+
+
+@pytest.fixture()
+def clean_cache():
+    # The rendered list fragments would otherwise leak between tests
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_facet_index_build(create_package_listing, community, package_categories):
+    first = create_package_listing(
+        community, "First", categories=package_categories[:2]
+    )
+    second = create_package_listing(community, "Second", has_nsfw_content=True)
+    third = create_package_listing(
+        community,
+        "Third",
+        categories=package_categories[1:2],
+        is_deprecated=True,
+    )
+    create_package_listing(
+        community,
+        "Rejected",
+        review_status=PackageListingReviewStatus.rejected,
+    )
+
+    index = PackageListingFacetIndex.build(community)
+    assert index.listing_ids == [first.pk, second.pk, third.pk]
+    assert index.get_listing_ids(index.nsfw_bitset) == [second.pk]
+    assert index.get_listing_ids(index.deprecated_bitset) == [third.pk]
+    assert index.get_listing_ids(index.category_bitsets[package_categories[1].pk]) == [
+        first.pk,
+        third.pk,
+    ]
+    assert package_categories[2].pk not in index.category_bitsets
+
+
+@pytest.mark.django_db
+def test_facet_index_build_requires_approval(create_package_listing, community):
+    community.require_package_listing_approval = True
+    community.save()
+    approved = create_package_listing(
+        community,
+        "Approved",
+        review_status=PackageListingReviewStatus.approved,
+    )
+    create_package_listing(community, "Unreviewed")
+
+    index = PackageListingFacetIndex.build(community)
+    assert index.listing_ids == [approved.pk]
+
+
+@pytest.mark.django_db
+def test_facet_index_filter(create_package_listing, community, package_categories):
+    first = create_package_listing(
+        community, "First", categories=package_categories[:2]
+    )
+    second = create_package_listing(
+        community,
+        "Second",
+        categories=package_categories[2:],
+        has_nsfw_content=True,
+    )
+    third = create_package_listing(
+        community,
+        "Third",
+        categories=package_categories[1:2],
+        is_deprecated=True,
+    )
+    index = PackageListingFacetIndex.build(community)
+
+    def filtered(**kwargs):
+        return index.get_listing_ids(index.filter(**kwargs))
+
+    assert filtered() == [first.pk]
+    assert filtered(include_nsfw=True, include_deprecated=True) == [
+        first.pk,
+        second.pk,
+        third.pk,
+    ]
+    assert (
+        filtered(
+            require_categories=[package_categories[1].pk, package_categories[2].pk],
+            include_nsfw=True,
+            include_deprecated=True,
+        )
+        == [first.pk, second.pk, third.pk]
+    )
+    assert (
+        filtered(
+            exclude_categories=[package_categories[0].pk],
+            include_nsfw=True,
+            include_deprecated=True,
+        )
+        == [second.pk, third.pk]
+    )
+    assert (
+        filtered(
+            include_nsfw=True,
+            include_deprecated=True,
+            scope=index.get_bitset_for_ids([second.pk, third.pk]),
+        )
+        == [second.pk, third.pk]
+    )
+
+
+@pytest.mark.django_db
+def test_facet_index_category_counts(
+    create_package_listing, community, package_categories
+):
+    create_package_listing(community, "First", categories=package_categories[:2])
+    create_package_listing(community, "Second", categories=package_categories[1:])
+    create_package_listing(
+        community, "Third", categories=package_categories[1:2], is_deprecated=True
+    )
+    index = PackageListingFacetIndex.build(community)
+
+    bitset = index.filter()
+    assert count_bits(bitset) == 2
+    assert index.get_category_counts(bitset) == {
+        package_categories[0].pk: 1,
+        package_categories[1].pk: 2,
+        package_categories[2].pk: 1,
+    }
+
+
+@pytest.mark.django_db
+def test_facet_index_invalidated_on_category_change(
+    create_package_listing, community, package_categories, mocker
+):
+    listing = create_package_listing(community, "First")
+    mocked_invalidate_cache = mocker.patch(
+        "thunderstore.community.models.package_listing.invalidate_cache"
+    )
+    listing.categories.add(package_categories[0])
+    mocked_invalidate_cache.assert_called_with(CacheBustCondition.any_package_updated)
+
+
+@pytest.mark.django_db
+def test_package_list_view_category_filters(
+    create_package_listing, client, community_site, package_categories
+):
+    community = community_site.community
+    create_package_listing(community, "Included", categories=package_categories[:1])
+    create_package_listing(community, "Excluded", categories=package_categories[:2])
+    create_package_listing(community, "Uncategorized")
+
+    base_url = reverse("packages.list")
+    response = client.get(
+        f"{base_url}?included_categories={package_categories[0].pk}"
+        f"&excluded_categories={package_categories[1].pk}",
+        HTTP_HOST=community_site.site.domain,
+    )
+    assert response.status_code == 200
+    assert b"Included" in response.content
+    assert b"Excluded" not in response.content
+    assert b"Uncategorized" not in response.content
+    assert f"{package_categories[0].name} (1)".encode("utf-8") in response.content
+
+
+@pytest.mark.django_db
+def test_package_list_view_category_counts_with_selection(
+    create_package_listing, client, community_site, package_categories, clean_cache
+):
+    community = community_site.community
+    create_package_listing(community, "OnlyFirst", categories=package_categories[:1])
+    create_package_listing(community, "OnlySecond", categories=package_categories[1:2])
+    create_package_listing(community, "Both", categories=package_categories[:2])
+    create_package_listing(community, "Third", categories=package_categories[2:])
+
+    def get_counts(query):
+        response = client.get(
+            f"{reverse('packages.list')}?{query}",
+            HTTP_HOST=community_site.site.domain,
+        )
+        assert response.status_code == 200
+        return {x.pk: x.facet_count for x in response.context["categories"]}
+
+    expected = {
+        package_categories[0].pk: 2,
+        package_categories[1].pk: 2,
+        package_categories[2].pk: 1,
+    }
+    assert get_counts(f"included_categories={package_categories[0].pk}") == expected
+    assert (
+        get_counts(
+            f"included_categories={package_categories[0].pk}"
+            f"&included_categories={package_categories[1].pk}"
+        )
+        == expected
+    )
+    assert get_counts(f"excluded_categories={package_categories[1].pk}") == {
+        package_categories[0].pk: 1,
+        package_categories[1].pk: 0,
+        package_categories[2].pk: 1,
+    }
+    assert set(get_counts("q=Both").values()) == {None}
+
+
+@pytest.mark.django_db
+def test_package_list_view_cached_fragment_skips_facets(
+    create_package_listing,
+    client,
+    community_site,
+    package_categories,
+    mocker,
+    clean_cache,
+):
+    create_package_listing(
+        community_site.community, "First", categories=package_categories[:1]
+    )
+    url = reverse("packages.list")
+    client.get(url, HTTP_HOST=community_site.site.domain)
+
+    mocked_index = mocker.patch(
+        "thunderstore.repository.views.repository.get_package_listing_facet_index"
+    )
+    response = client.get(url, HTTP_HOST=community_site.site.domain)
+    assert response.status_code == 200
+    assert b"First" in response.content
+    mocked_index.assert_not_called()
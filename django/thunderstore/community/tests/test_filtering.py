@@ -0,0 +1,184 @@
+import importlib
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from thunderstore.community.filtering import PackageListingFilter
+from thunderstore.community.models import PackageListing, PackageListingReviewStatus
+from thunderstore.repository.models import Package, UploaderIdentity
+
+
+def get_filtered_ids(listing_filter):
+    queryset = listing_filter.apply(PackageListing.objects.active())
+    return list(queryset.order_by("pk").values_list("pk", flat=True))
+
+
+@pytest.mark.django_db
+def test_package_listing_filter(create_package_listing, community, package_categories):
+    first = create_package_listing(
+        community, "First", categories=package_categories[:2]
+    )
+    second = create_package_listing(
+        community,
+        "Second",
+        categories=package_categories[2:],
+        has_nsfw_content=True,
+    )
+    third = create_package_listing(
+        community,
+        "Third",
+        categories=package_categories[1:2],
+        is_deprecated=True,
+    )
+    create_package_listing(
+        community,
+        "Rejected",
+        review_status=PackageListingReviewStatus.rejected,
+    )
+
+    def filtered(**kwargs):
+        return get_filtered_ids(PackageListingFilter(community, **kwargs))
+
+    assert filtered() == [first.pk]
+    assert filtered(include_nsfw=True, include_deprecated=True) == [
+        first.pk,
+        second.pk,
+        third.pk,
+    ]
+    assert (
+        filtered(
+            require_categories=[package_categories[1].pk, package_categories[2].pk],
+            include_nsfw=True,
+            include_deprecated=True,
+        )
+        == [first.pk, second.pk, third.pk]
+    )
+    assert (
+        filtered(
+            exclude_categories=[package_categories[0].pk],
+            include_nsfw=True,
+            include_deprecated=True,
+        )
+        == [second.pk, third.pk]
+    )
+
+
+@pytest.mark.django_db
+def test_package_listing_filter_section(
+    create_package_listing, community, package_categories, package_listing_section
+):
+    first = create_package_listing(
+        community, "First", categories=package_categories[:1]
+    )
+    create_package_listing(community, "Second", categories=package_categories[:2])
+    create_package_listing(community, "Third")
+    package_listing_section.require_categories.set(package_categories[:1])
+    package_listing_section.exclude_categories.set(package_categories[1:2])
+
+    listing_filter = PackageListingFilter(community, section=package_listing_section)
+    assert listing_filter.require_categories == {package_categories[0].pk}
+    assert listing_filter.exclude_categories == {package_categories[1].pk}
+    assert get_filtered_ids(listing_filter) == [first.pk]
+
+
+@pytest.mark.django_db
+def test_package_listing_filter_requires_approval(create_package_listing, community):
+    community.require_package_listing_approval = True
+    community.save()
+    approved = create_package_listing(
+        community,
+        "Approved",
+        review_status=PackageListingReviewStatus.approved,
+    )
+    create_package_listing(community, "Unreviewed")
+    assert get_filtered_ids(PackageListingFilter(community)) == [approved.pk]
+
+
+@pytest.mark.django_db
+def test_package_listing_filter_uses_exists_subqueries(community, package_categories):
+    listing_filter = PackageListingFilter(
+        community,
+        require_categories=[package_categories[0].pk],
+        exclude_categories=[package_categories[1].pk],
+    )
+    sql = str(listing_filter.apply(PackageListing.objects.all()).query)
+    assert sql.count("EXISTS") == 2
+    assert "DISTINCT" not in sql
+    assert "community_packagelisting_categories" not in sql.split("EXISTS")[0]
+
+
+@pytest.mark.django_db
+def test_package_listing_filter_explain_uses_index(community, package_categories):
+    # The test database is built without migrations, so the index added by
+    # the migration has to be created here
+    migration = importlib.import_module(
+        "thunderstore.community.migrations.0019_add_listing_category_indexes"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(migration.CREATE_INDEX)
+
+    owner = UploaderIdentity.objects.create(name="Owner")
+    packages = Package.objects.bulk_create(
+        [Package(owner=owner, name=f"Package_{i}") for i in range(2000)]
+    )
+    listings = PackageListing.objects.bulk_create(
+        [PackageListing(community=community, package=x) for x in packages]
+    )
+    through = PackageListing.categories.through
+    through.objects.bulk_create(
+        [
+            through(packagelisting=listing, packagecategory=category)
+            for i, listing in enumerate(listings)
+            for category in package_categories[: i % 3]
+        ]
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE community_packagelisting_categories")
+
+    listing_filter = PackageListingFilter(
+        community,
+        require_categories=[package_categories[0].pk],
+        exclude_categories=[package_categories[1].pk],
+        include_deprecated=True,
+    )
+    plan = listing_filter.apply(PackageListing.objects.all()).explain()
+    assert (
+        "Index Only Scan using community_packagelisting_categories_category_listing"
+        in plan
+    )
+    assert "Seq Scan on community_packagelisting_categories" not in plan
+
+
+@pytest.mark.django_db
+def test_package_list_view_query_has_no_distinct(
+    create_package_listing, client, community_site, package_categories
+):
+    community = community_site.community
+    for i in range(3):
+        create_package_listing(
+            community, f"Listing_{i}", categories=package_categories[i:]
+        )
+
+    base_url = reverse("packages.list")
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(
+            f"{base_url}?q=Listing&included_categories={package_categories[1].pk}"
+            f"&excluded_categories={package_categories[0].pk}",
+            HTTP_HOST=community_site.site.domain,
+        )
+    assert response.status_code == 200
+    assert b"Listing_1" in response.content
+    assert b"Listing_0" not in response.content
+    assert b"Listing_2" not in response.content
+    listing_queries = [
+        query["sql"]
+        for query in context.captured_queries
+        if query["sql"].startswith('SELECT "community_packagelisting"."id"')
+        and "LIMIT" in query["sql"]
+    ]
+    assert listing_queries
+    for sql in listing_queries:
+        assert "DISTINCT" not in sql
+        assert "EXISTS" in sql
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from thunderstore.community.models import Community, PackageListing
+from thunderstore.community.trending import get_trending_scores, update_trending_scores
+from thunderstore.repository.downloads import apply_download_counts, get_download_hour
+
+
+@pytest.mark.django_db
+def test_get_trending_scores(create_package_listing, community):
+    recent = create_package_listing(community, "Recent").package.latest
+    older = create_package_listing(community, "Older").package.latest
+    expired = create_package_listing(community, "Expired").package.latest
+    hour = get_download_hour(timezone.now())
+    apply_download_counts(
+        {
+            (recent.pk, hour): 10,
+            (recent.pk, hour - timedelta(hours=1)): 2,
+            (older.pk, hour - timedelta(hours=24)): 40,
+            (older.pk, hour - timedelta(hours=48)): 40,
+            (expired.pk, hour - timedelta(days=8)): 1000,
+        }
+    )
+
+    scores = get_trending_scores()
+    assert set(scores.keys()) == {recent.package_id, older.package_id}
+    assert scores[recent.package_id] == pytest.approx(10 + 2 * 0.5 ** (1 / 24))
+    assert scores[older.package_id] == pytest.approx(40 * 0.5 + 40 * 0.25)
+
+
+@pytest.mark.django_db
+def test_update_trending_scores(create_package_listing, community):
+    trending = create_package_listing(community, "Trending")
+    stale = create_package_listing(community, "Stale", trending_score=5)
+    elsewhere = PackageListing.objects.create(
+        community=Community.objects.create(name="Other", identifier="other"),
+        package=trending.package,
+    )
+    apply_download_counts(
+        {(trending.package.latest.pk, get_download_hour(timezone.now())): 3}
+    )
+
+    update_trending_scores()
+
+    scores = dict(PackageListing.objects.values_list("pk", "trending_score"))
+    assert scores[trending.pk] == pytest.approx(3)
+    assert scores[elsewhere.pk] == pytest.approx(3)
+    assert scores[stale.pk] == 0
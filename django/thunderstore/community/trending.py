@@ -0,0 +1,73 @@
+from datetime import timedelta
+from typing import Dict
+
+from django.db import models, transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.utils import timezone
+
+from thunderstore.community.models import PackageListing
+from thunderstore.repository.downloads import get_download_hour
+from thunderstore.repository.models import DownloadRollupPeriod, PackageDownloadRollup
+
+TRENDING_HALF_LIFE = timedelta(hours=24)
+TRENDING_WINDOW = timedelta(days=7)
+TRENDING_UPDATE_BATCH_SIZE = 500
+
+
+def get_trending_scores() -> Dict[int, float]:
+    """
+    Scores packages by their hourly downloads within TRENDING_WINDOW, with the
+    weight of each hour halving every TRENDING_HALF_LIFE
+
+    :return: A mapping of package primary keys to scores, for packages that
+        have been downloaded within the window
+    :rtype: Dict[int, float]
+    """
+    current_hour = get_download_hour(timezone.now())
+    hour_count = int(TRENDING_WINDOW / timedelta(hours=1))
+    half_life = TRENDING_HALF_LIFE / timedelta(hours=1)
+    weight = Case(
+        *(
+            When(
+                period_start=current_hour - timedelta(hours=age),
+                then=Value(0.5 ** (age / half_life)),
+            )
+            for age in range(hour_count)
+        ),
+        default=Value(0.0),
+        output_field=models.FloatField(),
+    )
+    return dict(
+        PackageDownloadRollup.objects.filter(
+            period=DownloadRollupPeriod.hour,
+            period_start__gt=current_hour - TRENDING_WINDOW,
+        )
+        .values("package_id")
+        .annotate(score=Sum(F("downloads") * weight, output_field=models.FloatField()))
+        .order_by()
+        .values_list("package_id", "score")
+    )
+
+
+@transaction.atomic
+def update_trending_scores() -> None:
+    """
+    Stores the current trending score of each package on its listings
+
+    Written with plain UPDATEs, as the scores aren't worth busting the caches
+    for. The cached listing pages pick them up as they expire.
+    """
+    scores = get_trending_scores()
+    PackageListing.objects.exclude(trending_score=0).exclude(
+        package_id__in=scores.keys()
+    ).update(trending_score=0)
+
+    items = sorted(scores.items())
+    for i in range(0, len(items), TRENDING_UPDATE_BATCH_SIZE):
+        batch = items[i : i + TRENDING_UPDATE_BATCH_SIZE]
+        PackageListing.objects.filter(package_id__in=[pk for pk, _ in batch]).update(
+            trending_score=Case(
+                *(When(package_id=pk, then=Value(score)) for pk, score in batch),
+                output_field=models.FloatField(),
+            )
+        )
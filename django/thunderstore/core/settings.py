@@ -44,6 +44,8 @@ env = environ.Env(
     B2_BUCKET_ID=(str, ""),
     B2_LOCATION=(str, ""),
     B2_FILE_OVERWRITE=(bool, True),
+    B2_UPLOAD_PART_SIZE=(int, 1024 * 1024 * 25),
+    B2_UPLOAD_THREADS=(int, 4),
     AWS_ACCESS_KEY_ID=(str, ""),
     AWS_SECRET_ACCESS_KEY=(str, ""),
     AWS_S3_REGION_NAME=(str, ""),
@@ -65,6 +67,8 @@ env = environ.Env(
     CELERY_BROKER_URL=(str, ""),
     CELERY_TASK_ALWAYS_EAGER=(bool, False),
     CELERY_EAGER_PROPAGATES_EXCEPTIONS=(bool, False),
+    PACKAGE_DOWNLOAD_SERVE_MODE=(str, "redirect"),
+    PACKAGE_DOWNLOAD_ACCEL_PREFIX=(str, "/protected-media/"),
 )
 
 SENTRY_DSN = env.str("SENTRY_DSN")
@@ -373,6 +377,7 @@ CACHALOT_ONLY_CACHABLE_TABLES = frozenset(
         "frontend_dynamichtml_require_communities",
         "repository_discorduserbotpermission",
         "repository_package",
+        "repository_packagedependant",
         "repository_packageversion_dependencies",
         "repository_uploaderidentity",
         "repository_uploaderidentitymember",
@@ -437,6 +442,25 @@ DEFAULT_FILE_STORAGE = "django.core.files.storage.FileSystemStorage"
 THUMBNAIL_DEFAULT_STORAGE = "django.core.files.storage.FileSystemStorage"
 PACKAGE_FILE_STORAGE = "django.core.files.storage.FileSystemStorage"
 
+# The thumbnails of package icons used by the templates. Every alias is
+# generated when a package version is uploaded, see
+# thunderstore.repository.tasks.generate_icon_thumbnails
+THUMBNAIL_ALIASES = {
+    "": {
+        "icon_64": {"size": (64, 64)},
+        "icon_128": {"size": (128, 128)},
+        "icon_256": {"size": (256, 256)},
+        "icon_256_crop": {"size": (256, 256), "crop": True},
+    },
+}
+
+# How package downloads stored on the local filesystem are served. Either
+# "redirect" to MEDIA_URL, or handed off to the front proxy with
+# "x-accel-redirect" (nginx) or "x-sendfile" (Apache, lighttpd)
+PACKAGE_DOWNLOAD_SERVE_MODE = env.str("PACKAGE_DOWNLOAD_SERVE_MODE")
+# The internal nginx location which maps to MEDIA_ROOT
+PACKAGE_DOWNLOAD_ACCEL_PREFIX = env.str("PACKAGE_DOWNLOAD_ACCEL_PREFIX")
+
 # Google Cloud Storage
 
 GS_BUCKET_NAME = env.str("GS_BUCKET_NAME")
@@ -466,6 +490,8 @@ B2_KEY = env.str("B2_KEY")
 B2_BUCKET_ID = env.str("B2_BUCKET_ID")
 B2_LOCATION = env.str("B2_LOCATION")
 B2_FILE_OVERWRITE = env.str("B2_FILE_OVERWRITE")
+B2_UPLOAD_PART_SIZE = env.int("B2_UPLOAD_PART_SIZE")
+B2_UPLOAD_THREADS = env.int("B2_UPLOAD_THREADS")
 
 if B2_KEY_ID and B2_KEY and B2_BUCKET_ID:
     PACKAGE_FILE_STORAGE = "backblaze_b2.storage.BackblazeB2Storage"
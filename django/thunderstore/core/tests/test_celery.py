@@ -22,7 +22,15 @@ KNOWN_CELERY_IDS = (
     "celery.chain",
     "celery.starmap",
     "celery.backend_cleanup",
+    "thunderstore.community.tasks.update_trending_listings",
     "thunderstore.repository.tasks.update_api_caches",
+    "thunderstore.repository.tasks.render_readme_html",
+    "thunderstore.repository.tasks.generate_icon_thumbnails",
+    "thunderstore.repository.tasks.flush_download_counts",
+    "thunderstore.repository.tasks.summarize_download_history",
+    "thunderstore.repository.tasks.process_package_upload",
+    "thunderstore.repository.tasks.expire_package_uploads",
+    "thunderstore.repository.tasks.reconcile_storage_usage",
 )
 
 
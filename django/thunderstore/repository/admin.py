@@ -90,6 +90,7 @@ class PackageVersionInline(admin.StackedInline):
         "icon",
         "name",
         "readme",
+        "readme_html",
         "version_number",
         "website_url",
     )
@@ -1,13 +1,37 @@
+from datetime import timedelta
+from typing import List
+
 from django.db.models import Q
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.fields import SerializerMethodField, empty
 
 from thunderstore.community.models import Community, PackageCategory, PackageListing
 from thunderstore.core.utils import make_full_url
-from thunderstore.repository.models import Package, PackageVersion, UploaderIdentity
-from thunderstore.repository.package_upload import PackageUploadForm
+from thunderstore.repository.models import (
+    DownloadRollupPeriod,
+    Package,
+    PackageUpload,
+    PackageUploadStatus,
+    PackageVersion,
+    UploaderIdentity,
+)
+from thunderstore.repository.package_reference import PackageReference
+from thunderstore.repository.package_upload import (
+    MAX_PACKAGE_SIZE,
+    UPLOAD_CHUNK_SIZE,
+    PackageUploadForm,
+)
 from thunderstore.repository.serializer_fields import ModelChoiceField
 
+MAX_DEPENDENCY_RESOLUTION_ROOTS = 100
+MAX_DOWNLOAD_STATISTICS_PERIODS = 1000
+DOWNLOAD_STATISTICS_PERIOD_LENGTHS = {
+    DownloadRollupPeriod.hour: timedelta(hours=1),
+    DownloadRollupPeriod.day: timedelta(days=1),
+}
+DOWNLOAD_STATISTICS_DEFAULT_PERIODS = 30
+
 
 class PackageListingSerializerExperimental(serializers.ModelSerializer):
     categories = SerializerMethodField()
@@ -63,6 +87,8 @@ class PackageVersionSerializerExperimental(serializers.ModelSerializer):
             "dependencies",
             "download_url",
             "downloads",
+            "file_size",
+            "file_sha256",
             "date_created",
             "website_url",
             "is_active",
@@ -203,3 +229,178 @@ class PackageUploadSerializerExperiemental(serializers.Serializer):
         form = self._create_form(validated_data)
         form.is_valid()
         return form.save()
+
+
+def get_upload_form_data(metadata) -> dict:
+    """Converts validated upload metadata to PackageUploadForm data"""
+    return {
+        "team": metadata["author_name"].name,
+        "categories": [x.pk for x in metadata["categories"]],
+        "communities": [x.identifier for x in metadata["communities"]],
+        "has_nsfw_content": metadata["has_nsfw_content"],
+    }
+
+
+class PackageUploadAsyncSerializerExperimental(serializers.Serializer):
+    file = serializers.FileField(write_only=True)
+    metadata = JSONSerializerField(serializer=PackageUploadMetadataSerializer())
+
+    def validate_file(self, file):
+        if file.size > MAX_PACKAGE_SIZE:
+            raise serializers.ValidationError(
+                f"Too large package, current maximum is {MAX_PACKAGE_SIZE} bytes"
+            )
+        return file
+
+    def create(self, validated_data) -> PackageUpload:
+        request = self.context["request"]
+        upload = PackageUpload(
+            user=request.user,
+            community=request.community,
+            form_data=get_upload_form_data(validated_data["metadata"]),
+        )
+        upload.file.save("package.zip", validated_data["file"], save=False)
+        upload.save()
+        return upload
+
+
+class ChunkedPackageUploadSerializerExperimental(serializers.Serializer):
+    file_size = serializers.IntegerField(min_value=1, max_value=MAX_PACKAGE_SIZE)
+    metadata = PackageUploadMetadataSerializer()
+
+    def create(self, validated_data) -> PackageUpload:
+        request = self.context["request"]
+        return PackageUpload.objects.create(
+            user=request.user,
+            community=request.community,
+            form_data=get_upload_form_data(validated_data["metadata"]),
+            status=PackageUploadStatus.receiving,
+            file_size=validated_data["file_size"],
+            chunk_size=UPLOAD_CHUNK_SIZE,
+        )
+
+
+class PackageUploadStatusSerializerExperimental(serializers.ModelSerializer):
+    version = PackageVersionSerializerExperimental(read_only=True)
+    received_chunks = SerializerMethodField()
+
+    def get_received_chunks(self, instance) -> List[int]:
+        if not instance.is_chunked:
+            return []
+        return list(instance.chunks.order_by("index").values_list("index", flat=True))
+
+    class Meta:
+        model = PackageUpload
+        ref_name = "PackageUploadStatusExperimental"
+        fields = (
+            "uuid",
+            "status",
+            "errors",
+            "version",
+            "file_size",
+            "chunk_size",
+            "received_chunks",
+            "date_created",
+            "date_updated",
+        )
+
+
+class PackageReferenceListField(serializers.ListField):
+    child = serializers.CharField()
+
+    def to_internal_value(self, data):
+        result = []
+        for entry in super().to_internal_value(data):
+            try:
+                result.append(PackageReference.parse(entry))
+            except ValueError as e:
+                raise serializers.ValidationError(str(e))
+        return result
+
+
+class DependencyResolutionRequestSerializer(serializers.Serializer):
+    packages = PackageReferenceListField(
+        allow_empty=False,
+        max_length=MAX_DEPENDENCY_RESOLUTION_ROOTS,
+    )
+
+    def validate_packages(self, references):
+        versions = []
+        missing = []
+        for reference in references:
+            if reference.version:
+                version = reference.queryset.active().first()
+            else:
+                package = reference.queryset.active().select_related("latest").first()
+                version = package.latest if package else None
+            if version is None:
+                missing.append(str(reference))
+            else:
+                versions.append(version)
+        if missing:
+            raise serializers.ValidationError(
+                f"Unable to find packages: {', '.join(missing)}"
+            )
+        return versions
+
+
+class DependencyResolutionSerializer(serializers.Serializer):
+    packages = PackageVersionSerializerExperimental(many=True, source="versions")
+    cycles = SerializerMethodField()
+
+    def get_cycles(self, instance):
+        pks = {pk for cycle in instance.cycles for pk in cycle}
+        if not pks:
+            return []
+        names = {
+            x.pk: x.full_version_name
+            for x in PackageVersion.objects.filter(pk__in=pks).select_related(
+                "package", "package__owner"
+            )
+        }
+        return [[names[pk] for pk in cycle] for cycle in instance.cycles]
+
+
+class DownloadStatisticsRequestSerializer(serializers.Serializer):
+    period = serializers.ChoiceField(
+        choices=DownloadRollupPeriod.options(),
+        default=DownloadRollupPeriod.day,
+    )
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        length = DOWNLOAD_STATISTICS_PERIOD_LENGTHS[data["period"]]
+        end = data.get("end") or timezone.now()
+        start = data.get("start") or end - length * DOWNLOAD_STATISTICS_DEFAULT_PERIODS
+        if start >= end:
+            raise serializers.ValidationError("start must be before end")
+        if (end - start) / length > MAX_DOWNLOAD_STATISTICS_PERIODS:
+            raise serializers.ValidationError(
+                f"The range may span at most {MAX_DOWNLOAD_STATISTICS_PERIODS} "
+                f"periods of one {data['period']}"
+            )
+        return {**data, "start": start, "end": end}
+
+
+class DownloadRollupSerializer(serializers.Serializer):
+    period_start = serializers.DateTimeField()
+    downloads = serializers.IntegerField()
+
+
+class DownloadStatisticsSerializer(serializers.Serializer):
+    period = serializers.CharField()
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    results = DownloadRollupSerializer(many=True)
+
+
+class PackageFileSerializerExperimental(serializers.Serializer):
+    path = serializers.CharField()
+    size = serializers.IntegerField()
+    compressed_size = serializers.IntegerField()
+    crc32 = serializers.IntegerField(source="crc")
+
+
+class PackageFileIndexSerializerExperimental(serializers.Serializer):
+    files = PackageFileSerializerExperimental(many=True)
@@ -1,18 +1,32 @@
 import io
 import json
+import zlib
+from datetime import datetime, timedelta
 from zipfile import ZIP_DEFLATED, ZipFile
 
 import pytest
+from django.core.cache import cache
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.db import connection
 from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from PIL import Image
 
+from thunderstore.core.factories import UserFactory
+from thunderstore.repository.downloads import apply_download_counts
+from thunderstore.repository.factories import PackageFactory, PackageVersionFactory
 from thunderstore.repository.models import (
+    PackageFileIndex,
+    PackageUpload,
+    PackageUploadStatus,
     UploaderIdentityMember,
     UploaderIdentityMemberRole,
 )
+from thunderstore.repository.package_archive import read_archive_entries
 from thunderstore.repository.package_reference import PackageReference
+from thunderstore.repository.package_upload import MAX_PACKAGE_SIZE
+from thunderstore.repository.tasks import process_package_upload
 
 
 @pytest.mark.django_db
@@ -129,6 +143,12 @@ def test_api_experimental_upload_package_success(
     name = "name"
     version = "1.0.0"
     assert PackageReference(namespace, name, version).exists
+    index = PackageReference(namespace, name, version).instance.file_index
+    assert [x.path for x in index.get_entries()] == [
+        "README.md",
+        "icon.png",
+        "manifest.json",
+    ]
 
 
 @pytest.mark.django_db
@@ -224,3 +244,402 @@ def test_api_experimental_package_upload_info(
     )
     assert response.status_code == 200
     assert response.json()["max_package_size_bytes"] == 524288000
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("is_valid", (True, False))
+def test_api_experimental_upload_package_async(
+    api_client,
+    user,
+    manifest_v1_data,
+    uploader_identity,
+    community,
+    settings,
+    tmp_path,
+    is_valid,
+):
+    settings.MEDIA_ROOT = str(tmp_path)
+    UploaderIdentityMember.objects.create(
+        user=user,
+        identity=uploader_identity,
+        role=UploaderIdentityMemberRole.owner,
+    )
+    if not is_valid:
+        manifest_v1_data["version_number"] = "invalid"
+    api_client.force_authenticate(user=user)
+    response = api_client.post(
+        "/api/experimental/package/upload-async/",
+        {
+            "metadata": json.dumps(
+                {
+                    "author_name": uploader_identity.name,
+                    "categories": [],
+                    "communities": [community.identifier],
+                    "has_nsfw_content": False,
+                },
+            ),
+            "file": SimpleUploadedFile("mod.zip", _create_test_zip(manifest_v1_data)),
+        },
+        HTTP_ACCEPT="application/json",
+    )
+    assert response.status_code == 202
+    result = response.json()
+    assert result["status"] == PackageUploadStatus.pending
+    assert result["version"] is None
+    upload = PackageUpload.objects.get(uuid=result["uuid"])
+    staged_name = upload.file.name
+    assert upload.file.storage.exists(staged_name)
+    assert PackageReference(uploader_identity.name, "name", "1.0.0").exists is False
+
+    process_package_upload(upload.pk)
+
+    assert not upload.file.storage.exists(staged_name)
+    response = api_client.get(
+        f"/api/experimental/package/upload/{upload.uuid}/",
+        HTTP_ACCEPT="application/json",
+    )
+    assert response.status_code == 200
+    result = response.json()
+    if is_valid:
+        assert result["status"] == PackageUploadStatus.succeeded
+        assert result["errors"] is None
+        assert result["version"]["full_name"] == f"{uploader_identity.name}-name-1.0.0"
+    else:
+        assert result["status"] == PackageUploadStatus.failed
+        assert result["errors"]["__all__"][0].startswith("manifest.json version_number")
+        assert result["version"] is None
+
+
+@pytest.mark.django_db
+def test_api_experimental_upload_package_async_status_of_other_user(
+    api_client, user, community
+):
+    upload = PackageUpload.objects.create(
+        user=user,
+        community=community,
+        form_data={},
+    )
+    response = api_client.get(f"/api/experimental/package/upload/{upload.uuid}/")
+    assert response.status_code == 401
+    api_client.force_authenticate(user=UserFactory.create())
+    response = api_client.get(f"/api/experimental/package/upload/{upload.uuid}/")
+    assert response.status_code == 404
+    api_client.force_authenticate(user=user)
+    response = api_client.get(f"/api/experimental/package/upload/{upload.uuid}/")
+    assert response.status_code == 200
+
+
+@pytest.fixture()
+def chunked_upload_client(api_client, user, uploader_identity, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    UploaderIdentityMember.objects.create(
+        user=user,
+        identity=uploader_identity,
+        role=UploaderIdentityMemberRole.owner,
+    )
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+def _start_chunked_upload(api_client, uploader_identity, community, file_size):
+    return api_client.post(
+        "/api/experimental/package/upload-chunked/",
+        {
+            "file_size": file_size,
+            "metadata": {
+                "author_name": uploader_identity.name,
+                "categories": [],
+                "communities": [community.identifier],
+                "has_nsfw_content": False,
+            },
+        },
+        format="json",
+    )
+
+
+@pytest.mark.django_db
+def test_api_experimental_upload_package_chunked(
+    chunked_upload_client, manifest_v1_data, uploader_identity, community, mocker
+):
+    api_client = chunked_upload_client
+    mocker.patch(
+        "thunderstore.repository.api.experimental.serializers.UPLOAD_CHUNK_SIZE",
+        100,
+    )
+    zip_data = _create_test_zip(manifest_v1_data)
+    response = _start_chunked_upload(
+        api_client, uploader_identity, community, len(zip_data)
+    )
+    assert response.status_code == 201
+    result = response.json()
+    assert result["status"] == PackageUploadStatus.receiving
+    assert result["chunk_size"] == 100
+    url = f"/api/experimental/package/upload/{result['uuid']}/"
+    chunks = [zip_data[i : i + 100] for i in range(0, len(zip_data), 100)]
+    assert len(chunks) > 2
+
+    # Chunks may arrive in any order, and be sent again
+    for index in [1, 0, 1] + list(range(2, len(chunks) - 1)):
+        response = api_client.put(
+            f"{url}chunks/{index}/",
+            chunks[index],
+            content_type="application/octet-stream",
+        )
+        assert response.status_code == 204
+
+    response = api_client.post(f"{url}complete/")
+    assert response.status_code == 400
+    assert response.json() == [
+        f"Missing chunks, received {len(chunks) - 1} of {len(chunks)}"
+    ]
+    assert api_client.get(url).json()["received_chunks"] == list(range(len(chunks) - 1))
+
+    response = api_client.put(
+        f"{url}chunks/{len(chunks) - 1}/",
+        chunks[-1],
+        content_type="application/octet-stream",
+    )
+    assert response.status_code == 204
+    response = api_client.post(f"{url}complete/")
+    assert response.status_code == 202
+    assert response.json()["status"] == PackageUploadStatus.pending
+    response = api_client.put(
+        f"{url}chunks/0/", chunks[0], content_type="application/octet-stream"
+    )
+    assert response.status_code == 400
+
+    upload = PackageUpload.objects.get(uuid=result["uuid"])
+    process_package_upload(upload.pk)
+
+    result = api_client.get(url).json()
+    assert result["status"] == PackageUploadStatus.succeeded
+    assert result["received_chunks"] == []
+    version = PackageReference(uploader_identity.name, "name", "1.0.0").instance
+    assert version.file.read() == zip_data
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("index", "content", "error"),
+    (
+        (0, b"a" * 999, "Chunk 0 must be exactly 1000 bytes"),
+        (0, b"a" * 1001, "Chunk 0 must be exactly 1000 bytes"),
+        (1, b"a" * 1000, "Chunk 1 must be exactly 500 bytes"),
+        (2, b"a" * 500, "Invalid chunk index, the upload has 2 chunks"),
+    ),
+)
+def test_api_experimental_upload_package_chunked_invalid_chunk(
+    chunked_upload_client, uploader_identity, community, mocker, index, content, error
+):
+    api_client = chunked_upload_client
+    mocker.patch(
+        "thunderstore.repository.api.experimental.serializers.UPLOAD_CHUNK_SIZE",
+        1000,
+    )
+    result = _start_chunked_upload(api_client, uploader_identity, community, 1500)
+    response = api_client.put(
+        f"/api/experimental/package/upload/{result.json()['uuid']}/chunks/{index}/",
+        content,
+        content_type="application/octet-stream",
+    )
+    assert response.status_code == 400
+    assert response.json() == [error]
+
+
+@pytest.mark.django_db
+def test_api_experimental_upload_package_chunked_too_large(
+    chunked_upload_client, uploader_identity, community
+):
+    response = _start_chunked_upload(
+        chunked_upload_client, uploader_identity, community, MAX_PACKAGE_SIZE + 1
+    )
+    assert response.status_code == 400
+    assert "file_size" in response.json()
+
+
+@pytest.mark.django_db
+def test_api_experimental_resolve_dependencies(api_client, package_version):
+    package = package_version.package
+    dependency = PackageVersionFactory.create(
+        package=PackageFactory.create(name="Dependency"),
+        name="Dependency",
+    )
+    newer = PackageVersionFactory.create(
+        package=package,
+        name=package.name,
+        version_number="2.0.0",
+    )
+    newer.dependencies.add(dependency)
+    package_version.dependencies.add(dependency)
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.post(
+            "/api/experimental/package/resolve/",
+            data={"packages": [str(package_version.reference)]},
+            format="json",
+        )
+    assert response.status_code == 200
+    assert len(context) <= 15
+    result = response.json()
+    assert sorted(x["full_name"] for x in result["packages"]) == sorted(
+        [package_version.full_version_name, dependency.full_version_name]
+    )
+    assert result["cycles"] == []
+
+    response = api_client.post(
+        "/api/experimental/package/resolve/",
+        data={"packages": [str(package.reference)]},
+        format="json",
+    )
+    assert response.status_code == 200
+    assert sorted(x["full_name"] for x in response.json()["packages"]) == sorted(
+        [newer.full_version_name, dependency.full_version_name]
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "packages",
+    ([], ["invalid"], ["Missing-Package"], ["Missing-Package-1.0.0"]),
+)
+def test_api_experimental_resolve_dependencies_invalid(api_client, packages):
+    response = api_client.post(
+        "/api/experimental/package/resolve/",
+        data={"packages": packages},
+        format="json",
+    )
+    assert response.status_code == 400
+    assert "packages" in response.json()
+
+
+@pytest.mark.django_db
+def test_api_experimental_download_statistics(api_client, package_version):
+    package = package_version.package
+    other = PackageVersionFactory.create(
+        package=package,
+        name=package.name,
+        version_number="2.0.0",
+    )
+    hour = datetime(2021, 3, 1, 12, tzinfo=timezone.utc)
+    apply_download_counts(
+        {
+            (package_version.pk, hour): 1,
+            (other.pk, hour): 2,
+            (other.pk, hour + timedelta(hours=1)): 3,
+            (other.pk, hour + timedelta(days=2)): 4,
+        }
+    )
+    package_url = f"/api/experimental/package/{package.owner.name}/{package.name}"
+
+    response = api_client.get(
+        f"{package_url}/statistics/",
+        data={"start": "2021-03-01T00:00:00Z", "end": "2021-03-03T00:00:00Z"},
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["period"] == "day"
+    assert result["results"] == [
+        {"period_start": "2021-03-01T00:00:00Z", "downloads": 6},
+    ]
+
+    response = api_client.get(
+        f"{package_url}/{other.version_number}/statistics/",
+        data={
+            "period": "hour",
+            "start": "2021-03-01T12:00:00Z",
+            "end": "2021-03-04T00:00:00Z",
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"period_start": "2021-03-01T12:00:00Z", "downloads": 2},
+        {"period_start": "2021-03-01T13:00:00Z", "downloads": 3},
+        {"period_start": "2021-03-03T12:00:00Z", "downloads": 4},
+    ]
+
+    response = api_client.get(f"{package_url}/statistics/")
+    assert response.status_code == 200
+    assert response.json()["results"] == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "params",
+    (
+        {"period": "week"},
+        {"start": "2021-03-02T00:00:00Z", "end": "2021-03-01T00:00:00Z"},
+        {"period": "hour", "start": "2020-01-01T00:00:00Z"},
+    ),
+)
+def test_api_experimental_download_statistics_invalid(
+    api_client, package_version, params
+):
+    package = package_version.package
+    response = api_client.get(
+        f"/api/experimental/package/{package.owner.name}/{package.name}/statistics/",
+        data=params,
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_api_experimental_download_statistics_not_found(api_client):
+    response = api_client.get("/api/experimental/package/Missing/Package/statistics/")
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_api_experimental_package_version_files(
+    api_client, package_version, settings, tmp_path, mocker
+):
+    cache.clear()
+    settings.MEDIA_ROOT = str(tmp_path)
+    files = [("README.md", b"# Readme"), ("plugins/Mod.dll", b"\x00\x01" * 100)]
+    zip_raw = io.BytesIO()
+    with ZipFile(zip_raw, "w", ZIP_DEFLATED) as zip_file:
+        for name, content in files:
+            zip_file.writestr(name, content)
+    package_version.file.save("mod.zip", ContentFile(zip_raw.getvalue()))
+    zip_raw.seek(0)
+    PackageFileIndex.create_for_version(package_version, read_archive_entries(zip_raw))
+    base_url = (
+        f"/api/experimental/package/{package_version.owner.name}/"
+        f"{package_version.name}/{package_version.version_number}/files/"
+    )
+
+    response = api_client.get(base_url)
+    assert response.status_code == 200
+    result = response.json()["files"]
+    assert [(x["path"], x["size"]) for x in result] == [
+        ("README.md", 8),
+        ("plugins/Mod.dll", 200),
+    ]
+    assert result[1]["crc32"] == zlib.crc32(files[1][1])
+
+    response = api_client.get(f"{base_url}plugins/Mod.dll")
+    assert response.status_code == 200
+    assert response.content == files[1][1]
+    assert response["Content-Type"] == "application/octet-stream"
+    assert response["Content-Disposition"] == "attachment; filename*=UTF-8''Mod.dll"
+
+    response = api_client.get(f"{base_url}plugins/Missing.dll")
+    assert response.status_code == 404
+
+    mocker.patch(
+        "thunderstore.repository.api.experimental.views.MAX_EXTRACTED_FILE_SIZE", 100
+    )
+    response = api_client.get(f"{base_url}plugins/Mod.dll")
+    assert response.status_code == 400
+    assert "The file is too large to be downloaded separately" in response.json()[0]
+
+
+@pytest.mark.django_db
+def test_api_experimental_package_version_files_not_indexed(
+    api_client, package_version
+):
+    cache.clear()
+    response = api_client.get(
+        f"/api/experimental/package/{package_version.owner.name}/"
+        f"{package_version.name}/{package_version.version_number}/files/"
+    )
+    assert response.status_code == 404
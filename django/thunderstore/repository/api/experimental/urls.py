@@ -1,9 +1,19 @@
 from django.urls import path
 
 from thunderstore.repository.api.experimental.views import (
+    AsyncUploadPackageApiView,
+    ChunkedUploadPackageApiView,
+    CompletePackageUploadApiView,
     PackageDetailApiView,
+    PackageDownloadStatisticsApiView,
     PackageListApiView,
+    PackageUploadChunkApiView,
+    PackageUploadStatusApiView,
     PackageVersionDetailApiView,
+    PackageVersionDownloadStatisticsApiView,
+    PackageVersionFileApiView,
+    PackageVersionFilesApiView,
+    ResolveDependenciesApiView,
     UploadPackageApiView,
 )
 from thunderstore.social.api.experimental.views import CurrentUserExperimentalApiView
@@ -13,15 +23,65 @@ urls = [
         "current-user/", CurrentUserExperimentalApiView.as_view(), name="current-user"
     ),
     path("package/", PackageListApiView.as_view(), name="package-list"),
+    path(
+        "package/upload-async/",
+        AsyncUploadPackageApiView.as_view(),
+        name="package-upload-async",
+    ),
+    path(
+        "package/upload-chunked/",
+        ChunkedUploadPackageApiView.as_view(),
+        name="package-upload-chunked",
+    ),
+    path(
+        "package/upload/<uuid:upload_id>/",
+        PackageUploadStatusApiView.as_view(),
+        name="package-upload-status",
+    ),
+    path(
+        "package/upload/<uuid:upload_id>/chunks/<int:index>/",
+        PackageUploadChunkApiView.as_view(),
+        name="package-upload-chunk",
+    ),
+    path(
+        "package/upload/<uuid:upload_id>/complete/",
+        CompletePackageUploadApiView.as_view(),
+        name="package-upload-complete",
+    ),
     path(
         "package/<str:namespace>/<str:name>/",
         PackageDetailApiView.as_view(),
         name="package-detail",
     ),
+    path(
+        "package/<str:namespace>/<str:name>/statistics/",
+        PackageDownloadStatisticsApiView.as_view(),
+        name="package-statistics",
+    ),
+    path(
+        "package/<str:namespace>/<str:name>/<str:version>/statistics/",
+        PackageVersionDownloadStatisticsApiView.as_view(),
+        name="package-version-statistics",
+    ),
+    path(
+        "package/<str:namespace>/<str:name>/<str:version>/files/",
+        PackageVersionFilesApiView.as_view(),
+        name="package-version-files",
+    ),
+    path(
+        "package/<str:namespace>/<str:name>/<str:version>/files/<path:path>",
+        PackageVersionFileApiView.as_view(),
+        name="package-version-file",
+    ),
     path(
         "package/<str:namespace>/<str:name>/<str:version>/",
         PackageVersionDetailApiView.as_view(),
         name="package-version-detail",
     ),
     path("package/upload/", UploadPackageApiView.as_view(), name="package-upload"),
+    path(
+        "package/resolve/",
+        ResolveDependenciesApiView.as_view(),
+        name="package-resolve",
+    ),
 ]
@@ -1,6 +1,12 @@
+import posixpath
+from urllib.parse import quote
+
+from django.core.files.base import ContentFile
+from django.db import transaction
 from django.db.models import Count, QuerySet, Sum
-from drf_yasg.utils import swagger_auto_schema
-from rest_framework import permissions
+from django.http import Http404, HttpResponse
+from drf_yasg.utils import no_body, swagger_auto_schema
+from rest_framework import permissions, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import ListAPIView, RetrieveAPIView, get_object_or_404
 from rest_framework.pagination import CursorPagination
@@ -10,13 +16,36 @@ from rest_framework.views import APIView
 
 from thunderstore.cache.cache import CacheBustCondition, ManualCacheMixin
 from thunderstore.repository.api.experimental.serializers import (
+    ChunkedPackageUploadSerializerExperimental,
+    DependencyResolutionRequestSerializer,
+    DependencyResolutionSerializer,
+    DownloadStatisticsRequestSerializer,
+    DownloadStatisticsSerializer,
+    PackageFileIndexSerializerExperimental,
     PackageSerializerExperimental,
+    PackageUploadAsyncSerializerExperimental,
     PackageUploadSerializerExperiemental,
+    PackageUploadStatusSerializerExperimental,
     PackageVersionSerializerExperimental,
 )
-from thunderstore.repository.models import Package, PackageVersion
+from thunderstore.repository.dependencies import resolve_dependencies
+from thunderstore.repository.models import (
+    Package,
+    PackageDownloadRollup,
+    PackageFileIndex,
+    PackageUpload,
+    PackageUploadChunk,
+    PackageUploadStatus,
+    PackageVersion,
+    PackageVersionDownloadRollup,
+)
+from thunderstore.repository.package_archive import (
+    MAX_EXTRACTED_FILE_SIZE,
+    extract_archive_entry,
+)
 from thunderstore.repository.package_reference import PackageReference
 from thunderstore.repository.package_upload import MAX_PACKAGE_SIZE
+from thunderstore.repository.tasks import process_package_upload
 
 
 def get_package_queryset() -> "QuerySet[Package]":
@@ -138,6 +167,155 @@ class PackageVersionDetailApiView(ManualCacheMixin, RetrieveAPIView):
         return super().get(*args, **kwargs)
 
 
+class ResolveDependenciesApiView(APIView):
+    """
+    Resolves the package versions needed to install the given packages,
+    including all of their transitive dependencies. Package references
+    without a version resolve to the latest version of the package, and only
+    the newest version of each required package is included.
+    """
+
+    @swagger_auto_schema(
+        request_body=DependencyResolutionRequestSerializer,
+        responses={200: DependencyResolutionSerializer},
+        operation_id="experimental_package_resolve",
+    )
+    def post(self, request):
+        serializer = DependencyResolutionRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        resolution = resolve_dependencies(serializer.validated_data["packages"])
+        serializer = DependencyResolutionSerializer(
+            instance=resolution,
+            context={"request": request},
+        )
+        return Response(serializer.data)
+
+
+class DownloadStatisticsMixin:
+    """
+    Lists the download counts of an object per hour or day within a range,
+    from the rollups maintained by the download counter. Periods without any
+    downloads are omitted.
+    """
+
+    def get_reference(self) -> PackageReference:
+        raise NotImplementedError()
+
+    def get_rollups(self, obj) -> QuerySet:
+        raise NotImplementedError()
+
+    @swagger_auto_schema(
+        query_serializer=DownloadStatisticsRequestSerializer,
+        responses={200: DownloadStatisticsSerializer},
+    )
+    def get(self, request, *args, **kwargs):
+        serializer = DownloadStatisticsRequestSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        try:
+            reference = self.get_reference()
+        except ValueError as e:
+            raise ValidationError(str(e))
+        obj = get_object_or_404(reference.queryset.active())
+        results = (
+            self.get_rollups(obj)
+            .filter(
+                period=params["period"],
+                period_start__gte=params["start"],
+                period_start__lt=params["end"],
+            )
+            .order_by("period_start")
+            .values("period_start", "downloads")
+        )
+        serializer = DownloadStatisticsSerializer(
+            instance={**params, "results": results},
+        )
+        return Response(serializer.data)
+
+
+class PackageDownloadStatisticsApiView(DownloadStatisticsMixin, APIView):
+    def get_reference(self) -> PackageReference:
+        return PackageReference(
+            namespace=self.kwargs["namespace"],
+            name=self.kwargs["name"],
+        )
+
+    def get_rollups(self, obj) -> QuerySet:
+        return PackageDownloadRollup.objects.filter(package=obj)
+
+
+class PackageVersionDownloadStatisticsApiView(DownloadStatisticsMixin, APIView):
+    def get_reference(self) -> PackageReference:
+        return PackageReference(
+            namespace=self.kwargs["namespace"],
+            name=self.kwargs["name"],
+            version=self.kwargs["version"],
+        )
+
+    def get_rollups(self, obj) -> QuerySet:
+        return PackageVersionDownloadRollup.objects.filter(version=obj)
+
+
+def get_package_file_index(kwargs) -> PackageFileIndex:
+    try:
+        reference = PackageReference(
+            namespace=kwargs["namespace"],
+            name=kwargs["name"],
+            version=kwargs["version"],
+        )
+    except ValueError as e:
+        raise ValidationError(str(e))
+    # Versions uploaded before the files were indexed have no index until
+    # the index_package_files command is run
+    return get_object_or_404(
+        PackageFileIndex.objects.select_related("version"),
+        version__in=reference.queryset.active(),
+    )
+
+
+class PackageVersionFilesApiView(ManualCacheMixin, APIView):
+    """
+    Lists the files in a package version's zip
+    """
+
+    cache_until = CacheBustCondition.any_package_updated
+
+    @swagger_auto_schema(
+        responses={200: PackageFileIndexSerializerExperimental()},
+    )
+    def get(self, request, *args, **kwargs):
+        index = get_package_file_index(kwargs)
+        serializer = PackageFileIndexSerializerExperimental(
+            instance={"files": index.get_entries()},
+        )
+        return Response(serializer.data)
+
+
+class PackageVersionFileApiView(APIView):
+    """
+    Downloads a single file from a package version's zip
+    """
+
+    def get(self, request, *args, **kwargs):
+        index = get_package_file_index(kwargs)
+        entry = index.get_entry(kwargs["path"])
+        if entry is None:
+            raise Http404("File not found in the package")
+        if entry.size > MAX_EXTRACTED_FILE_SIZE:
+            raise ValidationError(
+                f"The file is too large to be downloaded separately, current "
+                f"maximum is {MAX_EXTRACTED_FILE_SIZE} bytes"
+            )
+        file = index.version.file
+        content = extract_archive_entry(file.storage, file.name, entry)
+        response = HttpResponse(content, content_type="application/octet-stream")
+        # The path comes from the uploaded zip, so it's percent-encoded to
+        # keep it from breaking out of the header value
+        filename = quote(posixpath.basename(entry.path))
+        response["Content-Disposition"] = f"attachment; filename*=UTF-8''{filename}"
+        return response
+
+
 class UploadPackageApiView(APIView):
     """
     Uploads a package. Requires multipart/form-data.
@@ -161,3 +339,170 @@ class UploadPackageApiView(APIView):
             context={"request": request},
         )
         return Response(serializer.data)
+
+
+class AsyncUploadPackageApiView(APIView):
+    """
+    Accepts a package to be validated and published in the background.
+    Requires multipart/form-data.
+
+    The outcome can be polled from the upload status endpoint.
+    """
+
+    parser_classes = [MultiPartParser]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        request_body=PackageUploadAsyncSerializerExperimental,
+        responses={202: PackageUploadStatusSerializerExperimental()},
+    )
+    def post(self, request):
+        serializer = PackageUploadAsyncSerializerExperimental(
+            data=request.data,
+            context={"request": request},
+        )
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.save()
+        transaction.on_commit(lambda: process_package_upload.delay(upload.pk))
+        serializer = PackageUploadStatusSerializerExperimental(
+            instance=upload,
+            context={"request": request},
+        )
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+class ChunkedUploadPackageApiView(APIView):
+    """
+    Starts a chunked package upload.
+
+    The file is then sent in chunks of the returned chunk_size, in any order
+    and in parallel if desired. Chunks which failed to upload can be sent
+    again, and the status endpoint lists the chunks received so far. Once
+    all chunks have been received, completing the upload queues it for
+    processing like an asynchronous upload.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        request_body=ChunkedPackageUploadSerializerExperimental,
+        responses={201: PackageUploadStatusSerializerExperimental()},
+    )
+    def post(self, request):
+        serializer = ChunkedPackageUploadSerializerExperimental(
+            data=request.data,
+            context={"request": request},
+        )
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.save()
+        serializer = PackageUploadStatusSerializerExperimental(
+            instance=upload,
+            context={"request": request},
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+def get_receiving_upload(request, upload_id) -> PackageUpload:
+    upload = get_object_or_404(
+        PackageUpload.objects.select_for_update(),
+        uuid=upload_id,
+        user=request.user,
+        chunk_size__isnull=False,
+    )
+    if upload.status != PackageUploadStatus.receiving:
+        raise ValidationError("The upload is no longer receiving chunks")
+    return upload
+
+
+class PackageUploadChunkApiView(APIView):
+    """
+    Stores a chunk of a chunked package upload. The request body is the
+    chunk's raw content, and a chunk which has already been received is
+    replaced.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(responses={204: ""})
+    def put(self, request, upload_id, index):
+        with transaction.atomic():
+            upload = get_receiving_upload(request, upload_id)
+        if index >= upload.chunk_count:
+            raise ValidationError(
+                f"Invalid chunk index, the upload has {upload.chunk_count} chunks"
+            )
+        size = upload.get_chunk_size(index)
+        content = request.stream.read(size + 1) if request.stream else b""
+        if len(content) != size:
+            raise ValidationError(f"Chunk {index} must be exactly {size} bytes")
+
+        chunk = PackageUploadChunk(upload=upload, index=index)
+        chunk.file.save(str(index), ContentFile(content), save=False)
+        with transaction.atomic():
+            upload = get_receiving_upload(request, upload_id)
+            previous = upload.chunks.filter(index=index).first()
+            if previous:
+                previous.file.delete(save=False)
+                previous.file = chunk.file.name
+                previous.save(update_fields=("file",))
+            else:
+                chunk.save()
+            upload.save(update_fields=("date_updated",))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CompletePackageUploadApiView(APIView):
+    """
+    Queues a chunked package upload for processing once all of its chunks
+    have been received.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        request_body=no_body,
+        responses={202: PackageUploadStatusSerializerExperimental()},
+    )
+    def post(self, request, upload_id):
+        with transaction.atomic():
+            upload = get_receiving_upload(request, upload_id)
+            received = upload.chunks.count()
+            if received != upload.chunk_count:
+                raise ValidationError(
+                    f"Missing chunks, received {received} of {upload.chunk_count}"
+                )
+            upload.status = PackageUploadStatus.pending
+            upload.save(update_fields=("status", "date_updated"))
+            transaction.on_commit(lambda: process_package_upload.delay(upload.pk))
+        serializer = PackageUploadStatusSerializerExperimental(
+            instance=upload,
+            context={"request": request},
+        )
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+class PackageUploadStatusApiView(APIView):
+    """
+    Returns the status of a package upload made by the current user.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        responses={200: PackageUploadStatusSerializerExperimental()},
+    )
+    def get(self, request, upload_id):
+        upload = get_object_or_404(
+            PackageUpload.objects.select_related(
+                "version",
+                "version__package",
+                "version__package__owner",
+            ),
+            uuid=upload_id,
+            user=request.user,
+        )
+        serializer = PackageUploadStatusSerializerExperimental(
+            instance=upload,
+            context={"request": request},
+        )
+        return Response(serializer.data)
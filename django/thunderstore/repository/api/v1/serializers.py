@@ -38,6 +38,8 @@ class PackageVersionSerializer(ModelSerializer):
             "dependencies",
             "download_url",
             "downloads",
+            "file_size",
+            "file_sha256",
             "date_created",
             "website_url",
             "is_active",
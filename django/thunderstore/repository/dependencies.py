@@ -0,0 +1,141 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.db.models import QuerySet
+
+from thunderstore.cache.cache import CacheBustCondition, cache_get_or_set_by_key
+from thunderstore.repository.models import PackageVersion
+
+# (version pk, package pk, (major, minor, patch))
+VersionRow = Tuple[int, int, Tuple[int, int, int]]
+
+
+class DependencyClosure:
+    """
+    All package versions a single package version depends on, directly or
+    transitively, including the version itself.
+    """
+
+    def __init__(self, versions: List[VersionRow], cycles: List[List[int]]):
+        self.versions = versions
+        self.cycles = cycles
+
+    @classmethod
+    def build(cls, root_pk: int) -> "DependencyClosure":
+        edges = load_dependency_edges([root_pk])
+        rows = PackageVersion.objects.filter(pk__in=edges.keys()).values_list(
+            "pk", "package_id", "major", "minor", "patch"
+        )
+        versions = [
+            (pk, package_id, (major, minor, patch))
+            for pk, package_id, major, minor, patch in rows
+        ]
+        return cls(versions=versions, cycles=find_dependency_cycles(edges, root_pk))
+
+
+def load_dependency_edges(root_pks: Iterable[int]) -> Dict[int, List[int]]:
+    """
+    Walks the dependency graph breadth first, using a single query per level
+
+    :param root_pks: The primary keys of the versions to start from
+    :return: A mapping of every reachable version to its direct dependencies
+    :rtype: Dict[int, List[int]]
+    """
+    through = PackageVersion.dependencies.through
+    edges: Dict[int, List[int]] = {}
+    frontier: Set[int] = set(root_pks)
+    while frontier:
+        for pk in frontier:
+            edges[pk] = []
+        rows = through.objects.filter(from_packageversion_id__in=frontier).values_list(
+            "from_packageversion_id", "to_packageversion_id"
+        )
+        discovered = set()
+        for dependant, dependency in rows:
+            edges[dependant].append(dependency)
+            if dependency not in edges:
+                discovered.add(dependency)
+        frontier = discovered
+    return edges
+
+
+def find_dependency_cycles(
+    edges: Dict[int, List[int]], root_pk: int
+) -> List[List[int]]:
+    """
+    Finds the dependency cycles reachable from a version
+
+    :return: A list of cycles, each a path of version primary keys which
+        starts and ends with the same version
+    :rtype: List[List[int]]
+    """
+    cycles = []
+    path = [root_pk]
+    on_path = {root_pk}
+    visited = {root_pk}
+    stack = [iter(edges.get(root_pk, []))]
+    while stack:
+        dependency = next(stack[-1], None)
+        if dependency is None:
+            stack.pop()
+            on_path.discard(path.pop())
+            continue
+        if dependency in on_path:
+            cycles.append(path[path.index(dependency) :] + [dependency])
+        elif dependency not in visited:
+            visited.add(dependency)
+            path.append(dependency)
+            on_path.add(dependency)
+            stack.append(iter(edges.get(dependency, [])))
+    return cycles
+
+
+def get_dependency_closure(version_pk: int) -> DependencyClosure:
+    # Dependencies of a version are fixed at upload, but listings and version
+    # activity aren't, so the closures are busted along with other package data
+    return cache_get_or_set_by_key(
+        CacheBustCondition.any_package_updated,
+        "repository.dependency_closure",
+        [version_pk],
+        lambda: DependencyClosure.build(version_pk),
+    )
+
+
+class DependencyResolution:
+    def __init__(self, versions: "QuerySet[PackageVersion]", cycles: List[List[int]]):
+        self.versions = versions
+        self.cycles = cycles
+
+
+def resolve_dependencies(roots: Iterable[PackageVersion]) -> DependencyResolution:
+    """
+    Resolves the full set of package versions required to install the given
+    package versions
+
+    Whenever multiple versions of the same package are required, only the
+    newest one of them is selected.
+
+    :param roots: The package versions to install
+    :return: The resolved versions, and any dependency cycles encountered
+    :rtype: DependencyResolution
+    """
+    selected: Dict[int, VersionRow] = {}
+    cycles = []
+    for root in roots:
+        closure = get_dependency_closure(root.pk)
+        cycles += [x for x in closure.cycles if x not in cycles]
+        for row in closure.versions:
+            current = selected.get(row[1])
+            if current is None or row[2] > current[2]:
+                selected[row[1]] = row
+
+    versions = (
+        PackageVersion.objects.filter(pk__in=[x[0] for x in selected.values()])
+        .select_related("package", "package__owner")
+        .prefetch_related(
+            "dependencies",
+            "dependencies__package",
+            "dependencies__package__owner",
+        )
+        .order_by("package__owner__name", "package__name")
+    )
+    return DependencyResolution(versions=versions, cycles=cycles)
@@ -0,0 +1,411 @@
+import logging
+import operator
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import reduce
+from typing import Dict, NamedTuple, Optional, Tuple, Type
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import Storage
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.http import Http404, HttpRequest, HttpResponse
+from django.shortcuts import redirect
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django_redis import get_redis_connection
+from ipware import get_client_ip
+from redis import Redis
+from redis.exceptions import LockError, RedisError, ResponseError
+
+from thunderstore.cache.cache import CacheBustCondition, cache_get_or_set_by_key
+from thunderstore.core.utils import ChoiceEnum
+from thunderstore.repository.models import (
+    DownloadRollupPeriod,
+    PackageDownloadRollup,
+    PackageVersion,
+    PackageVersionDownloadEvent,
+    PackageVersionDownloadRollup,
+    PackageVersionDownloadSummary,
+)
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_BUFFER_KEY = "repository.downloads.pending"
+DOWNLOAD_FLUSH_KEY = "repository.downloads.flushing"
+DOWNLOAD_FLUSH_LOCK_KEY = "lock.repository.downloads.flush"
+DOWNLOAD_FLUSH_BATCH_SIZE = 500
+DOWNLOAD_DEDUP_WINDOW = timedelta(minutes=10)
+DOWNLOAD_EVENT_RETENTION = timedelta(days=1)
+DOWNLOAD_EVENT_BATCH_SIZE = 5000
+
+# A mapping of (package version pk, start of the hour) to an amount of downloads
+DownloadCounts = Dict[Tuple[int, datetime], int]
+# (owner pk, period, start of the period) of a download rollup
+RollupKey = Tuple[int, str, datetime]
+
+
+def get_download_hour(timestamp: Optional[datetime] = None) -> datetime:
+    timestamp = timestamp or timezone.now()
+    return timestamp.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def get_download_buffer() -> Optional[Redis]:
+    """
+    Returns the Redis client downloads are buffered in, or None if the cache
+    isn't backed by Redis, in which case downloads are written directly
+    """
+    try:
+        return get_redis_connection("default")
+    except NotImplementedError:
+        return None
+
+
+def buffer_download(version_pk: int) -> None:
+    """
+    Records a counted download of a package version
+
+    The download is added to a Redis hash and written to the database by the
+    next flush_buffered_downloads run. If Redis isn't available, the counter
+    is incremented in the database right away instead.
+    """
+    hour = get_download_hour()
+    buffer = get_download_buffer()
+    if buffer is not None:
+        try:
+            field = f"{version_pk}:{int(hour.timestamp())}"
+            buffer.hincrby(DOWNLOAD_BUFFER_KEY, field, 1)
+            return
+        except RedisError:
+            logger.warning("Unable to buffer download, writing it directly")
+    apply_download_counts({(version_pk, hour): 1})
+
+
+def apply_download_counts(counts: DownloadCounts) -> None:
+    """
+    Adds the given amounts to the download counters and rollups of package
+    versions, using a single UPDATE per batch of versions
+
+    :param counts: The downloads to add, per version and hour
+    """
+    totals: Dict[int, int] = defaultdict(int)
+    for (version_pk, _), count in counts.items():
+        totals[version_pk] += count
+
+    # Sorted so that concurrent flushes lock the rows in the same order
+    items = sorted(totals.items())
+    with transaction.atomic():
+        for i in range(0, len(items), DOWNLOAD_FLUSH_BATCH_SIZE):
+            batch = items[i : i + DOWNLOAD_FLUSH_BATCH_SIZE]
+            PackageVersion.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+                downloads=F("downloads")
+                + Case(
+                    *(When(pk=pk, then=Value(count)) for pk, count in batch),
+                    output_field=models.PositiveIntegerField(),
+                )
+            )
+        update_download_rollups(counts)
+
+
+def update_download_rollups(counts: DownloadCounts) -> None:
+    """
+    Adds the given amounts to the hourly and daily download rollups of the
+    package versions and their packages
+    """
+    version_rows: Dict[RollupKey, int] = defaultdict(int)
+    for (version_pk, hour), count in counts.items():
+        version_rows[(version_pk, DownloadRollupPeriod.hour, hour)] += count
+        day = hour.replace(hour=0)
+        version_rows[(version_pk, DownloadRollupPeriod.day, day)] += count
+
+    packages = dict(
+        PackageVersion.objects.filter(
+            pk__in={version_pk for version_pk, _ in counts}
+        ).values_list("pk", "package_id")
+    )
+    package_rows: Dict[RollupKey, int] = defaultdict(int)
+    for (version_pk, period, start), count in version_rows.items():
+        package_rows[(packages[version_pk], period, start)] += count
+
+    _increment_rollups(PackageVersionDownloadRollup, "version_id", version_rows)
+    _increment_rollups(PackageDownloadRollup, "package_id", package_rows)
+
+
+def _increment_rollups(
+    model: Type[models.Model], owner_field: str, rows: Dict[RollupKey, int]
+) -> None:
+    # Missing rows are created first so that the increments can be done with
+    # a single UPDATE, which is safe against concurrent writers
+    items = sorted(rows.items())
+    for i in range(0, len(items), DOWNLOAD_FLUSH_BATCH_SIZE):
+        batch = items[i : i + DOWNLOAD_FLUSH_BATCH_SIZE]
+        conditions = [
+            Q(**{owner_field: owner_pk}, period=period, period_start=start)
+            for (owner_pk, period, start), _ in batch
+        ]
+        model.objects.bulk_create(
+            [
+                model(**{owner_field: owner_pk}, period=period, period_start=start)
+                for (owner_pk, period, start), _ in batch
+            ],
+            ignore_conflicts=True,
+        )
+        model.objects.filter(reduce(operator.or_, conditions)).update(
+            downloads=F("downloads")
+            + Case(
+                *(
+                    When(condition, then=Value(count))
+                    for condition, (_, count) in zip(conditions, batch)
+                ),
+                default=Value(0),
+                output_field=models.PositiveIntegerField(),
+            )
+        )
+
+
+def flush_buffered_downloads() -> int:
+    """
+    Writes the downloads buffered in Redis to the database
+
+    The pending counters are first renamed to a separate key, so downloads
+    recorded during the flush end up in the next one. If a flush fails before
+    it's done, the following flush retries the same counters.
+
+    :return: The amount of downloads written
+    :rtype: int
+    """
+    buffer = get_download_buffer()
+    if buffer is None:
+        return 0
+
+    try:
+        with buffer.lock(DOWNLOAD_FLUSH_LOCK_KEY, timeout=300, blocking_timeout=0):
+            if not buffer.exists(DOWNLOAD_FLUSH_KEY):
+                try:
+                    buffer.rename(DOWNLOAD_BUFFER_KEY, DOWNLOAD_FLUSH_KEY)
+                except ResponseError:
+                    # Nothing has been downloaded since the last flush
+                    return 0
+            counts = {}
+            for field, count in buffer.hgetall(DOWNLOAD_FLUSH_KEY).items():
+                version_pk, hour = field.split(b":")
+                hour = datetime.fromtimestamp(int(hour), tz=timezone.utc)
+                counts[(int(version_pk), hour)] = int(count)
+            apply_download_counts(counts)
+            buffer.delete(DOWNLOAD_FLUSH_KEY)
+            return sum(counts.values())
+    except LockError:
+        # Another flush is already in progress
+        return 0
+
+
+def is_download_countable(version_pk: int, source_ip: str) -> bool:
+    """
+    Checks whether a download should be counted, i.e. the same source hasn't
+    had a download of the version counted within DOWNLOAD_DEDUP_WINDOW
+
+    Sources are tracked with expiring cache keys. If the cache can't be
+    reached, PackageVersionDownloadEvent rows are used instead.
+    """
+    added = cache.add(
+        f"repository.downloads.seen.{version_pk}.{source_ip}",
+        1,
+        timeout=DOWNLOAD_DEDUP_WINDOW.total_seconds(),
+    )
+    if added is not None:
+        return added
+    return PackageVersionDownloadEvent.register_download(version_pk, source_ip)
+
+
+def summarize_download_events() -> int:
+    """
+    Folds PackageVersionDownloadEvent rows which haven't counted a download
+    within DOWNLOAD_EVENT_RETENTION into per-day PackageVersionDownloadSummary
+    rows, and deletes them
+
+    :return: The amount of events summarized
+    :rtype: int
+    """
+    cutoff = timezone.now() - DOWNLOAD_EVENT_RETENTION
+    summarized = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                PackageVersionDownloadEvent.objects.filter(last_download__lt=cutoff)
+                .order_by("pk")
+                .select_for_update(skip_locked=True)
+                .values_list("pk", flat=True)[:DOWNLOAD_EVENT_BATCH_SIZE]
+            )
+            if not batch:
+                return summarized
+            events = PackageVersionDownloadEvent.objects.filter(pk__in=batch)
+            _add_download_summaries(
+                events.annotate(date=TruncDate("last_download"))
+                .values("version_id", "date")
+                .annotate(
+                    source_count=Count("pk"),
+                    total_downloads=Sum("total_downloads"),
+                    counted_downloads=Sum("counted_downloads"),
+                )
+                .order_by()
+            )
+            events.delete()
+            summarized += len(batch)
+
+
+def _add_download_summaries(rows) -> None:
+    fields = ("source_count", "total_downloads", "counted_downloads")
+    rows = {(x["version_id"], x["date"]): x for x in rows}
+    existing = PackageVersionDownloadSummary.objects.select_for_update().filter(
+        version_id__in={version_pk for version_pk, _ in rows},
+        date__in={date for _, date in rows},
+    )
+    updated = []
+    for summary in existing:
+        row = rows.pop((summary.version_id, summary.date), None)
+        if row is None:
+            continue
+        for field in fields:
+            setattr(summary, field, getattr(summary, field) + row[field])
+        updated.append(summary)
+    PackageVersionDownloadSummary.objects.bulk_update(updated, fields)
+    PackageVersionDownloadSummary.objects.bulk_create(
+        [
+            PackageVersionDownloadSummary(
+                version_id=row["version_id"],
+                date=row["date"],
+                **{field: row[field] for field in fields},
+            )
+            for row in rows.values()
+        ]
+    )
+
+
+class DownloadTarget(NamedTuple):
+    version_pk: int
+    file_name: str
+    file_url: str
+    # The name the file is downloaded as, as deduplicated files are stored
+    # under their hash rather than the version's name
+    download_name: Optional[str] = None
+
+
+class DownloadServeMode(ChoiceEnum):
+    redirect = "redirect"
+    x_accel_redirect = "x-accel-redirect"
+    x_sendfile = "x-sendfile"
+
+
+def get_download_target(
+    community_pk: int, owner: str, name: str, version: str
+) -> DownloadTarget:
+    """
+    Resolves a package version download to the version's primary key and its
+    file, cached until any package is updated
+
+    :raises Http404: If the version doesn't exist or isn't listed in the
+        community
+    :return: The version and the location of its file
+    :rtype: DownloadTarget
+    """
+
+    def resolve() -> DownloadTarget:
+        row = (
+            PackageVersion.objects.filter(
+                package__owner__name=owner,
+                package__name=name,
+                package__community_listings__community=community_pk,
+                version_number=version,
+            )
+            .values_list("pk", "file")
+            .first()
+        )
+        if row is None:
+            raise Http404("No matching package version found")
+        version_pk, file_name = row
+        return DownloadTarget(
+            version_pk=version_pk,
+            file_name=file_name,
+            file_url=get_package_file_storage().url(file_name),
+            download_name=f"{owner}-{name}-{version}.zip",
+        )
+
+    return cache_get_or_set_by_key(
+        CacheBustCondition.any_package_updated,
+        "repository.download_target",
+        [community_pk, owner, name, version],
+        resolve,
+    )
+
+
+def get_package_file_storage() -> Storage:
+    return PackageVersion._meta.get_field("file").storage
+
+
+def is_download_start(request: HttpRequest) -> bool:
+    """
+    Checks whether a request starts a download rather than resumes one, so
+    that resumed downloads aren't counted again
+    """
+    byte_range = request.headers.get("Range", "").strip()
+    return not byte_range or byte_range.startswith("bytes=0-")
+
+
+def get_download_response(request: HttpRequest, target: DownloadTarget) -> HttpResponse:
+    """
+    Serves a package file according to PACKAGE_DOWNLOAD_SERVE_MODE
+
+    Files on the local filesystem can be handed off to the front proxy, which
+    then also handles byte ranges. Everything else is redirected to the file
+    URL of the storage.
+    """
+    mode = settings.PACKAGE_DOWNLOAD_SERVE_MODE
+    if mode == DownloadServeMode.redirect:
+        return redirect(request.build_absolute_uri(target.file_url))
+    try:
+        path = get_package_file_storage().path(target.file_name)
+    except NotImplementedError:
+        return redirect(request.build_absolute_uri(target.file_url))
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404("Package file not found")
+    # Same format as nginx uses for the files it serves
+    etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(content_type="application/zip")
+        filename = target.download_name or os.path.basename(target.file_name)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        if mode == DownloadServeMode.x_accel_redirect:
+            prefix = settings.PACKAGE_DOWNLOAD_ACCEL_PREFIX.rstrip("/")
+            response["X-Accel-Redirect"] = f"{prefix}/{quote(target.file_name)}"
+        elif mode == DownloadServeMode.x_sendfile:
+            response["X-Sendfile"] = path
+        else:
+            raise ImproperlyConfigured(f"Invalid package download serve mode: {mode}")
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def count_download(version_pk: int, request: HttpRequest) -> None:
+    """
+    Counts a download of a package version, unless the same client has
+    already had one counted within DOWNLOAD_DEDUP_WINDOW
+    """
+    client_ip, is_routable = get_client_ip(request)
+    if client_ip is None:
+        return
+    if is_download_countable(version_pk, client_ip):
+        buffer_download(version_pk)
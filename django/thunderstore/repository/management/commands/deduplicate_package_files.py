@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+
+from thunderstore.cache.cache import CacheBustCondition, invalidate_cache
+from thunderstore.repository.models import BlobKind, ContentBlob, PackageVersion
+from thunderstore.repository.models.content_blob import (
+    delete_blob_file,
+    get_blob_filepath,
+    get_blob_storage,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Finds package versions whose files have identical content and reports "
+        "the storage deduplicating them would save. Requires the file hashes "
+        "to have been backfilled with the hash_package_files command."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--apply",
+            action="store_true",
+            help="Move the duplicates to content addressed storage",
+        )
+
+    def handle(self, *args, **kwargs):
+        duplicates = (
+            PackageVersion.objects.exclude(file_sha256=None)
+            .values("file_sha256")
+            .annotate(copies=Count("file", distinct=True), size=Max("file_size"))
+            .filter(copies__gt=1)
+            .order_by("file_sha256")
+        )
+        total_copies = 0
+        total_savings = 0
+        for duplicate in duplicates:
+            total_copies += duplicate["copies"] - 1
+            total_savings += (duplicate["copies"] - 1) * duplicate["size"]
+            if kwargs.get("apply", False):
+                self.deduplicate(duplicate["file_sha256"])
+
+        self.stdout.write(
+            f"Found {total_copies} redundant copies of package files, "
+            f"taking up {total_savings} bytes"
+        )
+        if kwargs.get("apply", False):
+            invalidate_cache(CacheBustCondition.any_package_updated)
+        self.stdout.write("Done!")
+
+    def deduplicate(self, sha256: str) -> None:
+        with transaction.atomic():
+            versions = list(
+                PackageVersion.objects.select_for_update()
+                .filter(file_sha256=sha256)
+                .order_by("pk")
+                .only("pk", "file")
+            )
+            blob = (
+                ContentBlob.objects.select_for_update()
+                .filter(kind=BlobKind.package_file, sha256=sha256)
+                .first()
+            )
+            if blob is None:
+                with versions[0].file.open("rb") as file:
+                    blob = ContentBlob.objects.create(
+                        kind=BlobKind.package_file,
+                        sha256=sha256,
+                        size=file.size,
+                        name=get_blob_storage(BlobKind.package_file).save(
+                            get_blob_filepath(BlobKind.package_file, sha256), file
+                        ),
+                    )
+            moved = [x for x in versions if x.file.name != blob.name]
+            blob.reference_count += len(moved)
+            blob.save(update_fields=("reference_count",))
+            PackageVersion.objects.filter(pk__in=[x.pk for x in moved]).update(
+                file=blob.name
+            )
+            for version in moved:
+                transaction.on_commit(
+                    lambda name=version.file.name: delete_blob_file(
+                        BlobKind.package_file, name
+                    )
+                )
+        self.stdout.write(f"Deduplicated {len(moved)} copies of {blob.name}")
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from thunderstore.repository.models import PackageVersion
+from thunderstore.repository.thumbnails import generate_thumbnails
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates the thumbnails of package version icons which don't have "
+        "them yet, e.g. icons uploaded before thumbnails were pre-generated"
+    )
+
+    def handle(self, *args, **kwargs):
+        versions = PackageVersion.objects.order_by("pk")
+        # Deduplicated icons are shared by multiple versions
+        seen = set()
+        last_pk = 0
+        while True:
+            batch = list(
+                versions.filter(pk__gt=last_pk).only("pk", "icon")[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            for version in batch:
+                if version.icon.name in seen:
+                    continue
+                seen.add(version.icon.name)
+                generate_thumbnails(version.icon)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"Processed {len(seen)} icons")
+        self.stdout.write("Done!")
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from thunderstore.repository.models import PackageVersion
+from thunderstore.repository.utils import get_file_sha256
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "Computes and stores the SHA-256 of package version files"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-hash versions which already have a stored hash",
+        )
+
+    def handle(self, *args, **kwargs):
+        versions = PackageVersion.objects.order_by("pk")
+        if not kwargs.get("all", False):
+            versions = versions.filter(file_sha256=None)
+
+        total = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                versions.filter(pk__gt=last_pk).only("pk", "file")[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            for version in batch:
+                with version.file.open("rb") as file:
+                    version.file_sha256 = get_file_sha256(file)
+            PackageVersion.objects.bulk_update(batch, ["file_sha256"])
+            total += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"Hashed {total} package files")
+        self.stdout.write("Done!")
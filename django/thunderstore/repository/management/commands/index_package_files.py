@@ -0,0 +1,41 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+
+from thunderstore.cache.cache import CacheBustCondition, invalidate_cache
+from thunderstore.repository.models import PackageFileIndex, PackageVersion
+from thunderstore.repository.package_archive import read_archive_entries
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Indexes the files in the zips of package versions which don't have "
+        "a file index yet"
+    )
+
+    def handle(self, *args, **kwargs):
+        versions = PackageVersion.objects.filter(file_index=None).order_by("pk")
+
+        total = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                versions.filter(pk__gt=last_pk).only("pk", "file")[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            for version in batch:
+                try:
+                    with version.file.open("rb") as file:
+                        entries = read_archive_entries(file)
+                except ValidationError:
+                    self.stdout.write(f"Unable to read the zip of version {version.pk}")
+                    continue
+                PackageFileIndex.create_for_version(version, entries)
+                total += 1
+            last_pk = batch[-1].pk
+            self.stdout.write(f"Indexed {total} package files")
+        # The file listings of versions without an index may have been cached
+        invalidate_cache(CacheBustCondition.any_package_updated)
+        self.stdout.write("Done!")
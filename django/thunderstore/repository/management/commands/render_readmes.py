@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from thunderstore.repository.markdown import render_markdown
+from thunderstore.repository.models import PackageVersion
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "Renders and stores the README HTML of package versions"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-render versions which already have stored README HTML",
+        )
+
+    def handle(self, *args, **kwargs):
+        versions = PackageVersion.objects.order_by("pk")
+        if not kwargs.get("all", False):
+            versions = versions.filter(readme_html=None)
+
+        total = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                versions.filter(pk__gt=last_pk).only("pk", "readme")[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            for version in batch:
+                version.readme_html = render_markdown(version.readme)
+            PackageVersion.objects.bulk_update(batch, ["readme_html"])
+            total += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"Rendered {total} READMEs")
+        self.stdout.write("Done!")
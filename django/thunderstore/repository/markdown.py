@@ -0,0 +1,38 @@
+import markdown
+from django.utils.html import escape
+
+MARKDOWN_EXTENSIONS = [
+    "markdown.extensions.abbr",
+    "markdown.extensions.def_list",
+    "markdown.extensions.fenced_code",
+    "markdown.extensions.footnotes",
+    "markdown.extensions.tables",
+    "markdown.extensions.admonition",
+    # "markdown.extensions.codehilite",  # TODO: Configure
+    "markdown.extensions.nl2br",
+    "markdown.extensions.sane_lists",
+    "markdown.extensions.toc",
+    "markdown.extensions.wikilinks",
+    "pymdownx.magiclink",
+    "pymdownx.tilde",
+]
+
+
+def deduplicate_escape(text):
+    return (
+        text.replace("&amp;lt;", "&lt;")
+        .replace("&amp;gt;", "&gt;")
+        .replace("&amp;quot;", "&quot;")
+        .replace("&amp;#39;", "&#39;")
+        .replace("&amp;amp;", "&amp;")
+    )
+
+
+def render_markdown(value: str) -> str:
+    """
+    Renders user submitted markdown into HTML. Any HTML in the input is
+    escaped, so the result is safe to output as-is.
+    """
+    return deduplicate_escape(
+        markdown.markdown(escape(value), extensions=MARKDOWN_EXTENSIONS)
+    )
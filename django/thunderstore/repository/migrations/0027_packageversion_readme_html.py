@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-19 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0026_add_unique_constraints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="packageversion",
+            name="readme_html",
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
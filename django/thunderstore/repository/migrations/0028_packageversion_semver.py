@@ -0,0 +1,51 @@
+from distutils.version import StrictVersion
+
+from django.db import migrations, models
+
+
+def populate_version_columns(apps, schema_editor):
+    PackageVersion = apps.get_model("repository", "PackageVersion")
+    versions = list(PackageVersion.objects.only("pk", "version_number"))
+    for version in versions:
+        version.major, version.minor, version.patch = StrictVersion(
+            version.version_number
+        ).version
+    PackageVersion.objects.bulk_update(
+        versions, ["major", "minor", "patch"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0027_packageversion_readme_html"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="packageversion",
+            name="major",
+            field=models.PositiveIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="packageversion",
+            name="minor",
+            field=models.PositiveIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="packageversion",
+            name="patch",
+            field=models.PositiveIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_version_columns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="packageversion",
+            index=models.Index(
+                fields=["package", "major", "minor", "patch"],
+                name="packageversion_semver_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 3.1.14 on 2026-10-19 10:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_package_dependants(apps, schema_editor):
+    PackageVersion = apps.get_model("repository", "PackageVersion")
+    PackageDependant = apps.get_model("repository", "PackageDependant")
+    pairs = (
+        PackageVersion.dependencies.through.objects.filter(
+            from_packageversion__package__is_active=True,
+            from_packageversion__is_active=True,
+        )
+        .values_list(
+            "to_packageversion__package_id",
+            "from_packageversion__package_id",
+        )
+        .distinct()
+    )
+    PackageDependant.objects.bulk_create(
+        [
+            PackageDependant(package_id=package_pk, dependant_id=dependant_pk)
+            for package_pk, dependant_pk in pairs
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0028_packageversion_semver"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PackageDependant",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "dependant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dependency_links",
+                        to="repository.package",
+                    ),
+                ),
+                (
+                    "package",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dependant_links",
+                        to="repository.package",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="packagedependant",
+            constraint=models.UniqueConstraint(
+                fields=("package", "dependant"), name="unique_package_dependant"
+            ),
+        ),
+        migrations.RunPython(populate_package_dependants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+import pytz
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    CrontabSchedule = apps.get_model("django_celery_beat", "CrontabSchedule")
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+
+    schedule, _ = CrontabSchedule.objects.get_or_create(
+        minute="*",
+        hour="*",
+        day_of_week="*",
+        day_of_month="*",
+        month_of_year="*",
+        timezone=pytz.timezone("UTC"),
+    )
+    PeriodicTask.objects.get_or_create(
+        crontab=schedule,
+        name="Flush buffered download counts",
+        task="thunderstore.repository.tasks.flush_download_counts",
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0029_add_package_dependant"),
+        ("django_celery_beat", "0014_remove_clockedschedule_enabled"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.1.14 on 2026-10-19 10:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0030_flush_download_counts_task"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PackageVersionDownloadSummary",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("source_count", models.PositiveIntegerField(default=0)),
+                ("total_downloads", models.PositiveIntegerField(default=0)),
+                ("counted_downloads", models.PositiveIntegerField(default=0)),
+                (
+                    "version",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="download_summaries",
+                        to="repository.packageversion",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="packageversiondownloadsummary",
+            constraint=models.UniqueConstraint(
+                fields=("version", "date"), name="unique_download_summary_per_day"
+            ),
+        ),
+    ]
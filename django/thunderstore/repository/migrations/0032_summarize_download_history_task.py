@@ -0,0 +1,33 @@
+import pytz
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    CrontabSchedule = apps.get_model("django_celery_beat", "CrontabSchedule")
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+
+    schedule, _ = CrontabSchedule.objects.get_or_create(
+        minute="0",
+        hour="3",
+        day_of_week="*",
+        day_of_month="*",
+        month_of_year="*",
+        timezone=pytz.timezone("UTC"),
+    )
+    PeriodicTask.objects.get_or_create(
+        crontab=schedule,
+        name="Summarize download history",
+        task="thunderstore.repository.tasks.summarize_download_history",
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0031_packageversiondownloadsummary"),
+        ("django_celery_beat", "0014_remove_clockedschedule_enabled"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 3.1.14 on 2026-10-19 10:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0032_summarize_download_history_task"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PackageVersionDownloadRollup",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("hour", "hour"), ("day", "day")], max_length=16
+                    ),
+                ),
+                ("period_start", models.DateTimeField()),
+                ("downloads", models.PositiveIntegerField(default=0)),
+                (
+                    "version",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="download_rollups",
+                        to="repository.packageversion",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="PackageDownloadRollup",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("hour", "hour"), ("day", "day")], max_length=16
+                    ),
+                ),
+                ("period_start", models.DateTimeField()),
+                ("downloads", models.PositiveIntegerField(default=0)),
+                (
+                    "package",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="download_rollups",
+                        to="repository.package",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="packageversiondownloadrollup",
+            constraint=models.UniqueConstraint(
+                fields=("version", "period", "period_start"),
+                name="unique_version_download_rollup",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="packagedownloadrollup",
+            constraint=models.UniqueConstraint(
+                fields=("package", "period", "period_start"),
+                name="unique_package_download_rollup",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-19 10:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0033_download_rollups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="packageversion",
+            name="file_sha256",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 3.1.14 on 2026-10-19 10:47
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import thunderstore.repository.models.package_upload
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0021_update_trending_listings_task"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("repository", "0034_packageversion_file_sha256"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PackageUpload",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "uuid",
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+                (
+                    "file",
+                    models.FileField(
+                        blank=True,
+                        upload_to=thunderstore.repository.models.package_upload.get_package_upload_filepath,
+                    ),
+                ),
+                ("form_data", models.JSONField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "pending"),
+                            ("processing", "processing"),
+                            ("succeeded", "succeeded"),
+                            ("failed", "failed"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                    ),
+                ),
+                ("errors", models.JSONField(blank=True, null=True)),
+                ("date_created", models.DateTimeField(auto_now_add=True)),
+                ("date_updated", models.DateTimeField(auto_now=True)),
+                (
+                    "community",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="package_uploads",
+                        to="community.community",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="package_uploads",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "version",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="repository.packageversion",
+                    ),
+                ),
+            ],
+        ),
+    ]
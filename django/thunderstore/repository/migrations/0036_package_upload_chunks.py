@@ -0,0 +1,77 @@
+# Generated by Django 3.1.14 on 2026-10-19 10:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import thunderstore.repository.models.package_upload
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0035_package_upload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="packageupload",
+            name="chunk_size",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="packageupload",
+            name="file_size",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="packageupload",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("receiving", "receiving"),
+                    ("pending", "pending"),
+                    ("processing", "processing"),
+                    ("succeeded", "succeeded"),
+                    ("failed", "failed"),
+                ],
+                default="pending",
+                max_length=16,
+            ),
+        ),
+        migrations.CreateModel(
+            name="PackageUploadChunk",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("index", models.PositiveIntegerField()),
+                (
+                    "file",
+                    models.FileField(
+                        upload_to=thunderstore.repository.models.package_upload.get_package_upload_chunk_filepath
+                    ),
+                ),
+                ("date_created", models.DateTimeField(auto_now_add=True)),
+                (
+                    "upload",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chunks",
+                        to="repository.packageupload",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="packageuploadchunk",
+            constraint=models.UniqueConstraint(
+                fields=("upload", "index"), name="unique_chunk_per_upload"
+            ),
+        ),
+    ]
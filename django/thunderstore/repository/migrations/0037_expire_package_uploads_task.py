@@ -0,0 +1,33 @@
+import pytz
+from django.db import migrations
+
+
+def forwards(apps, schema_editor):
+    CrontabSchedule = apps.get_model("django_celery_beat", "CrontabSchedule")
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+
+    schedule, _ = CrontabSchedule.objects.get_or_create(
+        minute="30",
+        hour="*",
+        day_of_week="*",
+        day_of_month="*",
+        month_of_year="*",
+        timezone=pytz.timezone("UTC"),
+    )
+    PeriodicTask.objects.get_or_create(
+        crontab=schedule,
+        name="Expire stale package uploads",
+        task="thunderstore.repository.tasks.expire_package_uploads",
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0036_package_upload_chunks"),
+        ("django_celery_beat", "0014_remove_clockedschedule_enabled"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.1.14 on 2026-10-19 10:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0037_expire_package_uploads_task"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContentBlob",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("package_file", "package_file"), ("icon", "icon")],
+                        max_length=32,
+                    ),
+                ),
+                ("sha256", models.CharField(max_length=64)),
+                ("name", models.CharField(max_length=512)),
+                ("size", models.PositiveIntegerField()),
+                ("reference_count", models.PositiveIntegerField(default=0)),
+                ("date_created", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="contentblob",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "sha256"), name="unique_blob_per_hash"
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 3.1.14 on 2026-10-19 11:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0038_content_blob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StorageUsage",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_global", models.BooleanField(default=False)),
+                ("used_bytes", models.BigIntegerField(default=0)),
+                ("date_reconciled", models.DateTimeField(blank=True, null=True)),
+                (
+                    "identity",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="storage_usage",
+                        to="repository.uploaderidentity",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="storageusage",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(is_global=True),
+                fields=("is_global",),
+                name="unique_global_storage_usage",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="storageusage",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    models.Q(("identity", None), ("is_global", True)),
+                    models.Q(("identity__isnull", False), ("is_global", False)),
+                    _connector="OR",
+                ),
+                name="storage_usage_global_or_identity",
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.1.14 on 2026-10-19 11:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0040_reconcile_storage_usage_task"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PackageFileIndex",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("entries", models.JSONField()),
+                ("date_created", models.DateTimeField(auto_now_add=True)),
+                (
+                    "version",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="file_index",
+                        to="repository.packageversion",
+                    ),
+                ),
+            ],
+        ),
+    ]
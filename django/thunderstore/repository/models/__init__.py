@@ -1,6 +1,11 @@
+from .content_blob import *
 from .discord_bot import *
 from .package import *
 from .package_download import *
+from .package_file_index import *
 from .package_rating import *
+from .package_upload import *
 from .package_version import *
+from .reverse_dependency import *
+from .storage_usage import *
 from .uploader_identity import *
@@ -0,0 +1,105 @@
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.db import models, transaction
+
+from thunderstore.core.utils import ChoiceEnum
+
+
+class BlobKind(ChoiceEnum):
+    package_file = "package_file"
+    icon = "icon"
+
+
+# The PackageVersion field referencing each kind of blob, which determines
+# the storage of the blobs, and the file extension of the blobs
+BLOB_KIND_FIELDS = {
+    BlobKind.package_file: ("file", "zip"),
+    BlobKind.icon: ("icon", "png"),
+}
+
+
+def get_blob_filepath(kind: str, sha256: str) -> str:
+    extension = BLOB_KIND_FIELDS[kind][1]
+    return f"repository/blobs/{sha256[:2]}/{sha256}.{extension}"
+
+
+def get_blob_storage(kind: str) -> Storage:
+    from thunderstore.repository.models import PackageVersion
+
+    return PackageVersion._meta.get_field(BLOB_KIND_FIELDS[kind][0]).storage
+
+
+class ContentBlob(models.Model):
+    """
+    A file stored once under its content hash, no matter how many package
+    versions use it
+
+    The package versions point to the blob's name in storage, and the blob
+    keeps count of them so that it can be deleted once none remain.
+    """
+
+    kind = models.CharField(max_length=32, choices=BlobKind.as_choices())
+    sha256 = models.CharField(max_length=64)
+    name = models.CharField(max_length=512)
+    size = models.PositiveIntegerField()
+    reference_count = models.PositiveIntegerField(default=0)
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("kind", "sha256"), name="unique_blob_per_hash"
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def store(cls, kind: str, content: File, sha256: str) -> str:
+        """
+        Stores the content unless a blob with the same hash already exists,
+        and adds a reference to the blob
+
+        :return: The name of the blob in storage
+        :rtype: str
+        """
+        with transaction.atomic():
+            blob, created = cls.objects.select_for_update().get_or_create(
+                kind=kind,
+                sha256=sha256,
+                defaults={"size": content.size},
+            )
+            if created:
+                blob.name = get_blob_storage(kind).save(
+                    get_blob_filepath(kind, sha256), content
+                )
+            blob.reference_count += 1
+            blob.save()
+            return blob.name
+
+    @classmethod
+    def release(cls, kind: str, name: str) -> None:
+        """
+        Removes a reference to the blob stored under a name, if any, and
+        deletes the blob once it's no longer referenced
+        """
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(kind=kind, name=name).first()
+            if blob is None:
+                return
+            blob.reference_count -= 1
+            if blob.reference_count > 0:
+                blob.save(update_fields=("reference_count",))
+                return
+            blob.delete()
+            transaction.on_commit(lambda: delete_blob_file(kind, name))
+
+
+def delete_blob_file(kind: str, name: str) -> None:
+    try:
+        get_blob_storage(kind).delete(name)
+    except NotImplementedError:
+        # Not every storage backend supports deleting files, in which case
+        # the file is merely left unused
+        pass
@@ -1,12 +1,11 @@
 import re
 import uuid
-from distutils.version import StrictVersion
 
 from django.conf import settings
 from django.contrib.sites.models import Site
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import Case, Q, Sum, When, signals
+from django.db.models import Q, Sum, signals
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.functional import cached_property
@@ -25,11 +24,9 @@ class PackageQueryset(models.QuerySet):
 
 
 def get_package_dependants(package_pk: int):
-    return Package.objects.exclude(
-        ~Q(
-            versions__dependencies__package=package_pk,
-        )
-    ).active()
+    # Backed by PackageDependant, which only tracks active versions of active
+    # packages
+    return Package.objects.filter(dependency_links__package=package_pk)
 
 
 @cache_function_result(CacheBustCondition.any_package_updated)
@@ -135,15 +132,9 @@ class Package(models.Model):
     @cached_property
     def available_versions(self):
         # TODO: Caching
-        versions = self.versions.filter(is_active=True).values_list(
-            "pk", "version_number"
-        )
-        ordered = sorted(versions, key=lambda version: StrictVersion(version[1]))
-        pk_list = [version[0] for version in reversed(ordered)]
-        preserved = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(pk_list)])
         return (
-            self.versions.filter(pk__in=pk_list)
-            .order_by(preserved)
+            self.versions.active()
+            .order_by_version()
             .prefetch_related(
                 "dependencies",
                 "dependencies__package",
@@ -200,6 +191,10 @@ class Package(models.Model):
     def dependants_list(self):
         return get_package_dependants_list(self.pk)
 
+    @cached_property
+    def dependant_count(self) -> int:
+        return self.dependant_links.count()
+
     @cached_property
     def owner_url(self):
         return reverse("packages.list_by_owner", kwargs={"owner": self.owner.name})
@@ -234,7 +229,7 @@ class Package(models.Model):
         old_latest = self.latest
         if hasattr(self, "available_versions"):
             del self.available_versions  # Bust the version cache
-        self.latest = self.available_versions.first()
+        self.latest = self.versions.active().order_by_version().first()
         if old_latest != self.latest:
             self.save()
 
@@ -3,6 +3,8 @@ from datetime import timedelta
 from django.db import models
 from django.utils import timezone
 
+from thunderstore.core.utils import ChoiceEnum
+
 
 class PackageVersionDownloadEvent(models.Model):
     version = models.ForeignKey(
@@ -29,9 +31,102 @@ class PackageVersionDownloadEvent(models.Model):
         )
         return is_valid
 
+    @classmethod
+    def register_download(cls, version_pk: int, source_ip: str) -> bool:
+        download_event, created = cls.objects.get_or_create(
+            version_id=version_pk,
+            source_ip=source_ip,
+        )
+        if created:
+            return True
+        return download_event.count_downloads_and_return_validity()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
                 fields=("version", "source_ip"), name="unique_counter_per_ip"
             ),
         ]
+
+
+class PackageVersionDownloadSummary(models.Model):
+    """
+    Per-day totals of PackageVersionDownloadEvent rows which have been pruned,
+    attributed to the day of each event's last counted download
+    """
+
+    version = models.ForeignKey(
+        "repository.PackageVersion",
+        related_name="download_summaries",
+        on_delete=models.CASCADE,
+    )
+    date = models.DateField()
+    source_count = models.PositiveIntegerField(default=0)
+    total_downloads = models.PositiveIntegerField(default=0)
+    counted_downloads = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("version", "date"), name="unique_download_summary_per_day"
+            ),
+        ]
+
+
+class DownloadRollupPeriod(ChoiceEnum):
+    hour = "hour"
+    day = "day"
+
+
+class PackageVersionDownloadRollup(models.Model):
+    """
+    The amount of counted downloads of a package version within an hour or a
+    day, maintained by the download counter flush
+    """
+
+    version = models.ForeignKey(
+        "repository.PackageVersion",
+        related_name="download_rollups",
+        on_delete=models.CASCADE,
+    )
+    period = models.CharField(
+        choices=DownloadRollupPeriod.as_choices(),
+        max_length=16,
+    )
+    period_start = models.DateTimeField()
+    downloads = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("version", "period", "period_start"),
+                name="unique_version_download_rollup",
+            ),
+        ]
+
+
+class PackageDownloadRollup(models.Model):
+    """
+    The amount of counted downloads of all versions of a package within an
+    hour or a day, maintained by the download counter flush
+    """
+
+    package = models.ForeignKey(
+        "repository.Package",
+        related_name="download_rollups",
+        on_delete=models.CASCADE,
+    )
+    period = models.CharField(
+        choices=DownloadRollupPeriod.as_choices(),
+        max_length=16,
+    )
+    period_start = models.DateTimeField()
+    downloads = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("package", "period", "period_start"),
+                name="unique_package_download_rollup",
+            ),
+        ]
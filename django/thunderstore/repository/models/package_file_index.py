@@ -0,0 +1,46 @@
+from typing import List, Optional
+
+from django.db import models
+
+from thunderstore.repository.package_archive import ArchiveEntry
+
+
+class PackageFileIndex(models.Model):
+    """
+    The listing of the files in a package version's zip, captured from the
+    zip's central directory when the version is uploaded
+
+    Besides listing the files without downloading the zip, the index allows
+    extracting single files with ranged reads of the zip.
+    """
+
+    version = models.OneToOneField(
+        "repository.PackageVersion",
+        related_name="file_index",
+        on_delete=models.CASCADE,
+    )
+    # Each entry is stored as a list of the ArchiveEntry fields, in order,
+    # which takes far less space than storing them as objects
+    entries = models.JSONField()
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return str(self.version)
+
+    @classmethod
+    def create_for_version(
+        cls, version, entries: List[ArchiveEntry]
+    ) -> "PackageFileIndex":
+        return cls.objects.create(
+            version=version,
+            entries=[list(x) for x in entries],
+        )
+
+    def get_entries(self) -> List[ArchiveEntry]:
+        return [ArchiveEntry(*x) for x in self.entries]
+
+    def get_entry(self, path: str) -> Optional[ArchiveEntry]:
+        for entry in self.get_entries():
+            if entry.path == path:
+                return entry
+        return None
@@ -0,0 +1,101 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+from thunderstore.core.utils import ChoiceEnum
+
+
+def get_package_upload_filepath(instance, filename):
+    return f"staging/package-uploads/{instance.uuid}.zip"
+
+
+def get_package_upload_chunk_filepath(instance, filename):
+    return f"staging/package-uploads/{instance.upload.uuid}/{instance.index}"
+
+
+class PackageUploadStatus(ChoiceEnum):
+    receiving = "receiving"
+    pending = "pending"
+    processing = "processing"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class PackageUpload(models.Model):
+    """
+    A package upload accepted for processing in the background
+
+    The uploaded file is kept in staging storage until the upload has been
+    processed, after which only the outcome is retained. Chunked uploads
+    stage their chunks instead, and become pending once all of them have
+    been received.
+    """
+
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="package_uploads",
+        on_delete=models.CASCADE,
+    )
+    community = models.ForeignKey(
+        "community.Community",
+        related_name="package_uploads",
+        on_delete=models.CASCADE,
+    )
+    file = models.FileField(upload_to=get_package_upload_filepath, blank=True)
+    # The total size and the size of each chunk of chunked uploads
+    file_size = models.PositiveIntegerField(null=True, blank=True)
+    chunk_size = models.PositiveIntegerField(null=True, blank=True)
+    # The metadata submitted along with the file, as accepted by
+    # thunderstore.repository.package_upload.PackageUploadForm
+    form_data = models.JSONField()
+    status = models.CharField(
+        max_length=16,
+        default=PackageUploadStatus.pending,
+        choices=PackageUploadStatus.as_choices(),
+    )
+    errors = models.JSONField(null=True, blank=True)
+    version = models.ForeignKey(
+        "repository.PackageVersion",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return str(self.uuid)
+
+    @property
+    def is_chunked(self) -> bool:
+        return self.chunk_size is not None
+
+    @property
+    def chunk_count(self) -> int:
+        return (self.file_size + self.chunk_size - 1) // self.chunk_size
+
+    def get_chunk_size(self, index: int) -> int:
+        if index == self.chunk_count - 1:
+            return self.file_size - self.chunk_size * index
+        return self.chunk_size
+
+
+class PackageUploadChunk(models.Model):
+    upload = models.ForeignKey(
+        "repository.PackageUpload",
+        related_name="chunks",
+        on_delete=models.CASCADE,
+    )
+    index = models.PositiveIntegerField()
+    file = models.FileField(upload_to=get_package_upload_chunk_filepath)
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("upload", "index"), name="unique_chunk_per_upload"
+            ),
+        ]
@@ -1,19 +1,25 @@
+import logging
 import re
 import uuid
+from distutils.version import StrictVersion
+from typing import Tuple
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.files.storage import get_storage_class
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Manager, QuerySet, Sum, signals
 from django.urls import reverse
 from django.utils.functional import cached_property
-from ipware import get_client_ip
+from django.utils.safestring import mark_safe
 
 from thunderstore.repository.consts import PACKAGE_NAME_REGEX
-from thunderstore.repository.models import Package, PackageVersionDownloadEvent
+from thunderstore.repository.markdown import render_markdown
+from thunderstore.repository.models import BlobKind, ContentBlob, Package
 from thunderstore.webhooks.models import Webhook
 
+logger = logging.getLogger(__name__)
+
 
 def get_version_zip_filepath(instance, filename):
     return f"repository/packages/{instance}.zip"
@@ -23,14 +29,30 @@ def get_version_png_filepath(instance, filename):
     return f"repository/icons/{instance}.png"
 
 
-class PackageVersionManager(models.Manager):
+def parse_version_number(version_number: str) -> Tuple[int, int, int]:
+    major, minor, patch = StrictVersion(version_number).version
+    return major, minor, patch
+
+
+class PackageVersionQuerySet(models.QuerySet):
     def active(self) -> "QuerySet[PackageVersion]":  # TODO: Generic type
         return self.exclude(is_active=False)
 
+    def order_by_version(self) -> "QuerySet[PackageVersion]":
+        """Orders the versions from the newest to the oldest"""
+        return self.order_by("-major", "-minor", "-patch")
+
+
+class PackageVersionManager(models.Manager.from_queryset(PackageVersionQuerySet)):
+    pass
+
 
 class PackageVersion(models.Model):
     objects: "Manager[PackageVersion]" = PackageVersionManager()
 
+    # Fields which affect the result of Package.recache_latest
+    LATEST_VERSION_FIELDS = {"is_active", "version_number", "major", "minor", "patch"}
+
     package = models.ForeignKey(
         "repository.Package",
         related_name="versions",
@@ -48,10 +70,13 @@ class PackageVersion(models.Model):
         max_length=Package._meta.get_field("name").max_length,
     )
 
-    # TODO: Split to three fields for each number in the version for better querying performance
     version_number = models.CharField(
         max_length=16,
     )
+    # Derived from version_number on save in order to sort versions in SQL
+    major = models.PositiveIntegerField()
+    minor = models.PositiveIntegerField()
+    patch = models.PositiveIntegerField()
     website_url = models.CharField(
         max_length=1024,
     )
@@ -63,6 +88,9 @@ class PackageVersion(models.Model):
         blank=True,
     )
     readme = models.TextField()
+    # Rendered in the background after the version is created, see
+    # thunderstore.repository.tasks.render_readme_html
+    readme_html = models.TextField(null=True, blank=True)
 
     # <packagename>.zip
     file = models.FileField(
@@ -70,6 +98,9 @@ class PackageVersion(models.Model):
         storage=get_storage_class(settings.PACKAGE_FILE_STORAGE)(),
     )
     file_size = models.PositiveIntegerField()
+    # Hex encoded SHA-256 of the file, null for versions uploaded before
+    # hashes were stored until backfilled with the hash_package_files command
+    file_sha256 = models.CharField(max_length=64, null=True, blank=True)
 
     # <packagename>.png
     icon = models.ImageField(
@@ -85,6 +116,7 @@ class PackageVersion(models.Model):
 
     def save(self, *args, **kwargs):
         self.validate()
+        self.major, self.minor, self.patch = parse_version_number(self.version_number)
         return super().save(*args, **kwargs)
 
     class Meta:
@@ -93,6 +125,12 @@ class PackageVersion(models.Model):
                 fields=("package", "version_number"), name="unique_version_per_package"
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=("package", "major", "minor", "patch"),
+                name="packageversion_semver_idx",
+            ),
+        ]
 
     def get_absolute_url(self):
         return reverse(
@@ -145,6 +183,24 @@ class PackageVersion(models.Model):
             },
         )
 
+    @cached_property
+    def rendered_readme(self) -> str:
+        if self.readme_html is None:
+            # Only reachable before the render task or the render_readmes
+            # backfill has processed this version. The result is stored so
+            # that this happens at most once per version.
+            logger.warning("Rendering README of %s on request", self)
+            self.render_readme()
+        return mark_safe(self.readme_html)
+
+    def render_readme(self) -> None:
+        """
+        Renders the README and stores the result. Written with a plain UPDATE
+        as the rendered output never changes anything the caches depend on.
+        """
+        self.readme_html = render_markdown(self.readme)
+        PackageVersion.objects.filter(pk=self.pk).update(readme_html=self.readme_html)
+
     def get_install_url(self, request):
         return "ror2mm://v1/install/%(hostname)s/%(owner)s/%(name)s/%(version)s/" % {
             "hostname": request.site.domain,
@@ -154,14 +210,34 @@ class PackageVersion(models.Model):
         }
 
     @staticmethod
-    def post_save(sender, instance, created, **kwargs):
+    def post_save(sender, instance, created, update_fields, **kwargs):
         if created:
+            from thunderstore.repository.models import StorageUsage
+            from thunderstore.repository.tasks import (
+                generate_icon_thumbnails,
+                render_readme_html,
+            )
+
+            StorageUsage.add(instance.package.owner_id, instance.file_size)
             instance.package.handle_created_version(instance)
             instance.announce_release()
+            transaction.on_commit(lambda: render_readme_html.delay(instance.pk))
+            transaction.on_commit(lambda: generate_icon_thumbnails.delay(instance.pk))
+        elif update_fields is not None and not (
+            set(update_fields) & PackageVersion.LATEST_VERSION_FIELDS
+        ):
+            # Narrow updates to e.g. counters or rendered content can't change
+            # which version is the latest, so the package is left untouched
+            return
         instance.package.handle_updated_version(instance)
 
     @staticmethod
     def post_delete(sender, instance, **kwargs):
+        from thunderstore.repository.models import StorageUsage
+
+        StorageUsage.add(instance.package.owner_id, -instance.file_size)
+        ContentBlob.release(BlobKind.package_file, instance.file.name)
+        ContentBlob.release(BlobKind.icon, instance.icon.name)
         instance.package.handle_deleted_version(instance)
 
     @classmethod
@@ -175,26 +251,14 @@ class PackageVersion(models.Model):
             webhook.post_package_version_release(self)
 
     def maybe_increase_download_counter(self, request):
-        client_ip, is_routable = get_client_ip(request)
-        if client_ip is None:
-            return
+        from thunderstore.repository.downloads import count_download
 
-        download_event, created = PackageVersionDownloadEvent.objects.get_or_create(
-            version=self,
-            source_ip=client_ip,
-        )
-
-        if created:
-            valid = True
-        else:
-            valid = download_event.count_downloads_and_return_validity()
-
-        if valid:
-            self._increase_download_counter()
+        count_download(self.pk, request)
 
     def _increase_download_counter(self):
-        self.downloads += 1
-        self.save(update_fields=("downloads",))
+        from thunderstore.repository.downloads import buffer_download
+
+        buffer_download(self.pk)
 
     def __str__(self):
         return self.full_version_name
@@ -0,0 +1,102 @@
+from django.db import models, transaction
+from django.db.models import signals
+
+from thunderstore.repository.models import Package, PackageVersion
+
+
+class PackageDependant(models.Model):
+    """
+    A precomputed reverse dependency: an active version of the dependant
+    package depends on some version of the package.
+    """
+
+    package = models.ForeignKey(
+        "repository.Package",
+        related_name="dependant_links",
+        on_delete=models.CASCADE,
+    )
+    dependant = models.ForeignKey(
+        "repository.Package",
+        related_name="dependency_links",
+        on_delete=models.CASCADE,
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("package", "dependant"), name="unique_package_dependant"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.dependant} -> {self.package}"
+
+    @classmethod
+    @transaction.atomic
+    def update_for_dependant(cls, dependant_pk: int) -> None:
+        """
+        Brings the reverse dependencies of a package's dependencies up to date
+        """
+        current = set(
+            PackageVersion.dependencies.through.objects.filter(
+                from_packageversion__package=dependant_pk,
+                from_packageversion__package__is_active=True,
+                from_packageversion__is_active=True,
+            ).values_list("to_packageversion__package_id", flat=True)
+        )
+        existing = set(
+            cls.objects.filter(dependant=dependant_pk).values_list(
+                "package_id", flat=True
+            )
+        )
+        if existing - current:
+            cls.objects.filter(
+                dependant=dependant_pk,
+                package__in=existing - current,
+            ).delete()
+        if current - existing:
+            cls.objects.bulk_create(
+                [
+                    cls(package_id=package_pk, dependant_id=dependant_pk)
+                    for package_pk in current - existing
+                ],
+                ignore_conflicts=True,
+            )
+
+    @staticmethod
+    def package_post_save(sender, instance, created, update_fields, **kwargs):
+        if created or update_fields is None or "is_active" in update_fields:
+            PackageDependant.update_for_dependant(instance.pk)
+
+    @staticmethod
+    def version_post_save(sender, instance, created, update_fields, **kwargs):
+        if created or update_fields is None or "is_active" in update_fields:
+            PackageDependant.update_for_dependant(instance.package_id)
+
+    @staticmethod
+    def version_post_delete(sender, instance, **kwargs):
+        PackageDependant.update_for_dependant(instance.package_id)
+
+    @staticmethod
+    def dependencies_changed(sender, instance, action, reverse, pk_set, **kwargs):
+        if action not in ("post_add", "post_remove", "post_clear"):
+            return
+        if not reverse:
+            PackageDependant.update_for_dependant(instance.package_id)
+        elif pk_set:
+            # The dependency side of the relation was modified, so pk_set
+            # contains the dependant versions
+            dependants = PackageVersion.objects.filter(pk__in=pk_set).values_list(
+                "package_id", flat=True
+            )
+            for dependant_pk in set(dependants):
+                PackageDependant.update_for_dependant(dependant_pk)
+
+
+signals.post_save.connect(PackageDependant.package_post_save, sender=Package)
+signals.post_save.connect(PackageDependant.version_post_save, sender=PackageVersion)
+signals.post_delete.connect(PackageDependant.version_post_delete, sender=PackageVersion)
+signals.m2m_changed.connect(
+    PackageDependant.dependencies_changed,
+    sender=PackageVersion.dependencies.through,
+)
@@ -0,0 +1,133 @@
+from typing import Optional
+
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.utils import timezone
+
+from thunderstore.repository.models import PackageVersion
+
+RECONCILE_BATCH_SIZE = 1000
+
+
+class StorageUsage(models.Model):
+    """
+    Running totals of the package file sizes uploaded, globally and per
+    uploader identity
+
+    The totals are kept up to date as package versions are created and
+    deleted, and periodically reconciled against the package versions.
+    """
+
+    # The single global total has no identity
+    is_global = models.BooleanField(default=False)
+    identity = models.OneToOneField(
+        "repository.UploaderIdentity",
+        related_name="storage_usage",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+    )
+    used_bytes = models.BigIntegerField(default=0)
+    date_reconciled = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("is_global",),
+                condition=Q(is_global=True),
+                name="unique_global_storage_usage",
+            ),
+            models.CheckConstraint(
+                check=(
+                    Q(is_global=True, identity=None)
+                    | Q(is_global=False, identity__isnull=False)
+                ),
+                name="storage_usage_global_or_identity",
+            ),
+        ]
+
+    def __str__(self):
+        return "Global" if self.is_global else str(self.identity)
+
+    @staticmethod
+    def _get_scope(identity_pk: Optional[int]) -> dict:
+        if identity_pk is None:
+            return {"is_global": True}
+        return {"identity_id": identity_pk}
+
+    @classmethod
+    def get_used_bytes(cls, identity_pk: Optional[int] = None) -> int:
+        """
+        Returns the storage used by an uploader identity, or globally if no
+        identity is given
+        """
+        scope = cls._get_scope(identity_pk)
+        used_bytes = (
+            cls.objects.filter(**scope).values_list("used_bytes", flat=True).first()
+        )
+        if used_bytes is None:
+            used_bytes = cls.reconcile_scope(identity_pk)
+        return used_bytes
+
+    @classmethod
+    def add(cls, identity_pk: int, size: int) -> None:
+        """
+        Adds to the storage used by an uploader identity and globally, within
+        the transaction saving or deleting a package version
+
+        Totals which don't exist yet are computed from the package versions
+        instead, which already account for the version being saved or deleted.
+        """
+        for scope_pk in (None, identity_pk):
+            updated = cls.objects.filter(**cls._get_scope(scope_pk)).update(
+                used_bytes=F("used_bytes") + size
+            )
+            if not updated:
+                cls.reconcile_scope(scope_pk)
+
+    @classmethod
+    def reconcile_scope(cls, identity_pk: Optional[int]) -> int:
+        if identity_pk is None:
+            used_bytes = PackageVersion.get_total_used_disk_space()
+        else:
+            used_bytes = (
+                PackageVersion.objects.filter(package__owner=identity_pk).aggregate(
+                    total=Sum("file_size")
+                )["total"]
+                or 0
+            )
+        cls.objects.update_or_create(
+            **cls._get_scope(identity_pk),
+            defaults={"used_bytes": used_bytes, "date_reconciled": timezone.now()},
+        )
+        return used_bytes
+
+    @classmethod
+    @transaction.atomic
+    def reconcile(cls) -> None:
+        """
+        Recomputes every total from the package versions, correcting any
+        drift from e.g. versions modified outside of the ORM
+        """
+        now = timezone.now()
+        totals = dict(
+            PackageVersion.objects.order_by()
+            .values_list("package__owner")
+            .annotate(total=Sum("file_size"))
+        )
+        cls.reconcile_scope(None)
+        cls.objects.bulk_create(
+            [cls(identity_id=pk) for pk in totals.keys()],
+            ignore_conflicts=True,
+        )
+        identities = cls.objects.filter(is_global=False)
+        identities.update(used_bytes=0, date_reconciled=now)
+        totals = list(totals.items())
+        for i in range(0, len(totals), RECONCILE_BATCH_SIZE):
+            batch = totals[i : i + RECONCILE_BATCH_SIZE]
+            identities.filter(identity_id__in=[pk for pk, _ in batch]).update(
+                used_bytes=Case(
+                    *(When(identity_id=pk, then=Value(total)) for pk, total in batch),
+                    default=F("used_bytes"),
+                ),
+            )
@@ -0,0 +1,259 @@
+import hashlib
+import io
+import struct
+import zlib
+from typing import IO, Dict, List, NamedTuple, Optional
+from zipfile import ZIP_DEFLATED, ZIP_STORED, BadZipFile, ZipFile, ZipInfo
+
+from django.core.exceptions import ValidationError
+from django.core.files.storage import Storage
+
+CHUNK_SIZE = 64 * 1024
+MAX_EXTRACTED_FILE_SIZE = 1024 * 1024 * 16
+
+# The fixed size part of a zip local file header, of which only the signature
+# and the lengths of the variable size parts are of interest
+LOCAL_HEADER = struct.Struct("<4s22xHH")
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+
+class HashingReader:
+    """
+    Wraps a seekable file, hashing its bytes in file order as they are read
+
+    Reads may jump around the file, but only bytes directly following the
+    already hashed ones are fed to the hashes. Skipped bytes are read in
+    separately whenever a later read or finish() needs them, so the digests
+    always cover the whole file exactly once.
+    """
+
+    def __init__(self, file: IO[bytes]):
+        self.file = file
+        self.hashing = False
+        self.sha256 = hashlib.sha256()
+        self.sha1 = hashlib.sha1()
+        self._hashed = 0
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self.file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def read(self, n: int = -1) -> bytes:
+        position = self.file.tell()
+        if self.hashing and position > self._hashed:
+            self._hash_until(position)
+            self.file.seek(position)
+        data = self.file.read(n)
+        end = position + len(data)
+        if self.hashing and position <= self._hashed < end:
+            self._update(data[self._hashed - position :])
+        return data
+
+    def finish(self) -> None:
+        self._hash_until(None)
+
+    def _update(self, data: bytes) -> None:
+        self.sha256.update(data)
+        self.sha1.update(data)
+        self._hashed += len(data)
+
+    def _hash_until(self, offset: Optional[int]) -> None:
+        self.file.seek(self._hashed)
+        while offset is None or self._hashed < offset:
+            size = (
+                CHUNK_SIZE if offset is None else min(CHUNK_SIZE, offset - self._hashed)
+            )
+            chunk = self.file.read(size)
+            if not chunk:
+                break
+            self._update(chunk)
+
+
+class ArchiveEntry(NamedTuple):
+    """
+    A file in a zip, as listed in the zip's central directory
+    """
+
+    path: str
+    size: int
+    compressed_size: int
+    crc: int
+    header_offset: int
+    compress_type: int
+
+    @classmethod
+    def from_info(cls, info: ZipInfo) -> "ArchiveEntry":
+        return cls(
+            path=info.filename,
+            size=info.file_size,
+            compressed_size=info.compress_size,
+            crc=info.CRC,
+            header_offset=info.header_offset,
+            compress_type=info.compress_type,
+        )
+
+
+class PackageArchive:
+    def __init__(
+        self,
+        size: int,
+        uncompressed_size: int,
+        sha256: str,
+        sha1: str,
+        members: Dict[str, bytes],
+        entries: List[ArchiveEntry],
+    ):
+        self.size = size
+        self.uncompressed_size = uncompressed_size
+        self.sha256 = sha256
+        self.sha1 = sha1
+        self.members = members
+        self.entries = entries
+
+
+def get_archive_entries(unzip: ZipFile) -> List[ArchiveEntry]:
+    return [ArchiveEntry.from_info(x) for x in unzip.infolist() if not x.is_dir()]
+
+
+def read_package_archive(
+    file: IO[bytes],
+    extract: Dict[str, int],
+    max_uncompressed_size: int,
+    max_compression_ratio: int,
+) -> PackageArchive:
+    """
+    Validates a package zip and computes its hashes in a single read
+
+    Every member is decompressed once in the order it's stored in, which
+    verifies its CRC, and the raw bytes read along the way are hashed. Only
+    the members listed in `extract` are kept in memory.
+
+    :param file: The seekable zip file
+    :param extract: The names of the members to extract, mapped to the
+        maximum allowed size of each
+    :param max_uncompressed_size: The maximum total size of the members
+    :param max_compression_ratio: The maximum ratio of the total size of the
+        members to the size of the zip file
+    :return: The hashes, sizes, file listing and extracted members of the zip
+        file
+    :rtype: PackageArchive
+    """
+    reader = HashingReader(file)
+    try:
+        unzip = ZipFile(reader)
+    except (BadZipFile, NotImplementedError, ValueError):
+        raise ValidationError("Invalid zip file format")
+
+    with unzip:
+        infolist = sorted(unzip.infolist(), key=lambda x: x.header_offset)
+        size = reader.seek(0, io.SEEK_END)
+        uncompressed_size = sum(info.file_size for info in infolist)
+        if uncompressed_size > max_uncompressed_size:
+            raise ValidationError(
+                f"Too large package contents, current maximum is "
+                f"{max_uncompressed_size} bytes decompressed"
+            )
+        if uncompressed_size > size * max_compression_ratio:
+            raise ValidationError(
+                f"Package is compressed too heavily, current maximum "
+                f"compression ratio is {max_compression_ratio}"
+            )
+
+        members = {}
+        reader.hashing = True
+        for info in infolist:
+            if info.flag_bits & 0x1:
+                raise ValidationError("Encrypted zip files are not supported")
+            limit = extract.get(info.filename)
+            if limit is not None and info.file_size > limit:
+                raise ValidationError(
+                    f"{info.filename} filesize is too big, current maximum is {limit} bytes"
+                )
+            content = io.BytesIO() if limit is not None else None
+            try:
+                with unzip.open(info) as member:
+                    for chunk in iter(lambda: member.read(CHUNK_SIZE), b""):
+                        if content is not None:
+                            content.write(chunk)
+            except NotImplementedError:
+                raise ValidationError("Invalid zip file format")
+            except (BadZipFile, EOFError, zlib.error):
+                raise ValidationError("Corrupted zip file")
+            if content is not None:
+                members[info.filename] = content.getvalue()
+        reader.finish()
+
+    return PackageArchive(
+        size=size,
+        uncompressed_size=uncompressed_size,
+        sha256=reader.sha256.hexdigest(),
+        sha1=reader.sha1.hexdigest(),
+        members=members,
+        entries=get_archive_entries(unzip),
+    )
+
+
+def read_archive_entries(file: IO[bytes]) -> List[ArchiveEntry]:
+    """
+    Lists the files in a zip, reading only its central directory
+    """
+    try:
+        with ZipFile(file) as unzip:
+            return get_archive_entries(unzip)
+    except (BadZipFile, NotImplementedError, ValueError):
+        raise ValidationError("Invalid zip file format")
+
+
+def read_storage_range(storage: Storage, name: str, offset: int, length: int) -> bytes:
+    """
+    Reads a range of bytes from a file in storage
+
+    Storage backends may implement a read_range(name, offset, length) method
+    to fetch only the requested bytes, otherwise the file is opened and
+    seeked, which is only efficient for local storage.
+    """
+    if hasattr(storage, "read_range"):
+        return storage.read_range(name, offset, length)
+    with storage.open(name, "rb") as file:
+        file.seek(offset)
+        return file.read(length)
+
+
+def extract_archive_entry(storage: Storage, name: str, entry: ArchiveEntry) -> bytes:
+    """
+    Extracts a single file from a zip in storage, reading only the file's
+    local header and compressed data instead of the whole zip
+
+    :param storage: The storage the zip is stored in
+    :param name: The name of the zip in storage
+    :param entry: The file to extract, as listed in the zip's central directory
+    :return: The decompressed contents of the file
+    :rtype: bytes
+    """
+    if entry.compress_type not in (ZIP_STORED, ZIP_DEFLATED):
+        raise ValidationError("Unsupported compression method")
+    header = read_storage_range(storage, name, entry.header_offset, LOCAL_HEADER.size)
+    if len(header) != LOCAL_HEADER.size:
+        raise ValidationError("Corrupted zip file")
+    signature, name_length, extra_length = LOCAL_HEADER.unpack(header)
+    if signature != LOCAL_HEADER_SIGNATURE:
+        raise ValidationError("Corrupted zip file")
+    data = read_storage_range(
+        storage,
+        name,
+        entry.header_offset + LOCAL_HEADER.size + name_length + extra_length,
+        entry.compressed_size,
+    )
+    try:
+        if entry.compress_type == ZIP_DEFLATED:
+            data = zlib.decompressobj(-zlib.MAX_WBITS).decompress(data, entry.size)
+    except zlib.error:
+        raise ValidationError("Corrupted zip file")
+    if len(data) != entry.size or zlib.crc32(data) != entry.crc:
+        raise ValidationError("Corrupted zip file")
+    return data
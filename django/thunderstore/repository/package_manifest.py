@@ -4,7 +4,7 @@ from rest_framework.exceptions import ValidationError
 from thunderstore.repository.models import PackageVersion
 from thunderstore.repository.package_reference import PackageReference
 from thunderstore.repository.serializer_fields import (
-    DependencyField,
+    DependencyListField,
     PackageNameField,
     PackageVersionField,
 )
@@ -31,8 +31,7 @@ class ManifestV1Serializer(serializers.Serializer):
         max_length=PackageVersion._meta.get_field("description").max_length,
         allow_blank=True,
     )
-    dependencies = serializers.ListField(
-        child=DependencyField(),
+    dependencies = DependencyListField(
         max_length=100,
         allow_empty=True,
     )
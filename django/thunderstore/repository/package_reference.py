@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 from distutils.version import StrictVersion
-from typing import Dict, Optional, Union
+from typing import Dict, Iterable, Optional, Union
 
-from django.db.models import QuerySet
+from django.db.models import Q, QuerySet
 from django.utils.functional import cached_property
 
 from thunderstore.repository.models import Package, PackageVersion
@@ -248,6 +248,35 @@ class PackageReference:
         """
         return self.queryset.first()
 
+    @classmethod
+    def resolve_package_versions(cls, references: Iterable[PackageReference]) -> None:
+        """
+        Resolve the PackageVersion model instances of multiple versioned
+        references with a single query, caching the results on the references
+        as if they had been resolved through the instance property
+
+        :param references: The package references to resolve
+        :type references: Iterable of PackageReference
+        """
+        references = [x for x in references if x.version]
+        if not references:
+            return
+        query = Q()
+        for reference in references:
+            query |= Q(**reference.get_filter_kwargs())
+        versions = {
+            (x.package.owner.name, x.package.name, x.version_number): x
+            for x in PackageVersion.objects.filter(query).select_related(
+                "package", "package__owner"
+            )
+        }
+        for reference in references:
+            version = versions.get(
+                (reference.namespace, reference.name, reference.version_str)
+            )
+            reference.__dict__["instance"] = version
+            reference.__dict__["package_version"] = version
+
     @cached_property
     def exists(self) -> bool:
         """
@@ -1,22 +1,47 @@
+import hashlib
 import io
 import json
-from typing import Optional
-from zipfile import BadZipFile, ZipFile
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import IO, Iterator, List, Optional
 
 from django import forms
 from django.core.exceptions import ValidationError
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.db import transaction
+from django.utils import timezone
 from PIL import Image
 
 from thunderstore.community.models import Community, PackageCategory
 from thunderstore.core.types import UserType
-from thunderstore.repository.models import Package, PackageVersion, UploaderIdentity
+from thunderstore.core.utils import capture_exception
+from thunderstore.repository.models import (
+    BlobKind,
+    ContentBlob,
+    Package,
+    PackageFileIndex,
+    PackageUpload,
+    PackageUploadStatus,
+    PackageVersion,
+    StorageUsage,
+    UploaderIdentity,
+)
+from thunderstore.repository.package_archive import ArchiveEntry, read_package_archive
 from thunderstore.repository.package_manifest import ManifestV1Serializer
 
 MAX_PACKAGE_SIZE = 1024 * 1024 * 500
 MAX_ICON_SIZE = 1024 * 1024 * 6
 MAX_TOTAL_SIZE = 1024 * 1024 * 1024 * 500
+UPLOAD_CHUNK_SIZE = 1024 * 1024 * 8
+STALE_UPLOAD_AGE = timedelta(days=1)
+MAX_PACKAGE_UNCOMPRESSED_SIZE = 1024 * 1024 * 1024 * 2
+MAX_COMPRESSION_RATIO = 100
+MAX_MANIFEST_SIZE = 1024 * 1024
+MAX_README_LENGTH = 32768
+# UTF-8 encodes a single character in at most 4 bytes
+MAX_README_SIZE = MAX_README_LENGTH * 4
 
 
 def unpack_serializer_errors(field, errors, error_dict=None):
@@ -84,6 +109,9 @@ class PackageUploadForm(forms.ModelForm):
         self.icon: Optional[ContentFile] = None
         self.readme: Optional[str] = None
         self.file_size: Optional[int] = None
+        self.file_sha256: Optional[str] = None
+        self.icon_sha256: Optional[str] = None
+        self.file_entries: List[ArchiveEntry] = []
 
     def validate_manifest(self, manifest_str):
         try:
@@ -117,6 +145,7 @@ class PackageUploadForm(forms.ModelForm):
             self.icon = ContentFile(icon)
         except Exception:
             raise ValidationError("Unknown error while processing icon.png")
+        self.icon_sha256 = hashlib.sha256(icon).hexdigest()
 
         if self.icon.size > MAX_ICON_SIZE:
             raise ValidationError(
@@ -144,9 +173,8 @@ class PackageUploadForm(forms.ModelForm):
                     "Make sure the README.md is UTF-8 compatible",
                 ]
             )
-        max_length = 32768
-        if len(readme) > max_length:
-            raise ValidationError(f"README.md is too long, max: {max_length}")
+        if len(readme) > MAX_README_LENGTH:
+            raise ValidationError(f"README.md is too long, max: {MAX_README_LENGTH}")
         self.readme = readme
 
     def clean_file(self):
@@ -160,37 +188,41 @@ class PackageUploadForm(forms.ModelForm):
             )
         self.file_size = file.size
 
-        if file.size + PackageVersion.get_total_used_disk_space() > MAX_TOTAL_SIZE:
+        if file.size + StorageUsage.get_used_bytes() > MAX_TOTAL_SIZE:
             raise ValidationError(
                 f"The server has reached maximum total storage used, and can't receive new uploads"
             )
 
-        try:
-            with ZipFile(file) as unzip:
-
-                if unzip.testzip():
-                    raise ValidationError("Corrupted zip file")
-
-                try:
-                    manifest = unzip.read("manifest.json")
-                    self.validate_manifest(manifest)
-                except KeyError:
-                    raise ValidationError("Package is missing manifest.json")
-
-                try:
-                    icon = unzip.read("icon.png")
-                    self.validate_icon(icon)
-                except KeyError:
-                    raise ValidationError("Package is missing icon.png")
-
-                try:
-                    readme = unzip.read("README.md")
-                    self.validate_readme(readme)
-                except KeyError:
-                    raise ValidationError("Package is missing README.md")
-
-        except (BadZipFile, NotImplementedError):
-            raise ValidationError("Invalid zip file format")
+        archive = read_package_archive(
+            file,
+            extract={
+                "manifest.json": MAX_MANIFEST_SIZE,
+                "icon.png": MAX_ICON_SIZE,
+                "README.md": MAX_README_SIZE,
+            },
+            max_uncompressed_size=MAX_PACKAGE_UNCOMPRESSED_SIZE,
+            max_compression_ratio=MAX_COMPRESSION_RATIO,
+        )
+        self.file_sha256 = archive.sha256
+        self.file_entries = archive.entries
+        # Picked up by storage backends which need the SHA-1 of the upload,
+        # sparing them another read of the file
+        file.content_sha1 = archive.sha1
+
+        manifest = archive.members.get("manifest.json")
+        if manifest is None:
+            raise ValidationError("Package is missing manifest.json")
+        self.validate_manifest(manifest)
+
+        icon = archive.members.get("icon.png")
+        if icon is None:
+            raise ValidationError("Package is missing icon.png")
+        self.validate_icon(icon)
+
+        readme = archive.members.get("README.md")
+        if readme is None:
+            raise ValidationError("Package is missing README.md")
+        self.validate_readme(readme)
 
         return file
 
@@ -207,6 +239,7 @@ class PackageUploadForm(forms.ModelForm):
         self.instance.description = self.manifest["description"]
         self.instance.readme = self.readme
         self.instance.file_size = self.file_size
+        self.instance.file_sha256 = self.file_sha256
         identity = self.cleaned_data["team"]
         identity.ensure_can_upload_package(self.user)
         self.instance.package = Package.objects.get_or_create(
@@ -224,8 +257,104 @@ class PackageUploadForm(forms.ModelForm):
                 community=community,
             )
 
-        self.instance.icon.save("icon.png", self.icon)
+        self.instance.file = ContentBlob.store(
+            BlobKind.package_file, self.cleaned_data["file"], self.file_sha256
+        )
+        self.instance.icon = ContentBlob.store(
+            BlobKind.icon, self.icon, self.icon_sha256
+        )
         instance = super().save()
-        for reference in self.manifest["dependencies"]:
-            instance.dependencies.add(reference.instance)
+        PackageFileIndex.create_for_version(instance, self.file_entries)
+        # The references were resolved in bulk while validating the manifest
+        instance.dependencies.add(
+            *(reference.instance for reference in self.manifest["dependencies"])
+        )
         return instance
+
+
+@contextmanager
+def open_staged_file(upload: PackageUpload) -> Iterator[IO[bytes]]:
+    if not upload.is_chunked:
+        with upload.file.open("rb") as staged_file:
+            yield staged_file
+        return
+    # Chunks are reassembled on local disk, as reading the zip requires seeking
+    with tempfile.TemporaryFile() as staged_file:
+        for chunk in upload.chunks.order_by("index"):
+            with chunk.file.open("rb") as chunk_file:
+                shutil.copyfileobj(chunk_file, staged_file)
+        staged_file.seek(0)
+        yield staged_file
+
+
+def delete_staged_files(upload: PackageUpload) -> None:
+    upload.file.delete(save=False)
+    for chunk in upload.chunks.all():
+        chunk.file.delete(save=False)
+    upload.chunks.all().delete()
+
+
+def process_staged_upload(upload_pk: int) -> None:
+    """
+    Validates and publishes a package upload from staging storage
+
+    The outcome is stored on the upload, and the staged files are deleted
+    regardless of it. Uploads which aren't pending are left untouched.
+    """
+    with transaction.atomic():
+        upload = (
+            PackageUpload.objects.select_for_update(skip_locked=True)
+            .select_related("user", "community")
+            .filter(pk=upload_pk, status=PackageUploadStatus.pending)
+            .first()
+        )
+        if upload is None:
+            return
+        upload.status = PackageUploadStatus.processing
+        upload.save(update_fields=("status", "date_updated"))
+
+    try:
+        with open_staged_file(upload) as staged_file:
+            form = PackageUploadForm(
+                user=upload.user,
+                community=upload.community,
+                data=upload.form_data,
+                files={"file": File(staged_file, name=f"{upload.uuid}.zip")},
+            )
+            if form.is_valid():
+                upload.version = form.save()
+                upload.status = PackageUploadStatus.succeeded
+            else:
+                upload.errors = {
+                    field: list(errors) for field, errors in form.errors.items()
+                }
+                upload.status = PackageUploadStatus.failed
+    except Exception as e:
+        capture_exception(e)
+        upload.errors = {"__all__": ["Unknown error while processing the upload"]}
+        upload.status = PackageUploadStatus.failed
+
+    delete_staged_files(upload)
+    upload.save()
+
+
+def expire_stale_uploads() -> None:
+    """
+    Fails chunked uploads which haven't received chunks in a while, and
+    deletes their staged chunks
+    """
+    stale = PackageUpload.objects.filter(
+        status=PackageUploadStatus.receiving,
+        date_updated__lt=timezone.now() - STALE_UPLOAD_AGE,
+    )
+    for upload_pk in stale.values_list("pk", flat=True):
+        with transaction.atomic():
+            upload = (
+                stale.select_for_update(skip_locked=True).filter(pk=upload_pk).first()
+            )
+            if upload is None:
+                continue
+            delete_staged_files(upload)
+            upload.errors = {"__all__": ["The upload expired before it was completed"]}
+            upload.status = PackageUploadStatus.failed
+            upload.save(update_fields=("errors", "status", "date_updated"))
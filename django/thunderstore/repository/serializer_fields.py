@@ -4,6 +4,7 @@ from django.db.models import QuerySet
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.fields import empty
 
 from thunderstore.repository.consts import PACKAGE_NAME_REGEX, PACKAGE_VERSION_REGEX
 from thunderstore.repository.models import PackageVersion
@@ -39,10 +40,10 @@ class ModelChoiceField(serializers.Field):
 
 
 class DependencyField(serializers.Field):
-    def __init__(self, **kwargs):
+    def __init__(self, resolve: bool = True, **kwargs):
         super().__init__(**kwargs)
         self.validators.append(
-            PackageReferenceValidator(require_version=True, resolve=True)
+            PackageReferenceValidator(require_version=True, resolve=resolve)
         )
 
     def to_internal_value(self, data):
@@ -55,6 +56,33 @@ class DependencyField(serializers.Field):
         return str(value)
 
 
+class DependencyListField(serializers.ListField):
+    """
+    A list of dependencies resolved with a single query once every reference
+    has been parsed, rather than with a query per dependency
+    """
+
+    default_error_messages = {
+        "not_found": _("No matching package found for reference: {reference}"),
+    }
+
+    def __init__(self, **kwargs):
+        kwargs["child"] = DependencyField(resolve=False)
+        super().__init__(**kwargs)
+
+    def run_validation(self, data=empty):
+        references = super().run_validation(data)
+        PackageReference.resolve_package_versions(references)
+        errors = {
+            index: [self.error_messages["not_found"].format(reference=reference)]
+            for index, reference in enumerate(references)
+            if reference.instance is None
+        }
+        if errors:
+            raise ValidationError(errors)
+        return references
+
+
 class PackageNameField(serializers.CharField):
     def __init__(self, **kwargs):
         kwargs["max_length"] = PackageVersion._meta.get_field("name").max_length
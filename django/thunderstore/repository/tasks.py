@@ -1,8 +1,57 @@
 from celery import shared_task
 
 from thunderstore.repository.api.v1.tasks import update_api_v1_caches
+from thunderstore.repository.downloads import (
+    flush_buffered_downloads,
+    summarize_download_events,
+)
+from thunderstore.repository.models import PackageVersion, StorageUsage
+from thunderstore.repository.package_upload import (
+    expire_stale_uploads,
+    process_staged_upload,
+)
+from thunderstore.repository.thumbnails import generate_thumbnails
 
 
 @shared_task
 def update_api_caches():
     update_api_v1_caches()
+
+
+@shared_task
+def render_readme_html(version_pk: int):
+    version = PackageVersion.objects.filter(pk=version_pk).first()
+    if version:
+        version.render_readme()
+
+
+@shared_task
+def generate_icon_thumbnails(version_pk: int):
+    version = PackageVersion.objects.filter(pk=version_pk).first()
+    if version:
+        generate_thumbnails(version.icon)
+
+
+@shared_task
+def flush_download_counts():
+    flush_buffered_downloads()
+
+
+@shared_task
+def summarize_download_history():
+    summarize_download_events()
+
+
+@shared_task
+def process_package_upload(upload_pk: int):
+    process_staged_upload(upload_pk)
+
+
+@shared_task
+def expire_package_uploads():
+    expire_stale_uploads()
+
+
+@shared_task
+def reconcile_storage_usage():
+    StorageUsage.reconcile()
@@ -0,0 +1,10 @@
+from django import template
+
+from thunderstore.repository.thumbnails import get_thumbnail_variants
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_variants(source, alias):
+    return get_thumbnail_variants(source, alias)
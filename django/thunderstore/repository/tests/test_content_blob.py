@@ -0,0 +1,141 @@
+import hashlib
+import io
+import json
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+from thunderstore.repository.factories import (
+    PackageVersionFactory,
+    UploaderIdentityMemberFactory,
+)
+from thunderstore.repository.models import (
+    BlobKind,
+    ContentBlob,
+    UploaderIdentityMemberRole,
+)
+from thunderstore.repository.package_upload import PackageUploadForm
+from thunderstore.repository.tasks import generate_icon_thumbnails
+
+
+@pytest.fixture()
+def skip_thumbnails(mocker):
+    # The thumbnail task would otherwise run eagerly on commit, which is
+    # irrelevant to these tests
+    mocker.patch.object(generate_icon_thumbnails, "delay")
+
+
+def _create_package_zip(manifest_data) -> bytes:
+    icon_raw = io.BytesIO()
+    Image.new("RGB", (256, 256), "#FF0000").save(icon_raw, format="PNG")
+    zip_raw = io.BytesIO()
+    with ZipFile(zip_raw, "a", ZIP_DEFLATED, False) as zip_file:
+        zip_file.writestr("README.md", b"# Test readme")
+        zip_file.writestr("icon.png", icon_raw.getvalue())
+        zip_file.writestr("manifest.json", json.dumps(manifest_data))
+    return zip_raw.getvalue()
+
+
+def _upload(user, community, zip_data):
+    member = UploaderIdentityMemberFactory.create(
+        user=user, role=UploaderIdentityMemberRole.owner
+    )
+    form = PackageUploadForm(
+        user=user,
+        community=community,
+        files={"file": SimpleUploadedFile("mod.zip", zip_data)},
+        data={
+            "team": member.identity.name,
+            "communities": [community.identifier],
+        },
+    )
+    assert form.is_valid()
+    return form.save()
+
+
+@pytest.mark.django_db
+def test_content_blob_identical_uploads_are_stored_once(
+    user, community, manifest_v1_data, settings, tmp_path
+):
+    settings.MEDIA_ROOT = str(tmp_path)
+    zip_data = _create_package_zip(manifest_v1_data)
+    first = _upload(user, community, zip_data)
+    second = _upload(user, community, zip_data)
+
+    assert first.file.name == second.file.name
+    assert first.icon.name == second.icon.name
+    assert first.file.read() == zip_data
+    blob = ContentBlob.objects.get(kind=BlobKind.package_file)
+    assert blob.name == first.file.name
+    assert blob.sha256 == hashlib.sha256(zip_data).hexdigest()
+    assert blob.reference_count == 2
+    assert ContentBlob.objects.get(kind=BlobKind.icon).reference_count == 2
+
+    storage = first.file.storage
+    second.delete()
+    blob.refresh_from_db()
+    assert blob.reference_count == 1
+    assert storage.exists(blob.name)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_content_blob_unreferenced_blob_is_deleted(
+    user, community, manifest_v1_data, settings, tmp_path, skip_thumbnails
+):
+    settings.MEDIA_ROOT = str(tmp_path)
+    version = _upload(user, community, _create_package_zip(manifest_v1_data))
+    storage = version.file.storage
+    name = version.file.name
+    assert storage.exists(name)
+
+    version.delete()
+
+    assert ContentBlob.objects.filter(kind=BlobKind.package_file).exists() is False
+    assert not storage.exists(name)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("apply", (False, True))
+def test_deduplicate_package_files_command(
+    apply, settings, tmp_path, capsys, skip_thumbnails
+):
+    settings.MEDIA_ROOT = str(tmp_path)
+    sha256 = hashlib.sha256(b"package").hexdigest()
+    versions = []
+    for content in (b"package", b"package", b"package", b"unique"):
+        version = PackageVersionFactory.create(
+            file_size=len(content),
+            file_sha256=hashlib.sha256(content).hexdigest(),
+        )
+        version.file.save(f"{version}.zip", ContentFile(content))
+        versions.append(version)
+    original_names = [x.file.name for x in versions]
+
+    if apply:
+        call_command("deduplicate_package_files", "--apply")
+    else:
+        call_command("deduplicate_package_files")
+    assert "Found 2 redundant copies of package files, taking up 14 bytes" in (
+        capsys.readouterr().out
+    )
+
+    for version in versions:
+        version.refresh_from_db()
+    storage = versions[0].file.storage
+    if apply:
+        blob = ContentBlob.objects.get(kind=BlobKind.package_file, sha256=sha256)
+        assert blob.reference_count == 3
+        assert {x.file.name for x in versions[:3]} == {blob.name}
+        assert storage.open(blob.name).read() == b"package"
+        assert not any(storage.exists(x) for x in original_names[:3])
+        call_command("deduplicate_package_files")
+        assert "Found 0 redundant copies" in capsys.readouterr().out
+    else:
+        assert ContentBlob.objects.exists() is False
+        assert [x.file.name for x in versions] == original_names
+    assert versions[3].file.name == original_names[3]
+    assert storage.exists(original_names[3])
@@ -0,0 +1,97 @@
+import pytest
+from django.core.cache import cache
+
+from thunderstore.repository.dependencies import (
+    find_dependency_cycles,
+    get_dependency_closure,
+    load_dependency_edges,
+    resolve_dependencies,
+)
+from thunderstore.repository.factories import PackageFactory, PackageVersionFactory
+
+
+def create_version(name, version_number="1.0.0", dependencies=()):
+    package = PackageFactory.create(name=name)
+    version = PackageVersionFactory.create(
+        package=package,
+        name=name,
+        version_number=version_number,
+    )
+    version.dependencies.set(dependencies)
+    return version
+
+
+def add_version(package, version_number, dependencies=()):
+    version = PackageVersionFactory.create(
+        package=package,
+        name=package.name,
+        version_number=version_number,
+    )
+    version.dependencies.set(dependencies)
+    return version
+
+
+@pytest.fixture()
+def clean_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_find_dependency_cycles():
+    edges = {1: [2, 3], 2: [3], 3: [4], 4: [2, 5], 5: []}
+    assert find_dependency_cycles(edges, 1) == [[2, 3, 4, 2]]
+    assert find_dependency_cycles({1: [1]}, 1) == [[1, 1]]
+    assert find_dependency_cycles({1: [2], 2: []}, 1) == []
+
+
+@pytest.mark.django_db
+def test_load_dependency_edges(django_assert_num_queries):
+    c = create_version("C")
+    b = create_version("B", dependencies=[c])
+    a = create_version("A", dependencies=[b, c])
+    # One query per level of the graph
+    with django_assert_num_queries(2):
+        edges = load_dependency_edges([a.pk])
+    assert {k: sorted(v) for k, v in edges.items()} == {
+        a.pk: sorted([b.pk, c.pk]),
+        b.pk: [c.pk],
+        c.pk: [],
+    }
+
+
+@pytest.mark.django_db
+def test_dependency_closure_is_cached(clean_cache, django_assert_num_queries):
+    c = create_version("C")
+    a = create_version("A", dependencies=[c])
+    closure = get_dependency_closure(a.pk)
+    assert sorted(x[0] for x in closure.versions) == sorted([a.pk, c.pk])
+    with django_assert_num_queries(0):
+        cached = get_dependency_closure(a.pk)
+    assert cached.versions == closure.versions
+
+
+@pytest.mark.django_db
+def test_resolve_dependencies_selects_newest_versions(clean_cache):
+    lib = create_version("Lib", version_number="1.0.0")
+    lib_new = add_version(lib.package, "1.10.0")
+    util = create_version("Util", dependencies=[lib])
+    modpack = create_version("Modpack", dependencies=[util])
+    other = create_version("Other", dependencies=[lib_new])
+
+    resolution = resolve_dependencies([modpack, other])
+    assert sorted(x.pk for x in resolution.versions) == sorted(
+        [modpack.pk, util.pk, lib_new.pk, other.pk]
+    )
+    assert resolution.cycles == []
+
+
+@pytest.mark.django_db
+def test_resolve_dependencies_detects_cycles(clean_cache):
+    b = create_version("B")
+    a = create_version("A", dependencies=[b])
+    b.dependencies.add(a)
+
+    resolution = resolve_dependencies([a])
+    assert sorted(x.pk for x in resolution.versions) == sorted([a.pk, b.pk])
+    assert resolution.cycles == [[a.pk, b.pk, a.pk]]
@@ -0,0 +1,303 @@
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import pytest
+from django.utils import timezone
+from redis.exceptions import ConnectionError, LockError, ResponseError
+
+from thunderstore.repository.downloads import (
+    DOWNLOAD_BUFFER_KEY,
+    DOWNLOAD_FLUSH_KEY,
+    apply_download_counts,
+    buffer_download,
+    flush_buffered_downloads,
+    get_download_hour,
+    is_download_countable,
+    summarize_download_events,
+)
+from thunderstore.repository.factories import (
+    PackageVersionDownloadEventFactory,
+    PackageVersionFactory,
+)
+from thunderstore.repository.models import (
+    DownloadRollupPeriod,
+    PackageDownloadRollup,
+    PackageVersion,
+    PackageVersionDownloadEvent,
+    PackageVersionDownloadRollup,
+    PackageVersionDownloadSummary,
+)
+
+
+class DownloadBuffer:
+    """
+    The subset of the Redis client the download buffer relies on
+    """
+
+    def __init__(self):
+        self.hashes = {}
+        self.locked = False
+
+    def hincrby(self, key, field, amount):
+        values = self.hashes.setdefault(key, {})
+        field = str(field).encode()
+        values[field] = str(int(values.get(field, 0)) + amount).encode()
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def exists(self, key):
+        return int(key in self.hashes)
+
+    def rename(self, src, dst):
+        if src not in self.hashes:
+            raise ResponseError("no such key")
+        self.hashes[dst] = self.hashes.pop(src)
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+    @contextmanager
+    def lock(self, name, timeout, blocking_timeout):
+        if self.locked:
+            raise LockError("Unable to acquire lock")
+        self.locked = True
+        try:
+            yield
+        finally:
+            self.locked = False
+
+
+@pytest.fixture()
+def download_buffer(mocker):
+    buffer = DownloadBuffer()
+    mocker.patch(
+        "thunderstore.repository.downloads.get_download_buffer",
+        return_value=buffer,
+    )
+    return buffer
+
+
+def get_downloads(version: PackageVersion) -> int:
+    return PackageVersion.objects.get(pk=version.pk).downloads
+
+
+@pytest.mark.django_db
+def test_apply_download_counts(django_assert_num_queries):
+    first = PackageVersionFactory.create(downloads=3)
+    second = PackageVersionFactory.create(downloads=0)
+    untouched = PackageVersionFactory.create(downloads=7)
+
+    hour = datetime(2021, 3, 1, 12, tzinfo=timezone.utc)
+
+    # Savepoints, the counter update, the version to package lookup and an
+    # insert and update for both rollup tables
+    with django_assert_num_queries(8):
+        apply_download_counts(
+            {
+                (first.pk, hour): 1,
+                (first.pk, hour + timedelta(hours=1)): 1,
+                (second.pk, hour): 5,
+            }
+        )
+
+    assert get_downloads(first) == 5
+    assert get_downloads(second) == 5
+    assert get_downloads(untouched) == 7
+
+
+@pytest.mark.django_db
+def test_buffer_download_without_redis(package_version):
+    assert package_version.downloads == 0
+    buffer_download(package_version.pk)
+    assert get_downloads(package_version) == 1
+    assert flush_buffered_downloads() == 0
+
+
+@pytest.mark.django_db
+def test_buffer_download_redis_error(package_version, download_buffer, mocker):
+    mocker.patch.object(download_buffer, "hincrby", side_effect=ConnectionError())
+    buffer_download(package_version.pk)
+    assert get_downloads(package_version) == 1
+
+
+@pytest.mark.django_db
+def test_flush_buffered_downloads(package_version, download_buffer):
+    other = PackageVersionFactory.create()
+    for _ in range(3):
+        buffer_download(package_version.pk)
+    buffer_download(other.pk)
+    assert get_downloads(package_version) == 0
+
+    assert flush_buffered_downloads() == 4
+    assert get_downloads(package_version) == 3
+    assert get_downloads(other) == 1
+    assert download_buffer.hashes == {}
+
+    assert flush_buffered_downloads() == 0
+    assert get_downloads(package_version) == 3
+
+
+@pytest.mark.django_db
+def test_flush_buffered_downloads_retries_failed_flush(
+    package_version, download_buffer
+):
+    hour = int(get_download_hour().timestamp())
+    download_buffer.hincrby(DOWNLOAD_FLUSH_KEY, f"{package_version.pk}:{hour}", 2)
+    buffer_download(package_version.pk)
+
+    assert flush_buffered_downloads() == 2
+    assert get_downloads(package_version) == 2
+    assert DOWNLOAD_BUFFER_KEY in download_buffer.hashes
+
+    assert flush_buffered_downloads() == 1
+    assert get_downloads(package_version) == 3
+
+
+@pytest.mark.django_db
+def test_flush_buffered_downloads_locked(package_version, download_buffer):
+    buffer_download(package_version.pk)
+    download_buffer.locked = True
+    assert flush_buffered_downloads() == 0
+    assert get_downloads(package_version) == 0
+
+
+@pytest.mark.django_db
+def test_increase_download_counter_is_buffered(package_version, download_buffer):
+    package_version._increase_download_counter()
+    assert get_downloads(package_version) == 0
+    assert flush_buffered_downloads() == 1
+    assert get_downloads(package_version) == 1
+
+
+@pytest.mark.django_db
+def test_is_download_countable(package_version):
+    other = PackageVersionFactory.create()
+    assert is_download_countable(package_version.pk, "127.0.0.1") is True
+    assert is_download_countable(package_version.pk, "127.0.0.1") is False
+    assert is_download_countable(package_version.pk, "::1") is True
+    assert is_download_countable(other.pk, "127.0.0.1") is True
+    assert PackageVersionDownloadEvent.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_is_download_countable_cache_unavailable(package_version, mocker):
+    # django-redis returns None instead of raising when the server is down
+    mocker.patch("thunderstore.repository.downloads.cache.add", return_value=None)
+    assert is_download_countable(package_version.pk, "127.0.0.1") is True
+    assert is_download_countable(package_version.pk, "127.0.0.1") is False
+    event = PackageVersionDownloadEvent.objects.get()
+    assert event.total_downloads == 2
+    assert event.counted_downloads == 1
+
+
+def create_download_event(version, source_ip, last_download, downloads):
+    event = PackageVersionDownloadEventFactory.create(
+        version=version,
+        source_ip=source_ip,
+        total_downloads=downloads,
+        counted_downloads=downloads,
+    )
+    # Overrides auto_now_add
+    PackageVersionDownloadEvent.objects.filter(pk=event.pk).update(
+        last_download=last_download,
+    )
+    return event
+
+
+@pytest.mark.django_db
+def test_summarize_download_events(package_version, mocker):
+    mocker.patch("thunderstore.repository.downloads.DOWNLOAD_EVENT_BATCH_SIZE", 2)
+    day = datetime(2021, 3, 1, 12, tzinfo=timezone.utc)
+    create_download_event(package_version, "127.0.0.1", day, 3)
+    create_download_event(package_version, "127.0.0.2", day, 1)
+    create_download_event(package_version, "127.0.0.3", day + timedelta(days=1), 2)
+    recent = create_download_event(package_version, "127.0.0.4", timezone.now(), 5)
+    PackageVersionDownloadSummary.objects.create(
+        version=package_version,
+        date=date(2021, 3, 1),
+        source_count=1,
+        total_downloads=10,
+        counted_downloads=4,
+    )
+
+    assert summarize_download_events() == 3
+    assert list(PackageVersionDownloadEvent.objects.all()) == [recent]
+    summaries = PackageVersionDownloadSummary.objects.order_by("date").values_list(
+        "date", "source_count", "total_downloads", "counted_downloads"
+    )
+    assert list(summaries) == [
+        (date(2021, 3, 1), 3, 14, 8),
+        (date(2021, 3, 2), 1, 2, 2),
+    ]
+    assert summarize_download_events() == 0
+
+
+def get_rollups(model, **filters):
+    return list(
+        model.objects.filter(**filters)
+        .order_by("period", "period_start")
+        .values_list("period", "period_start", "downloads")
+    )
+
+
+@pytest.mark.django_db
+def test_apply_download_counts_rollups(package_version):
+    package = package_version.package
+    other = PackageVersionFactory.create(package=package, version_number="2.0.0")
+    hour = datetime(2021, 3, 1, 23, tzinfo=timezone.utc)
+    next_hour = hour + timedelta(hours=1)
+    day = hour.replace(hour=0)
+    next_day = next_hour.replace(hour=0)
+
+    apply_download_counts({(package_version.pk, hour): 2, (other.pk, hour): 3})
+    apply_download_counts({(package_version.pk, hour): 1, (other.pk, next_hour): 4})
+
+    assert get_rollups(PackageVersionDownloadRollup, version=package_version) == [
+        (DownloadRollupPeriod.day, day, 3),
+        (DownloadRollupPeriod.hour, hour, 3),
+    ]
+    assert get_rollups(PackageVersionDownloadRollup, version=other) == [
+        (DownloadRollupPeriod.day, day, 3),
+        (DownloadRollupPeriod.day, next_day, 4),
+        (DownloadRollupPeriod.hour, hour, 3),
+        (DownloadRollupPeriod.hour, next_hour, 4),
+    ]
+    assert get_rollups(PackageDownloadRollup, package=package) == [
+        (DownloadRollupPeriod.day, day, 6),
+        (DownloadRollupPeriod.day, next_day, 4),
+        (DownloadRollupPeriod.hour, hour, 6),
+        (DownloadRollupPeriod.hour, next_hour, 4),
+    ]
+
+
+@pytest.mark.django_db
+def test_flush_buffered_downloads_rollups(package_version, download_buffer, mocker):
+    hour = datetime(2021, 3, 1, 12, tzinfo=timezone.utc)
+    mocker.patch(
+        "thunderstore.repository.downloads.timezone.now",
+        return_value=hour + timedelta(minutes=59),
+    )
+    buffer_download(package_version.pk)
+    mocker.patch(
+        "thunderstore.repository.downloads.timezone.now",
+        return_value=hour + timedelta(minutes=61),
+    )
+    buffer_download(package_version.pk)
+    buffer_download(package_version.pk)
+
+    assert flush_buffered_downloads() == 3
+    assert get_rollups(
+        PackageVersionDownloadRollup,
+        version=package_version,
+        period=DownloadRollupPeriod.hour,
+    ) == [
+        (DownloadRollupPeriod.hour, hour, 1),
+        (DownloadRollupPeriod.hour, hour + timedelta(hours=1), 2),
+    ]
+
+
+def test_get_download_hour():
+    assert get_download_hour(
+        datetime(2021, 3, 1, 12, 34, 56, 789, tzinfo=timezone.utc)
+    ) == datetime(2021, 3, 1, 12, tzinfo=timezone.utc)
@@ -0,0 +1,153 @@
+import hashlib
+import io
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from thunderstore.repository.package_archive import (
+    extract_archive_entry,
+    read_archive_entries,
+    read_package_archive,
+)
+
+
+class NonSeekableWriter(io.RawIOBase):
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+
+def make_zip(files, compression=ZIP_DEFLATED, seekable=True) -> bytes:
+    output = io.BytesIO() if seekable else NonSeekableWriter()
+    with ZipFile(output, "w", compression) as zip_file:
+        for name, data in files:
+            zip_file.writestr(name, data)
+    return output.getvalue() if seekable else output.buffer.getvalue()
+
+
+def read(data: bytes, extract=None, max_size=1024 * 1024, max_ratio=100):
+    return read_package_archive(
+        io.BytesIO(data),
+        extract=extract or {},
+        max_uncompressed_size=max_size,
+        max_compression_ratio=max_ratio,
+    )
+
+
+@pytest.mark.parametrize("seekable", (True, False))
+def test_read_package_archive(seekable):
+    # Zips written to unseekable streams have data descriptors between members
+    data = make_zip(
+        [("a.txt", b"a" * 100), ("b.txt", b"b" * 200), ("c.txt", b"c")],
+        seekable=seekable,
+    )
+    archive = read(data, extract={"a.txt": 100, "c.txt": 100})
+    assert archive.size == len(data)
+    assert archive.uncompressed_size == 301
+    assert archive.sha256 == hashlib.sha256(data).hexdigest()
+    assert archive.sha1 == hashlib.sha1(data).hexdigest()
+    assert archive.members == {"a.txt": b"a" * 100, "c.txt": b"c"}
+    assert [(x.path, x.size) for x in archive.entries] == [
+        ("a.txt", 100),
+        ("b.txt", 200),
+        ("c.txt", 1),
+    ]
+    assert archive.entries == read_archive_entries(io.BytesIO(data))
+
+
+def test_read_package_archive_hashes_prefixed_zip():
+    data = b"prefix" + make_zip([("a.txt", b"a")])
+    archive = read(data)
+    assert archive.sha256 == hashlib.sha256(data).hexdigest()
+
+
+def test_read_package_archive_invalid_zip():
+    with pytest.raises(ValidationError, match="Invalid zip file format"):
+        read(b"not a zip")
+
+
+def test_read_package_archive_bad_crc():
+    data = bytearray(make_zip([("a.txt", b"hello world")], compression=ZIP_STORED))
+    offset = data.index(b"hello world")
+    data[offset] = ord("j")
+    with pytest.raises(ValidationError, match="Corrupted zip file"):
+        read(bytes(data))
+
+
+def test_read_package_archive_uncompressed_size_limit():
+    data = make_zip([("a.txt", b"a" * 100), ("b.txt", b"b" * 100)], ZIP_STORED)
+    read(data, max_size=200)
+    with pytest.raises(ValidationError, match="Too large package contents"):
+        read(data, max_size=199)
+
+
+def test_read_package_archive_compression_ratio_limit():
+    data = make_zip([("a.txt", b"a" * 1024 * 1024)])
+    with pytest.raises(ValidationError, match="compressed too heavily"):
+        read(data, max_size=1024 * 1024 * 2, max_ratio=10)
+
+
+def test_read_package_archive_extract_size_limit():
+    data = make_zip([("icon.png", b"a" * 101)])
+    with pytest.raises(
+        ValidationError,
+        match="icon.png filesize is too big, current maximum is 100 bytes",
+    ):
+        read(data, extract={"icon.png": 100})
+
+
+def test_read_archive_entries_skips_directories():
+    data = make_zip([("plugins/", b""), ("plugins/a.dll", b"a")])
+    entries = read_archive_entries(io.BytesIO(data))
+    assert [x.path for x in entries] == ["plugins/a.dll"]
+
+
+class RangeReadingStorage(FileSystemStorage):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ranges = []
+
+    def read_range(self, name, offset, length):
+        self.ranges.append((offset, length))
+        with self.open(name) as file:
+            file.seek(offset)
+            return file.read(length)
+
+
+@pytest.mark.parametrize("seekable", (True, False))
+@pytest.mark.parametrize("compression", (ZIP_STORED, ZIP_DEFLATED))
+def test_extract_archive_entry(tmp_path, compression, seekable):
+    files = [("a.txt", b"a" * 1000), ("dir/b.txt", b"hello world" * 10)]
+    data = make_zip(files, compression=compression, seekable=seekable)
+    storage = RangeReadingStorage(location=str(tmp_path))
+    name = storage.save("package.zip", ContentFile(data))
+    entries = read_archive_entries(io.BytesIO(data))
+
+    for entry, (_, content) in zip(entries, files):
+        storage.ranges.clear()
+        assert extract_archive_entry(storage, name, entry) == content
+        # Only the local header and the compressed data are read
+        assert len(storage.ranges) == 2
+        assert storage.ranges[1][1] == entry.compressed_size
+
+
+def test_extract_archive_entry_corrupted(tmp_path):
+    data = make_zip([("a.txt", b"hello world")], compression=ZIP_STORED)
+    entry = read_archive_entries(io.BytesIO(data))[0]
+    storage = FileSystemStorage(location=str(tmp_path))
+    corrupted = data.replace(b"hello world", b"jello world")
+    name = storage.save("package.zip", ContentFile(corrupted))
+    with pytest.raises(ValidationError, match="Corrupted zip file"):
+        extract_archive_entry(storage, name, entry)
+    with pytest.raises(ValidationError, match="Corrupted zip file"):
+        extract_archive_entry(storage, name, entry._replace(header_offset=1))
+    with pytest.raises(ValidationError, match="Unsupported compression method"):
+        extract_archive_entry(storage, name, entry._replace(compress_type=12))
@@ -31,3 +31,17 @@ def test_package_cache_is_invalidated_on_listing_delete(active_package_listing,
     )
     active_package_listing.delete()
     mocked_invalidate_cache.assert_called_with(CacheBustCondition.any_package_updated)
+
+
+@pytest.mark.django_db
+def test_package_version_narrow_update_skips_recache(package_version, mocker):
+    mocked_recache_latest = mocker.patch.object(
+        package_version.package, "recache_latest"
+    )
+    package_version.downloads = 10
+    package_version.save(update_fields=("downloads",))
+    mocked_recache_latest.assert_not_called()
+
+    package_version.is_active = False
+    package_version.save(update_fields=("is_active",))
+    mocked_recache_latest.assert_called_once()
@@ -3,6 +3,7 @@ from typing import Optional, Union
 
 import pytest
 
+from thunderstore.repository.factories import PackageVersionFactory
 from thunderstore.repository.models import Package, PackageVersion
 
 from ..package_reference import PackageReference
@@ -325,6 +326,20 @@ def test_resolve(package_version: PackageVersion):
     assert invalid_reference.instance is None
 
 
+@pytest.mark.django_db
+def test_resolve_package_versions(django_assert_num_queries):
+    versions = PackageVersionFactory.create_batch(3)
+    references = [PackageReference.parse(str(x.reference)) for x in versions]
+    invalid = PackageReference("user", "name", "1.0.0")
+    versionless = versions[0].reference.without_version
+    with django_assert_num_queries(1):
+        PackageReference.resolve_package_versions(references + [invalid, versionless])
+        assert [x.instance for x in references] == versions
+        assert [x.package_version for x in references] == versions
+        assert invalid.instance is None
+    assert versionless.instance == versions[0].package
+
+
 @pytest.mark.django_db
 def test_queryset(package_version: PackageVersion):
     assert package_version.reference.queryset.exists()
@@ -1,14 +1,27 @@
+import hashlib
 import io
 import json
+from datetime import timedelta
 from zipfile import ZIP_DEFLATED, ZipFile
 
 import pytest
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
 from PIL import Image
 
 from thunderstore.community.models import PackageCategory, PackageListing
-from thunderstore.repository.models import UploaderIdentity
-from thunderstore.repository.package_upload import PackageUploadForm
+from thunderstore.repository.models import (
+    PackageUpload,
+    PackageUploadChunk,
+    PackageUploadStatus,
+    UploaderIdentity,
+)
+from thunderstore.repository.package_upload import (
+    STALE_UPLOAD_AGE,
+    PackageUploadForm,
+    expire_stale_uploads,
+)
 
 
 @pytest.mark.django_db
@@ -47,6 +60,7 @@ def test_package_upload(user, manifest_v1_data, community):
     version = form.save()
     assert version.name == manifest_v1_data["name"]
     assert version.package.owner == identity
+    assert version.file_sha256 == hashlib.sha256(zip_raw.getvalue()).hexdigest()
 
 
 @pytest.mark.django_db
@@ -97,3 +111,37 @@ def test_package_upload_with_extra_data(user, community, manifest_v1_data):
     assert listing.categories.count() == 1
     assert listing.categories.first() == category
     assert listing.has_nsfw_content is True
+
+
+@pytest.mark.django_db
+def test_expire_stale_uploads(user, community, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    uploads = [
+        PackageUpload.objects.create(
+            user=user,
+            community=community,
+            form_data={},
+            status=PackageUploadStatus.receiving,
+            file_size=10,
+            chunk_size=5,
+        )
+        for _ in range(2)
+    ]
+    for upload in uploads:
+        chunk = PackageUploadChunk(upload=upload, index=0)
+        chunk.file.save("0", ContentFile(b"chunk"))
+    stale, fresh = uploads
+    PackageUpload.objects.filter(pk=stale.pk).update(
+        date_updated=timezone.now() - STALE_UPLOAD_AGE - timedelta(minutes=1)
+    )
+    stale_chunk = stale.chunks.get()
+
+    expire_stale_uploads()
+
+    stale.refresh_from_db()
+    fresh.refresh_from_db()
+    assert stale.status == PackageUploadStatus.failed
+    assert stale.chunks.exists() is False
+    assert not stale_chunk.file.storage.exists(stale_chunk.file.name)
+    assert fresh.status == PackageUploadStatus.receiving
+    assert fresh.chunks.count() == 1
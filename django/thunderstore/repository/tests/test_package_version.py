@@ -1,7 +1,16 @@
+import hashlib
+import io
+from zipfile import ZipFile
+
 import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
 
-from thunderstore.repository.factories import PackageVersionFactory
-from thunderstore.repository.models import PackageVersion
+from thunderstore.repository.factories import PackageFactory, PackageVersionFactory
+from thunderstore.repository.markdown import render_markdown
+from thunderstore.repository.models import PackageFileIndex, PackageVersion
+from thunderstore.repository.models.package_version import parse_version_number
+from thunderstore.repository.tasks import generate_icon_thumbnails, render_readme_html
 
 
 @pytest.mark.django_db
@@ -21,3 +30,156 @@ def test_package_version_manager_active():
     active_versions = PackageVersion.objects.active()
     assert p1 in active_versions
     assert p2 not in active_versions
+
+
+@pytest.mark.django_db
+def test_package_version_readme_rendered_on_create(
+    django_capture_on_commit_callbacks, mocker
+):
+    mocked_delay = mocker.patch.object(render_readme_html, "delay")
+    mocker.patch.object(generate_icon_thumbnails, "delay")
+    with django_capture_on_commit_callbacks(execute=True):
+        version = PackageVersionFactory.create(readme="# Hello")
+    mocked_delay.assert_called_once_with(version.pk)
+
+
+@pytest.mark.django_db
+def test_package_version_render_readme_html_task():
+    version = PackageVersionFactory.create(readme="# Hello <b>world</b>")
+    assert version.readme_html is None
+    render_readme_html(version.pk)
+    version.refresh_from_db()
+    assert version.readme_html == render_markdown(version.readme)
+    assert "<h1" in version.readme_html
+    assert "<b>" not in version.readme_html
+
+
+@pytest.mark.django_db
+def test_package_version_rendered_readme():
+    version = PackageVersionFactory.create(readme="# Hello")
+    PackageVersion.objects.filter(pk=version.pk).update(readme_html="<p>Stored</p>")
+    version.refresh_from_db()
+    assert version.rendered_readme == "<p>Stored</p>"
+
+
+@pytest.mark.django_db
+def test_package_version_rendered_readme_fallback_is_stored():
+    version = PackageVersionFactory.create(readme="# Hello")
+    assert version.readme_html is None
+    assert version.rendered_readme == render_markdown("# Hello")
+    version.refresh_from_db()
+    assert version.readme_html == render_markdown("# Hello")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("render_all", (False, True))
+def test_render_readmes_command(render_all):
+    rendered = PackageVersionFactory.create(readme="# First")
+    PackageVersion.objects.filter(pk=rendered.pk).update(readme_html="<p>Old</p>")
+    missing = PackageVersionFactory.create(readme="# Second")
+
+    if render_all:
+        call_command("render_readmes", "--all")
+    else:
+        call_command("render_readmes")
+
+    rendered.refresh_from_db()
+    missing.refresh_from_db()
+    assert missing.readme_html == render_markdown("# Second")
+    if render_all:
+        assert rendered.readme_html == render_markdown("# First")
+    else:
+        assert rendered.readme_html == "<p>Old</p>"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("hash_all", (False, True))
+def test_hash_package_files_command(hash_all, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    hashed = PackageVersionFactory.create()
+    hashed.file.save("hashed.zip", ContentFile(b"first"))
+    PackageVersion.objects.filter(pk=hashed.pk).update(file_sha256="0" * 64)
+    missing = PackageVersionFactory.create()
+    missing.file.save("missing.zip", ContentFile(b"second"))
+
+    if hash_all:
+        call_command("hash_package_files", "--all")
+    else:
+        call_command("hash_package_files")
+
+    hashed.refresh_from_db()
+    missing.refresh_from_db()
+    assert missing.file_sha256 == hashlib.sha256(b"second").hexdigest()
+    if hash_all:
+        assert hashed.file_sha256 == hashlib.sha256(b"first").hexdigest()
+    else:
+        assert hashed.file_sha256 == "0" * 64
+
+
+@pytest.mark.django_db
+def test_index_package_files_command(settings, tmp_path, capsys):
+    settings.MEDIA_ROOT = str(tmp_path)
+    zip_raw = io.BytesIO()
+    with ZipFile(zip_raw, "w") as zip_file:
+        zip_file.writestr("README.md", b"# Readme")
+    version = PackageVersionFactory.create()
+    version.file.save("package.zip", ContentFile(zip_raw.getvalue()))
+    invalid = PackageVersionFactory.create()
+    invalid.file.save("invalid.zip", ContentFile(b"not a zip"))
+
+    call_command("index_package_files")
+
+    assert f"Unable to read the zip of version {invalid.pk}" in capsys.readouterr().out
+    assert [x.path for x in version.file_index.get_entries()] == ["README.md"]
+    assert PackageFileIndex.objects.filter(version=invalid).exists() is False
+
+
+@pytest.mark.parametrize(
+    ("version_number", "expected"),
+    (
+        ("1.0.0", (1, 0, 0)),
+        ("0.10.2", (0, 10, 2)),
+        ("12.345.6789", (12, 345, 6789)),
+    ),
+)
+def test_parse_version_number(version_number, expected):
+    assert parse_version_number(version_number) == expected
+
+
+@pytest.mark.django_db
+def test_package_version_version_columns_set_on_save():
+    version = PackageVersionFactory.create(version_number="2.11.3")
+    version.refresh_from_db()
+    assert (version.major, version.minor, version.patch) == (2, 11, 3)
+
+
+@pytest.mark.django_db
+def test_package_versions_ordered_by_version(django_assert_num_queries):
+    package = PackageFactory.create()
+    for version_number in ("1.9.0", "1.10.0", "0.1.20", "1.9.10", "1.0.0"):
+        PackageVersionFactory.create(
+            package=package,
+            name=package.name,
+            version_number=version_number,
+        )
+    PackageVersionFactory.create(
+        package=package,
+        name=package.name,
+        version_number="2.0.0",
+        is_active=False,
+    )
+    package.refresh_from_db()
+
+    assert package.latest.version_number == "1.10.0"
+    with django_assert_num_queries(1):
+        versions = list(package.versions.active().order_by_version())
+    assert [x.version_number for x in versions] == [
+        "1.10.0",
+        "1.9.10",
+        "1.9.0",
+        "1.0.0",
+        "0.1.20",
+    ]
+    assert [x.version_number for x in package.available_versions] == [
+        x.version_number for x in versions
+    ]
@@ -0,0 +1,94 @@
+import pytest
+
+from thunderstore.repository.factories import PackageFactory, PackageVersionFactory
+from thunderstore.repository.models import PackageDependant, get_package_dependants
+
+
+def create_version(package, version_number="1.0.0", dependencies=()):
+    version = PackageVersionFactory.create(
+        package=package,
+        name=package.name,
+        version_number=version_number,
+    )
+    version.dependencies.set(dependencies)
+    return version
+
+
+@pytest.mark.django_db
+def test_package_dependants_maintained_on_upload():
+    library = PackageFactory.create(name="Library")
+    library_version = create_version(library)
+    mod = PackageFactory.create(name="Mod")
+    assert list(get_package_dependants(library.pk)) == []
+
+    create_version(mod, dependencies=[library_version])
+    assert list(get_package_dependants(library.pk)) == [mod]
+    assert library.dependant_count == 1
+    assert list(get_package_dependants(mod.pk)) == []
+
+
+@pytest.mark.django_db
+def test_package_dependants_maintained_on_version_deactivation():
+    library = PackageFactory.create(name="Library")
+    library_version = create_version(library)
+    mod = PackageFactory.create(name="Mod")
+    first = create_version(mod, "1.0.0", dependencies=[library_version])
+    second = create_version(mod, "2.0.0", dependencies=[library_version])
+
+    first.is_active = False
+    first.save(update_fields=("is_active",))
+    assert list(get_package_dependants(library.pk)) == [mod]
+
+    second.is_active = False
+    second.save()
+    assert list(get_package_dependants(library.pk)) == []
+
+    second.is_active = True
+    second.save()
+    assert list(get_package_dependants(library.pk)) == [mod]
+
+
+@pytest.mark.django_db
+def test_package_dependants_maintained_on_package_deactivation():
+    library = PackageFactory.create(name="Library")
+    library_version = create_version(library)
+    mod = PackageFactory.create(name="Mod")
+    create_version(mod, dependencies=[library_version])
+
+    mod.is_active = False
+    mod.save(update_fields=("is_active",))
+    assert PackageDependant.objects.count() == 0
+
+    mod.is_active = True
+    mod.save(update_fields=("is_active",))
+    assert list(get_package_dependants(library.pk)) == [mod]
+
+
+@pytest.mark.django_db
+def test_package_dependants_maintained_on_dependency_changes():
+    library = PackageFactory.create(name="Library")
+    library_version = create_version(library)
+    mod = PackageFactory.create(name="Mod")
+    mod_version = create_version(mod, dependencies=[library_version])
+
+    library_version.dependants.remove(mod_version)
+    assert list(get_package_dependants(library.pk)) == []
+    library_version.dependants.add(mod_version)
+    assert list(get_package_dependants(library.pk)) == [mod]
+    mod_version.delete()
+    assert list(get_package_dependants(library.pk)) == []
+
+
+@pytest.mark.django_db
+def test_package_dependants_query(django_assert_num_queries):
+    library = PackageFactory.create(name="Library")
+    library_version = create_version(library)
+    for i in range(3):
+        create_version(
+            PackageFactory.create(name=f"Mod_{i}"), dependencies=[library_version]
+        )
+
+    with django_assert_num_queries(1):
+        assert len(list(get_package_dependants(library.pk))) == 3
+    with django_assert_num_queries(1):
+        assert library.dependant_count == 3
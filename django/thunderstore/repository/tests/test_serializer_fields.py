@@ -11,6 +11,7 @@ from thunderstore.repository.models import PackageVersion
 from thunderstore.repository.package_reference import PackageReference
 from thunderstore.repository.serializer_fields import (
     DependencyField,
+    DependencyListField,
     ModelChoiceField,
     PackageNameField,
     PackageVersionField,
@@ -72,6 +73,34 @@ def test_fields_list_dependency_field():
     assert result == references
 
 
+@pytest.mark.django_db
+def test_fields_dependency_list_resolves_in_bulk(django_assert_num_queries):
+    field = DependencyListField(max_length=100)
+    versions = PackageVersionFactory.create_batch(5)
+    reference_strings = [str(x.reference) for x in versions]
+    with django_assert_num_queries(1):
+        result = field.run_validation(reference_strings)
+        assert [x.instance for x in result] == versions
+    assert [x.package_version for x in result] == versions
+
+
+@pytest.mark.django_db
+def test_fields_dependency_list_unresolved(package_version):
+    field = DependencyListField()
+    with pytest.raises(ValidationError) as exception:
+        field.run_validation(
+            [
+                "invalid-package-1.0.0",
+                str(package_version.reference),
+                str(package_version.reference.with_version("9.9.9")),
+            ]
+        )
+    assert set(exception.value.detail.keys()) == {0, 2}
+    assert "No matching package found for reference: invalid-package-1.0.0" in str(
+        exception.value.detail[0]
+    )
+
+
 @pytest.mark.parametrize(
     "value, exception_message",
     [
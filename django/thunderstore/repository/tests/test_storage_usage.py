@@ -0,0 +1,55 @@
+import pytest
+
+from thunderstore.repository.factories import (
+    PackageFactory,
+    PackageVersionFactory,
+    UploaderIdentityFactory,
+)
+from thunderstore.repository.models import PackageVersion, StorageUsage
+
+
+@pytest.mark.django_db
+def test_storage_usage_tracks_versions():
+    first, second = PackageFactory.create_batch(2)
+    assert StorageUsage.get_used_bytes() == 0
+    assert StorageUsage.get_used_bytes(first.owner.pk) == 0
+
+    version = PackageVersionFactory.create(package=first, file_size=100)
+    PackageVersionFactory.create(package=first, file_size=20, version_number="2.0.0")
+    PackageVersionFactory.create(package=second, file_size=3)
+    assert StorageUsage.get_used_bytes() == 123
+    assert StorageUsage.get_used_bytes(first.owner.pk) == 120
+    assert StorageUsage.get_used_bytes(second.owner.pk) == 3
+
+    version.delete()
+    assert StorageUsage.get_used_bytes() == 23
+    assert StorageUsage.get_used_bytes(first.owner.pk) == 20
+    assert StorageUsage.get_used_bytes(second.owner.pk) == 3
+
+
+@pytest.mark.django_db
+def test_storage_usage_initialized_from_existing_versions():
+    version = PackageVersionFactory.create(file_size=100)
+    StorageUsage.objects.all().delete()
+    PackageVersionFactory.create(
+        package=version.package, file_size=5, version_number="2.0.0"
+    )
+    assert StorageUsage.get_used_bytes() == 105
+    assert StorageUsage.get_used_bytes(version.package.owner.pk) == 105
+
+
+@pytest.mark.django_db
+def test_storage_usage_reconcile():
+    first = PackageVersionFactory.create(file_size=100)
+    second = PackageVersionFactory.create(file_size=10)
+    unused = UploaderIdentityFactory.create()
+    StorageUsage.objects.create(identity=unused, used_bytes=50)
+    PackageVersion.objects.filter(pk=first.pk).update(file_size=200)
+
+    StorageUsage.reconcile()
+
+    assert StorageUsage.get_used_bytes() == 210
+    assert StorageUsage.get_used_bytes(first.package.owner.pk) == 200
+    assert StorageUsage.get_used_bytes(second.package.owner.pk) == 10
+    assert StorageUsage.get_used_bytes(unused.pk) == 0
+    assert StorageUsage.objects.filter(date_reconciled=None).exists() is False
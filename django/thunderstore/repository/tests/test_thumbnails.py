@@ -0,0 +1,77 @@
+import pytest
+from django.core.management import call_command
+from easy_thumbnails.alias import aliases
+from easy_thumbnails.files import get_thumbnailer
+from easy_thumbnails.models import Thumbnail
+from PIL import Image
+
+from thunderstore.repository.factories import PackageVersionFactory
+from thunderstore.repository.tasks import generate_icon_thumbnails
+from thunderstore.repository.thumbnails import (
+    THUMBNAIL_VARIANT_FORMATS,
+    generate_thumbnails,
+    get_thumbnail_variants,
+    get_variant_formats,
+    get_variant_name,
+)
+
+# easy-thumbnails 2.7 resizes with Image.ANTIALIAS, which Pillow 10 removed
+requires_thumbnail_processing = pytest.mark.skipif(
+    not hasattr(Image, "ANTIALIAS"),
+    reason="The installed Pillow is too new for easy-thumbnails",
+)
+
+
+@requires_thumbnail_processing
+@pytest.mark.django_db
+def test_generate_thumbnails(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    version = PackageVersionFactory.create()
+    assert get_thumbnail_variants(version.icon, "icon_128") == []
+
+    generate_thumbnails(version.icon)
+
+    thumbnailer = get_thumbnailer(version.icon)
+    storage = thumbnailer.thumbnail_storage
+    formats = get_variant_formats()
+    assert "webp" in formats
+    for alias, options in aliases.all().items():
+        name = thumbnailer.get_thumbnail_name(options)
+        assert storage.exists(name)
+        for extension in formats:
+            assert storage.exists(get_variant_name(name, extension))
+        variants = get_thumbnail_variants(version.icon, alias)
+        assert [x.content_type for x in variants] == [
+            THUMBNAIL_VARIANT_FORMATS[x] for x in formats
+        ]
+    assert Thumbnail.objects.count() == len(aliases.all()) * (len(formats) + 1)
+
+    # Nothing is regenerated for an icon which already has its thumbnails
+    generate_thumbnails(version.icon)
+    assert Thumbnail.objects.count() == len(aliases.all()) * (len(formats) + 1)
+
+
+@pytest.mark.django_db
+def test_thumbnail_variants_unknown_alias():
+    version = PackageVersionFactory.create()
+    assert get_thumbnail_variants(version.icon, "unknown") == []
+
+
+@pytest.mark.django_db
+def test_generate_icon_thumbnails_on_create(django_capture_on_commit_callbacks, mocker):
+    mocker.patch("thunderstore.repository.tasks.render_readme_html.delay")
+    mocked_delay = mocker.patch.object(generate_icon_thumbnails, "delay")
+    with django_capture_on_commit_callbacks(execute=True):
+        version = PackageVersionFactory.create()
+    mocked_delay.assert_called_once_with(version.pk)
+
+
+@requires_thumbnail_processing
+@pytest.mark.django_db
+def test_generate_icon_thumbnails_command(settings, tmp_path, capsys):
+    settings.MEDIA_ROOT = str(tmp_path)
+    versions = PackageVersionFactory.create_batch(2)
+    call_command("generate_icon_thumbnails")
+    assert "Processed 2 icons" in capsys.readouterr().out
+    for version in versions:
+        assert get_thumbnail_variants(version.icon, "icon_256_crop")
@@ -1,7 +1,14 @@
+import hashlib
+
 import pytest
+from django.core.files.base import ContentFile
 
 from thunderstore.repository.package_reference import PackageReference
-from thunderstore.repository.utils import does_contain_package, has_duplicate_packages
+from thunderstore.repository.utils import (
+    does_contain_package,
+    get_file_sha256,
+    has_duplicate_packages,
+)
 
 
 @pytest.mark.parametrize(
@@ -91,3 +98,11 @@ def test_utils_does_contain_package(collection, reference, expected):
 def test_utils_has_duplicate_packages(collection, expected):
     collection = [PackageReference.parse(x) for x in collection]
     assert has_duplicate_packages(collection) == expected
+
+
+def test_get_file_sha256_rewinds_file():
+    data = b"a" * (ContentFile.DEFAULT_CHUNK_SIZE + 1)
+    file = ContentFile(data)
+    file.read(10)
+    assert get_file_sha256(file) == hashlib.sha256(data).hexdigest()
+    assert file.read() == data
@@ -1,15 +1,22 @@
+import base64
+import json
+
 import pytest
+from django.core.cache import cache
+from django.core.files.base import ContentFile
 from django.urls import reverse
 
 from thunderstore.core.factories import UserFactory
 
 from ...community.models import PackageListing, PackageListingReviewStatus
+from ..downloads import get_download_target
 from ..factories import PackageFactory, PackageVersionFactory, UploaderIdentityFactory
+from ..views.repository import MODS_PER_PAGE
 
 
 @pytest.mark.django_db
 @pytest.mark.parametrize(
-    "ordering", ("last-updated", "newest", "most-downloaded", "top-rated")
+    "ordering", ("last-updated", "newest", "trending", "most-downloaded", "top-rated")
 )
 def test_package_list_view(client, community_site, ordering):
     for i in range(4):
@@ -101,3 +108,267 @@ def test_package_create_view_logged_in(client, community_site):
     )
     assert response.status_code == 200
     assert b"Upload package" in response.content
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("ordering", ("last-updated", "newest", "trending"))
+def test_package_list_view_keyset_pagination(client, community_site, ordering):
+    cache.clear()
+    package_count = MODS_PER_PAGE * 2 + 5
+    for i in range(package_count):
+        package = PackageFactory.create(
+            owner=UploaderIdentityFactory.create(name=f"KeysetTester_{i}"),
+            name=f"keyset_{i}",
+        )
+        PackageVersionFactory.create(name=package.name, package=package)
+        PackageListing.objects.create(
+            package=package,
+            community=community_site.community,
+            # Includes ties, which are broken by the primary key
+            trending_score=(i % 7) / 3,
+        )
+
+    base_url = reverse("packages.list")
+    url = f"{base_url}?ordering={ordering}"
+    seen = []
+    pages = []
+    while url:
+        response = client.get(url, HTTP_HOST=community_site.site.domain)
+        assert response.status_code == 200
+        page = response.context["page_obj"]
+        assert response.context["paginator"].count == package_count
+        pages.append(page)
+        seen += [x.package.name for x in page.object_list]
+        url = f"{base_url}?ordering={ordering}&cursor={page.next_cursor}"
+        if not page.has_next():
+            url = None
+
+    assert [x.number for x in pages] == [1, None, None]
+    assert len(seen) == package_count
+    assert set(seen) == {f"keyset_{i}" for i in range(package_count)}
+
+    previous_url = f"{base_url}?ordering={ordering}&cursor={pages[-1].previous_cursor}"
+    response = client.get(previous_url, HTTP_HOST=community_site.site.domain)
+    assert response.status_code == 200
+    assert response.context["page_obj"].cursor == pages[-1].previous_cursor
+    assert list(response.context["page_obj"].object_list) == list(pages[1].object_list)
+
+
+@pytest.mark.django_db
+def test_package_list_view_invalid_cursor(client, community_site):
+    base_url = reverse("packages.list")
+    response = client.get(
+        f"{base_url}?cursor=invalid", HTTP_HOST=community_site.site.domain
+    )
+    assert "errors/404.html" in (x.name for x in response.templates)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "position",
+    (
+        ["x", "y", "z", "w"],
+        [True, False, "not-a-date", 1],
+        [True, False, ["x"], 1],
+        [True, False, "2021-01-01T00:00:00+00:00", "abc"],
+        [True, {"x": 1}, "2021-01-01T00:00:00+00:00", 1],
+        [True, False, "2021-01-01T00:00:00+00:00", None],
+        [True, False, "2021-01-01T00:00:00+00:00"],
+    ),
+)
+def test_package_list_view_tampered_cursor(client, community_site, position):
+    cursor = base64.urlsafe_b64encode(
+        json.dumps({"p": position, "r": False}).encode("utf-8")
+    ).decode("ascii")
+    base_url = reverse("packages.list")
+    response = client.get(
+        f"{base_url}?cursor={cursor}", HTTP_HOST=community_site.site.domain
+    )
+    assert "errors/404.html" in (x.name for x in response.templates)
+
+
+@pytest.mark.django_db
+def test_package_list_view_page_number_fallback(client, community_site):
+    cache.clear()
+    for i in range(MODS_PER_PAGE + 1):
+        package = PackageFactory.create(
+            owner=UploaderIdentityFactory.create(name=f"OffsetTester_{i}"),
+            name=f"offset_{i}",
+        )
+        PackageVersionFactory.create(name=package.name, package=package)
+        PackageListing.objects.create(
+            package=package,
+            community=community_site.community,
+        )
+
+    base_url = reverse("packages.list")
+    response = client.get(f"{base_url}?page=2", HTTP_HOST=community_site.site.domain)
+    assert response.status_code == 200
+    assert response.context["page_obj"].number == 2
+    assert len(response.context["page_obj"].object_list) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("version_count", (1, 10))
+def test_package_download_view_query_count(
+    client, community_site, django_assert_num_queries, version_count
+):
+    package = PackageFactory.create(is_active=True, is_deprecated=False)
+    for i in range(version_count):
+        version = PackageVersionFactory.create(
+            package=package,
+            name=package.name,
+            version_number=f"1.0.{i}",
+            file=f"repository/packages/{package.name}-1.0.{i}.zip",
+        )
+    PackageListing.objects.create(package=package, community=community_site.community)
+    url = version.download_url
+
+    # Warm up the query cache for the site lookups and the download target
+    client.get(url, HTTP_HOST=community_site.site.domain, REMOTE_ADDR="127.0.0.1")
+
+    # Only counting the download touches the database. Without Redis, the
+    # counter and rollups are written directly.
+    for source_ip in ("127.0.0.2", "127.0.0.3", "127.0.0.4"):
+        with django_assert_num_queries(8):
+            response = client.get(
+                url, HTTP_HOST=community_site.site.domain, REMOTE_ADDR=source_ip
+            )
+        assert response.status_code == 302
+
+    # Repeated downloads are deduplicated without touching the database
+    with django_assert_num_queries(0):
+        response = client.get(
+            url, HTTP_HOST=community_site.site.domain, REMOTE_ADDR="127.0.0.2"
+        )
+    assert response.status_code == 302
+
+    version.refresh_from_db()
+    assert version.downloads == 4
+
+
+@pytest.mark.django_db
+def test_package_download_view_target(
+    client, community_site, active_version, django_assert_num_queries
+):
+    cache.clear()
+    package = active_version.package
+    active_version.file = f"repository/packages/{active_version}.zip"
+    active_version.save()
+    PackageListing.objects.create(package=package, community=community_site.community)
+
+    with django_assert_num_queries(1):
+        assert get_download_target(
+            community_site.community.pk,
+            package.owner.name,
+            package.name,
+            active_version.version_number,
+        ) == (
+            active_version.pk,
+            active_version.file.name,
+            active_version.file.url,
+            f"{active_version}.zip",
+        )
+    with django_assert_num_queries(0):
+        get_download_target(
+            community_site.community.pk,
+            package.owner.name,
+            package.name,
+            active_version.version_number,
+        )
+
+    response = client.get(
+        active_version.download_url,
+        HTTP_HOST=community_site.site.domain,
+    )
+    assert response.status_code == 302
+    assert response.url == f"http://testsite.test{active_version.file.url}"
+
+
+@pytest.mark.django_db
+def test_package_download_view_not_listed(client, community_site, active_version):
+    cache.clear()
+    active_version.file = f"repository/packages/{active_version}.zip"
+    active_version.save()
+    response = client.get(
+        active_version.download_url,
+        HTTP_HOST=community_site.site.domain,
+    )
+    assert "errors/404.html" in (x.name for x in response.templates)
+
+
+@pytest.fixture()
+def served_version(community_site, active_version, settings, tmp_path):
+    cache.clear()
+    settings.MEDIA_ROOT = str(tmp_path)
+    active_version.file.save(f"{active_version}.zip", ContentFile(b"package"))
+    PackageListing.objects.create(
+        package=active_version.package,
+        community=community_site.community,
+    )
+    return active_version
+
+
+@pytest.mark.django_db
+def test_package_download_view_x_accel_redirect(
+    client, community_site, served_version, settings
+):
+    settings.PACKAGE_DOWNLOAD_SERVE_MODE = "x-accel-redirect"
+    response = client.get(
+        served_version.download_url,
+        HTTP_HOST=community_site.site.domain,
+    )
+    assert response.status_code == 200
+    assert response.content == b""
+    assert (
+        response["X-Accel-Redirect"] == f"/protected-media/{served_version.file.name}"
+    )
+    assert response["Content-Type"] == "application/zip"
+    assert response["Content-Disposition"] == (
+        f'attachment; filename="{served_version}.zip"'
+    )
+    assert response["Accept-Ranges"] == "bytes"
+
+    response = client.get(
+        served_version.download_url,
+        HTTP_HOST=community_site.site.domain,
+        HTTP_IF_NONE_MATCH=response["ETag"],
+    )
+    assert response.status_code == 304
+    assert "X-Accel-Redirect" not in response
+
+
+@pytest.mark.django_db
+def test_package_download_view_x_sendfile(
+    client, community_site, served_version, settings
+):
+    settings.PACKAGE_DOWNLOAD_SERVE_MODE = "x-sendfile"
+    response = client.get(
+        served_version.download_url,
+        HTTP_HOST=community_site.site.domain,
+    )
+    assert response.status_code == 200
+    assert response["X-Sendfile"] == served_version.file.path
+
+
+@pytest.mark.django_db
+def test_package_download_view_resume_not_counted(
+    client, community_site, served_version, settings
+):
+    settings.PACKAGE_DOWNLOAD_SERVE_MODE = "x-accel-redirect"
+    for source_ip, byte_range in (
+        ("127.0.0.1", "bytes=0-"),
+        ("127.0.0.2", "bytes=100-"),
+        ("127.0.0.3", None),
+    ):
+        headers = {"HTTP_RANGE": byte_range} if byte_range else {}
+        response = client.get(
+            served_version.download_url,
+            HTTP_HOST=community_site.site.domain,
+            REMOTE_ADDR=source_ip,
+            **headers,
+        )
+        assert response.status_code == 200
+
+    served_version.refresh_from_db()
+    assert served_version.downloads == 2
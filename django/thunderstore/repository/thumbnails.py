@@ -0,0 +1,99 @@
+import os
+from io import BytesIO
+from typing import List, NamedTuple
+
+from django.core.files.base import ContentFile
+from django.db.models.fields.files import FieldFile
+from easy_thumbnails.alias import aliases
+from easy_thumbnails.files import Thumbnailer, get_thumbnailer
+from easy_thumbnails.models import Thumbnail
+from PIL import Image
+
+# Additional formats each thumbnail is stored in, mapped to their content
+# type, in the order browsers should prefer them
+THUMBNAIL_VARIANT_FORMATS = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+}
+THUMBNAIL_VARIANT_QUALITY = 80
+
+
+class ThumbnailVariant(NamedTuple):
+    url: str
+    content_type: str
+
+
+def get_variant_formats() -> List[str]:
+    """
+    Returns the thumbnail variant formats the installed Pillow build is able
+    to encode
+    """
+    Image.init()
+    return [x for x in THUMBNAIL_VARIANT_FORMATS.keys() if x.upper() in Image.SAVE]
+
+
+def get_variant_name(thumbnail_name: str, extension: str) -> str:
+    return f"{os.path.splitext(thumbnail_name)[0]}.{extension}"
+
+
+def generate_thumbnails(source: FieldFile) -> None:
+    """
+    Generates every configured thumbnail alias of an image, along with the
+    variants of each, unless they already exist
+
+    Both are saved to the thumbnail storage and registered in the thumbnail
+    cache tables, so that rendering them later requires no image processing.
+    """
+    thumbnailer = get_thumbnailer(source)
+    formats = get_variant_formats()
+    for options in aliases.all().values():
+        thumbnail = thumbnailer.get_thumbnail(options)
+        for extension in formats:
+            name = get_variant_name(thumbnail.name, extension)
+            if thumbnailer.thumbnail_exists(name):
+                continue
+            save_thumbnail_variant(thumbnailer, thumbnail.image, name, extension)
+
+
+def save_thumbnail_variant(
+    thumbnailer: Thumbnailer, image: Image.Image, name: str, extension: str
+) -> None:
+    if extension == "avif" and image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+    content = BytesIO()
+    image.save(content, format=extension.upper(), quality=THUMBNAIL_VARIANT_QUALITY)
+    # Replace any stale variant rather than saving under an alternative name
+    thumbnailer.thumbnail_storage.delete(name)
+    thumbnailer.thumbnail_storage.save(name, ContentFile(content.getvalue()))
+    thumbnailer.get_thumbnail_cache(name, create=True, update=True)
+
+
+def get_thumbnail_variants(source: FieldFile, alias: str) -> List[ThumbnailVariant]:
+    """
+    Returns the pre-generated variants of a thumbnail alias of an image,
+    without generating any that are missing
+    """
+    options = aliases.get(alias)
+    if not source or not options:
+        return []
+    thumbnailer = get_thumbnailer(source)
+    thumbnail_name = thumbnailer.get_thumbnail_name(options)
+    names = {
+        get_variant_name(thumbnail_name, x): x for x in THUMBNAIL_VARIANT_FORMATS.keys()
+    }
+    source_cache = thumbnailer.get_source_cache()
+    if not source_cache:
+        return []
+    existing = set(
+        Thumbnail.objects.filter(
+            source=source_cache, name__in=names.keys()
+        ).values_list("name", flat=True)
+    )
+    return [
+        ThumbnailVariant(
+            url=thumbnailer.thumbnail_storage.url(name),
+            content_type=THUMBNAIL_VARIANT_FORMATS[extension],
+        )
+        for name, extension in names.items()
+        if name in existing
+    ]
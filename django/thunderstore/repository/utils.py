@@ -1,5 +1,8 @@
+import hashlib
 from typing import List
 
+from django.core.files import File
+
 from thunderstore.repository.package_reference import PackageReference
 
 
@@ -38,3 +41,21 @@ def has_duplicate_packages(packages: List[PackageReference]) -> bool:
             if ref_a.without_version == ref_b.without_version:
                 return True
     return False
+
+
+def get_file_sha256(file: File) -> str:
+    """
+    Computes the SHA-256 digest of a file, reading it in chunks
+
+    The file is rewound afterwards so it can be read again by the caller.
+
+    :param file: The file to hash
+    :return: The hex encoded digest
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
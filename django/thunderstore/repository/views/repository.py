@@ -1,25 +1,37 @@
 from typing import List, Optional, Set, Tuple
 
+from django.core.paginator import InvalidPage
 from django.db import transaction
 from django.db.models import Count, Q, Sum
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
-from django.utils.functional import cached_property
+from django.utils.functional import SimpleLazyObject, cached_property
 from django.views.generic import View
 from django.views.generic.detail import DetailView
 from django.views.generic.edit import CreateView
 from django.views.generic.list import ListView
 
 from thunderstore.cache.cache import CacheBustCondition, cache_function_result
-from thunderstore.cache.pagination import CachedPaginator
+from thunderstore.cache.pagination import CachedKeysetPaginator, CachedPaginator
+from thunderstore.community.facets import (
+    PackageListingFacetIndex,
+    count_bits,
+    get_package_listing_facet_index,
+)
+from thunderstore.community.filtering import PackageListingFilter
 from thunderstore.community.models import (
     Community,
     PackageCategory,
     PackageListing,
-    PackageListingReviewStatus,
     PackageListingSection,
 )
+from thunderstore.repository.downloads import (
+    count_download,
+    get_download_response,
+    get_download_target,
+    is_download_start,
+)
 from thunderstore.repository.models import (
     PackageVersion,
     UploaderIdentity,
@@ -30,6 +42,29 @@ from thunderstore.repository.package_upload import PackageUploadForm
 # Should be divisible by 4 and 3
 MODS_PER_PAGE = 24
 
+# Orderings consisting only of plain columns, which allows seeking to pages
+# by the ordering values instead of using offsets
+KEYSET_ORDERINGS = {
+    "last-updated": (
+        "-package__is_pinned",
+        "package__is_deprecated",
+        "-package__date_updated",
+        "-pk",
+    ),
+    "newest": (
+        "-package__is_pinned",
+        "package__is_deprecated",
+        "-package__date_created",
+        "-pk",
+    ),
+    "trending": (
+        "-package__is_pinned",
+        "package__is_deprecated",
+        "-trending_score",
+        "-pk",
+    ),
+}
+
 
 class PackageListSearchView(ListView):
     model = PackageListing
@@ -48,6 +83,32 @@ class PackageListSearchView(ListView):
     def get_categories(self):
         return PackageCategory.objects.exclude(~Q(community=self.request.community))
 
+    def get_categories_with_counts(self) -> List[PackageCategory]:
+        """
+        Returns the categories annotated with the amount of listings that
+        selecting them as an included category would add to the results
+
+        The counts are left out while searching, as the facet index doesn't
+        know which listings match the search.
+        """
+        categories = list(self.get_categories())
+        if self.get_search_query():
+            for category in categories:
+                category.facet_count = None
+            return categories
+
+        counts = self.facet_index.get_category_counts(
+            self.facet_index.filter(
+                exclude_categories=self.filter_exclude_categories,
+                include_nsfw=self.get_is_nsfw_included(),
+                include_deprecated=self.get_is_deprecated_included(),
+                scope=self.facet_scope,
+            )
+        )
+        for category in categories:
+            category.facet_count = counts.get(category.pk, 0)
+        return categories
+
     def get_full_cache_vary(self):
         cache_vary = self.get_cache_vary()
         cache_vary += f".{self.request.community.identifier}"
@@ -64,6 +125,7 @@ class PackageListSearchView(ListView):
         return (
             ("last-updated", "Last updated"),
             ("newest", "Newest"),
+            ("trending", "Trending"),
             ("most-downloaded", "Most downloaded"),
             ("top-rated", "Top rated"),
         )
@@ -113,24 +175,50 @@ class PackageListSearchView(ListView):
 
     @property
     def filter_require_categories(self) -> Set[int]:
-        categories = set(self.get_included_categories())
-        if self.active_section:
-            categories.update(
-                self.active_section.require_categories.values_list("pk", flat=True)
-            )
-        return categories
+        return self.listing_filter.require_categories
 
     def get_excluded_categories(self):
         return self._get_int_list("excluded_categories")
 
     @property
     def filter_exclude_categories(self) -> Set[int]:
-        categories = set(self.get_excluded_categories())
-        if self.active_section:
-            categories.update(
-                self.active_section.exclude_categories.values_list("pk", flat=True)
-            )
-        return categories
+        return self.listing_filter.exclude_categories
+
+    @cached_property
+    def listing_filter(self) -> PackageListingFilter:
+        return PackageListingFilter(
+            community=self.request.community,
+            require_categories=self.get_included_categories(),
+            exclude_categories=self.get_excluded_categories(),
+            section=self.active_section,
+            include_nsfw=self.get_is_nsfw_included(),
+            include_deprecated=self.get_is_deprecated_included(),
+        )
+
+    @cached_property
+    def facet_index(self) -> PackageListingFacetIndex:
+        return get_package_listing_facet_index(self.request.community.pk)
+
+    def get_facet_scope(self) -> Optional[int]:
+        """
+        Returns a bitset limiting the facet results to a subset of listings,
+        or None if the results shouldn't be limited
+        """
+        return None
+
+    @cached_property
+    def facet_scope(self) -> Optional[int]:
+        return self.get_facet_scope()
+
+    @cached_property
+    def facet_bitset(self) -> int:
+        return self.facet_index.filter(
+            require_categories=self.filter_require_categories,
+            exclude_categories=self.filter_exclude_categories,
+            include_nsfw=self.get_is_nsfw_included(),
+            include_deprecated=self.get_is_deprecated_included(),
+            scope=self.facet_scope,
+        )
 
     def get_is_nsfw_included(self):
         try:
@@ -154,14 +242,11 @@ class PackageListSearchView(ListView):
     def get_search_query(self):
         return self.request.GET.get("q", "")
 
+    def get_keyset_ordering(self) -> Optional[Tuple[str, ...]]:
+        return KEYSET_ORDERINGS.get(self.get_active_ordering(), None)
+
     def order_queryset(self, queryset):
         active_ordering = self.get_active_ordering()
-        if active_ordering == "newest":
-            return queryset.order_by(
-                "-package__is_pinned",
-                "package__is_deprecated",
-                "-package__date_created",
-            )
         if active_ordering == "most-downloaded":
             return queryset.annotate(
                 total_downloads=Sum("package__versions__downloads")
@@ -178,11 +263,7 @@ class PackageListSearchView(ListView):
                 "package__is_deprecated",
                 "-total_rating",
             )
-        return queryset.order_by(
-            "-package__is_pinned",
-            "package__is_deprecated",
-            "-package__date_updated",
-        )
+        return queryset.order_by(*self.get_keyset_ordering())
 
     def perform_search(self, queryset, search_query):
         search_fields = (
@@ -197,7 +278,7 @@ class PackageListSearchView(ListView):
             for field in search_fields:
                 icontains_query &= ~Q(**{f"{field}__icontains": part})
 
-        return queryset.exclude(icontains_query).distinct()
+        return queryset.exclude(icontains_query)
 
     def get_queryset(self):
         queryset = (
@@ -216,34 +297,7 @@ class PackageListSearchView(ListView):
             # )
         )
 
-        included_categories = self.filter_require_categories
-        if included_categories:
-            include_categories_qs = Q()
-            for category in included_categories:
-                include_categories_qs |= Q(categories=category)
-            queryset = queryset.exclude(~include_categories_qs)
-
-        excluded_categories = self.filter_exclude_categories
-        if excluded_categories:
-            exclude_categories_qs = Q()
-            for category in excluded_categories:
-                exclude_categories_qs |= Q(categories=category)
-            queryset = queryset.exclude(exclude_categories_qs)
-
-        if not self.get_is_nsfw_included():
-            queryset = queryset.exclude(has_nsfw_content=True)
-
-        if not self.get_is_deprecated_included():
-            queryset = queryset.exclude(package__is_deprecated=True)
-
-        if self.request.community.require_package_listing_approval:
-            queryset = queryset.exclude(
-                ~Q(review_status=PackageListingReviewStatus.approved)
-            )
-        else:
-            queryset = queryset.exclude(
-                review_status=PackageListingReviewStatus.rejected
-            )
+        queryset = self.listing_filter.apply(queryset)
 
         search_query = self.get_search_query()
         if search_query:
@@ -258,6 +312,40 @@ class PackageListSearchView(ListView):
             }
         ]
 
+    def get_page_cursor(self) -> str:
+        return self.request.GET.get("cursor", "")
+
+    def get_count_estimate(self) -> Optional[int]:
+        # The facet results match the listing count exactly unless further
+        # narrowed down by a search
+        if self.get_search_query():
+            return None
+        return count_bits(self.facet_bitset)
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Paginates by cursor when the active ordering supports it, falling back
+        to offset pagination for aggregate orderings and for page numbers
+        """
+        keyset_ordering = self.get_keyset_ordering()
+        if keyset_ordering is None or self.request.GET.get("page"):
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = CachedKeysetPaginator(
+            queryset,
+            page_size,
+            ordering=keyset_ordering,
+            cache_key="repository.package_list.keyset_paginator",
+            cache_vary=self.get_full_cache_vary(),
+            cache_bust_condition=CacheBustCondition.any_package_updated,
+            count=self.get_count_estimate,
+        )
+        try:
+            page = paginator.page(self.get_page_cursor())
+        except InvalidPage as e:
+            raise Http404(f"Invalid page: {e}")
+        return (paginator, page, page.object_list, page.has_other_pages())
+
     def get_paginator(
         self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs
     ):
@@ -273,12 +361,14 @@ class PackageListSearchView(ListView):
 
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
-        context["categories"] = self.get_categories()
+        # Only evaluated if the cached list fragment has to be rendered
+        context["categories"] = SimpleLazyObject(self.get_categories_with_counts)
         context["included_categories"] = self.get_included_categories()
         context["excluded_categories"] = self.get_excluded_categories()
         context["nsfw_included"] = self.get_is_nsfw_included()
         context["deprecated_included"] = self.get_is_deprecated_included()
         context["cache_vary"] = self.get_full_cache_vary()
+        context["page_cursor"] = getattr(context["page_obj"], "cursor", "")
         context["page_title"] = self.get_page_title()
         context["ordering_modes"] = self.get_ordering_choices()
         context["sections"] = self.section_choices
@@ -323,6 +413,11 @@ class PackageListByOwnerView(PackageListSearchView):
             ~Q(Q(package__owner=self.owner) & Q(community=self.request.community))
         )
 
+    def get_facet_scope(self) -> Optional[int]:
+        return self.facet_index.get_bitset_for_ids(
+            self.get_base_queryset().values_list("pk", flat=True)
+        )
+
     def get_page_title(self):
         return f"Mods uploaded by {self.owner.name}"
 
@@ -359,6 +454,11 @@ class PackageListByDependencyView(PackageListSearchView):
             ~Q(package__in=get_package_dependants(self.package_listing.package.pk))
         )
 
+    def get_facet_scope(self) -> Optional[int]:
+        return self.facet_index.get_bitset_for_ids(
+            self.get_base_queryset().values_list("pk", flat=True)
+        )
+
     def get_page_title(self):
         return f"Mods that depend on {self.package_listing.package.display_name}"
 
@@ -410,7 +510,7 @@ class PackageDetailView(DetailView):
         context = super().get_context_data(*args, **kwargs)
 
         package_listing = context["object"]
-        dependant_count = len(package_listing.package.dependants_list)
+        dependant_count = package_listing.package.dependant_count
 
         if dependant_count == 1:
             dependants_string = f"{dependant_count} other mod depends on this mod"
@@ -477,18 +577,12 @@ class PackageCreateView(CreateView):
 
 class PackageDownloadView(View):
     def get(self, *args, **kwargs):
-        owner = kwargs["owner"]
-        name = kwargs["name"]
-        version = kwargs["version"]
-
-        listing = get_object_or_404(
-            PackageListing,
-            package__owner__name=owner,
-            package__name=name,
-            community=self.request.community,
-        )
-        version = get_object_or_404(
-            PackageVersion, package=listing.package, version_number=version
+        target = get_download_target(
+            community_pk=self.request.community.pk,
+            owner=kwargs["owner"],
+            name=kwargs["name"],
+            version=kwargs["version"],
         )
-        version.maybe_increase_download_counter(self.request)
-        return redirect(self.request.build_absolute_uri(version.file.url))
+        if is_download_start(self.request):
+            count_download(target.version_pk, self.request)
+        return get_download_response(self.request, target)
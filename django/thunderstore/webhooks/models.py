@@ -8,6 +8,8 @@ from django.db.models import Q
 from django.utils import timezone
 from sentry_sdk import capture_exception
 
+from thunderstore.community.filtering import has_related
+from thunderstore.community.models import PackageListing
 from thunderstore.core.utils import ChoiceEnum
 
 
@@ -58,21 +60,43 @@ class Webhook(models.Model):
 
     @classmethod
     def get_for_package_release(cls, package):
-        base_query = Q(Q(webhook_type=WebhookType.mod_release) & Q(is_active=True))
+        """
+        Returns the webhooks which should be notified of a new release of the
+        package. A package without community listings isn't visible anywhere,
+        so no webhooks match it.
+        """
+        listings = package.community_listings.values_list(
+            "pk", "community_id", "has_nsfw_content"
+        )
+        relations = PackageListing.categories.through.objects.filter(
+            packagelisting__package=package,
+        ).values_list("packagelisting_id", "packagecategory_id")
+        listing_categories = {}
+        for listing_id, category_id in relations:
+            listing_categories.setdefault(listing_id, []).append(category_id)
+
         community_query = Q()
-        for listing in package.community_listings.all():
-            categories = listing.categories.all()
+        for listing_id, community_id, has_nsfw_content in listings:
+            categories = listing_categories.get(listing_id, [])
             query = (
-                ~Q(exclude_categories__in=categories)
-                & Q(Q(require_categories=None) | Q(require_categories__in=categories))
-                & Q(community_site__community=listing.community)
+                ~Q(has_related(cls.exclude_categories, categories))
+                & Q(
+                    ~Q(has_related(cls.require_categories))
+                    | Q(has_related(cls.require_categories, categories))
+                )
+                & Q(community_site__community=community_id)
             )
-            if listing.has_nsfw_content:
+            if has_nsfw_content:
                 query &= Q(allow_nsfw=True)
             community_query |= Q(query)
 
-        full_query = base_query & Q(community_query)
-        return cls.objects.exclude(~Q(full_query))
+        if not community_query:
+            return cls.objects.none()
+        return cls.objects.filter(
+            Q(webhook_type=WebhookType.mod_release)
+            & Q(is_active=True)
+            & Q(community_query)
+        )
 
     def get_version_release_json(self, version):
         thumbnail_url = version.icon.url
@@ -71,3 +71,25 @@ def test_webhook_get_for_package_release_require_categories(
         assert release_webhook not in result
     else:
         assert release_webhook in result
+
+
+@pytest.mark.django_db
+def test_webhook_get_for_package_release_query(
+    release_webhook, active_package_listing, package_category, django_assert_num_queries
+):
+    active_package_listing.categories.add(package_category)
+    release_webhook.exclude_categories.add(package_category)
+
+    with django_assert_num_queries(2):
+        queryset = Webhook.get_for_package_release(active_package_listing.package)
+    sql = str(queryset.query)
+    assert "EXISTS" in sql
+    assert "DISTINCT" not in sql
+    with django_assert_num_queries(1):
+        assert release_webhook not in list(queryset)
+
+
+@pytest.mark.django_db
+def test_webhook_get_for_package_release_without_listings(release_webhook, package):
+    assert package.community_listings.count() == 0
+    assert list(Webhook.get_for_package_release(package)) == []